@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""benchmarks for plant's hot paths over synthetic trees
+
+::
+
+    $ python -m benchmarks --depth 3 --fanout 10 --files 10 --output before.json
+    $ python -m benchmarks --depth 3 --fanout 10 --files 10 --compare before.json
+"""
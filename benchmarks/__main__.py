@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""runs the benchmarks and emits JSON for comparing releases
+
+::
+
+    $ python -m benchmarks --help
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from collections import OrderedDict
+from os.path import join
+
+import plant
+from plant import Node
+
+from benchmarks.tree import SyntheticTree
+
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    """registers a benchmark function, it receives a :py:class:`Context`
+    and returns the amount of operations it performed"""
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+
+    return decorator
+
+
+class Context(object):
+    def __init__(self, tree, sample):
+        self.tree = tree
+        self.root = Node(tree.root)
+        self.files = [join(tree.root, relative) for relative, size in tree.iter_entries() if size is not None]
+        self.sample = self.files[:sample]
+
+
+@benchmark('Node.__init__')
+def node_init(context):
+    for path in context.sample:
+        Node(path)
+
+    return len(context.sample)
+
+
+@benchmark('Node.walk')
+def node_walk(context):
+    return len(context.root.walk())
+
+
+@benchmark('Node.walk(lazy=True)')
+def node_walk_lazy(context):
+    return sum(1 for path in context.root.walk(lazy=True))
+
+
+@benchmark('Node.walk(use_dir_fd=True)')
+def node_walk_dir_fd(context):
+    return len(context.root.walk(use_dir_fd=True))
+
+
+@benchmark('Node.walk_nodes(use_dir_fd=True)')
+def node_walk_nodes_dir_fd(context):
+    return len(context.root.walk_nodes(use_dir_fd=True))
+
+
+@benchmark('Node.glob')
+def node_glob(context):
+    context.root.glob('*.py')
+    return len(context.files)
+
+
+@benchmark('Node.find_with_regex')
+def node_find_with_regex(context):
+    context.root.find_with_regex(r'[.](png|css)$')
+    return len(context.files)
+
+
+@benchmark('Node.relative')
+def node_relative(context):
+    relative = context.root.relative
+    for path in context.files:
+        relative(path)
+
+    return len(context.files)
+
+
+@benchmark('Node.path_to_related')
+def node_path_to_related(context):
+    sample = context.sample[:1000]
+    target = Node(sample[-1])
+    for path in sample:
+        target.path_to_related(path)
+
+    return len(sample)
+
+
+def measure(function, context, repeat):
+    """returns the best timing out of ``repeat`` runs and the peak of
+    memory allocated by a separate, traced, run"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        operations = function(context)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(context)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return OrderedDict([
+        ('operations', operations),
+        ('seconds', best),
+        ('ops_per_sec', best and operations / best or 0.0),
+        ('peak_bytes', peak),
+    ])
+
+
+def run(tree, names=None, repeat=3, sample=10000):
+    """runs the selected benchmarks against an already built tree
+
+    :returns: a JSON-serializable :py:class:`dict`
+    """
+    context = Context(tree, sample)
+    results = OrderedDict()
+    for name, function in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        results[name] = measure(function, context, repeat)
+
+    return OrderedDict([
+        ('plant', plant.__version__),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('tree', tree.parameters),
+        ('entries', tree.entry_count),
+        ('results', results),
+    ])
+
+
+def compare(report, baseline, tolerance):
+    """prints the speed ratio of each benchmark against the baseline
+
+    :returns: the names of the benchmarks slower than ``tolerance`` allows
+    """
+    regressions = []
+    for name, current in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous['ops_per_sec']:
+            print('{0:30} {1:>14.1f} ops/s   (new)'.format(name, current['ops_per_sec']))
+            continue
+
+        ratio = current['ops_per_sec'] / previous['ops_per_sec']
+        flag = ''
+        if ratio < 1 - tolerance:
+            flag = 'REGRESSION'
+            regressions.append(name)
+
+        print('{0:30} {1:>14.1f} ops/s {2:>7.2f}x  {3}'.format(name, current['ops_per_sec'], ratio, flag))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--root', help='where to build the synthetic tree, reused across runs')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fanout', type=int, default=10)
+    parser.add_argument('--files', type=int, default=10, help='files per directory')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sample', type=int, default=10000,
+                        help='how many paths the per-path benchmarks use')
+    parser.add_argument('--only', action='append', choices=list(BENCHMARKS),
+                        help='run only the given benchmark, can be repeated')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--compare', help='a previous JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='slowdown ratio tolerated by --compare before failing')
+    args = parser.parse_args(argv)
+
+    tree = SyntheticTree(
+        args.root or join(tempfile.gettempdir(), 'plant-benchmark-{0}-{1}-{2}-{3}'.format(
+            args.depth, args.fanout, args.files, args.seed)),
+        depth=args.depth, fanout=args.fanout, files=args.files, seed=args.seed)
+    tree.build()
+
+    report = run(tree, args.only, args.repeat, args.sample)
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(report, fd, indent=2)
+
+    if not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write(os.linesep)
+        return 0
+
+    with open(args.compare) as fd:
+        baseline = json.load(fd)
+
+    return compare(report, baseline, args.tolerance) and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""measures how long ``import plant`` takes in a fresh interpreter and
+fails when it goes over budget
+
+::
+
+    $ python -m benchmarks.imports --budget-ms 15
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import json
+import subprocess
+import sys
+
+
+DEFAULT_BUDGET_MS = 15.0
+
+# the optional engines must never be loaded by ``import plant``
+HEAVY_MODULES = (
+    'plant.core',
+    'plant.walker',
+    'plant.statx',
+    'concurrent.futures',
+    'ctypes',
+)
+
+SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+'''
+
+
+def measure(module='plant', repeat=20):
+    """imports ``module`` in ``repeat`` fresh interpreters
+
+    :returns: the best time in milliseconds and the modules loaded by the import
+    """
+    best, modules = None, []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', SCRIPT.format(module=module)])
+        result = json.loads(output.decode('utf-8'))
+        milliseconds = result['seconds'] * 1000
+        if best is None or milliseconds < best:
+            best, modules = milliseconds, result['modules']
+
+    return best, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.imports', description=__doc__)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    milliseconds, modules = measure(repeat=args.repeat)
+    heavy = [name for name in HEAVY_MODULES if name in modules]
+
+    print(json.dumps({
+        'import_ms': milliseconds,
+        'budget_ms': args.budget_ms,
+        'heavy_modules': heavy,
+    }, indent=2))
+
+    return (milliseconds > args.budget_ms or heavy) and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""deterministic synthetic trees
+
+The same ``(depth, fanout, files, seed)`` always produce the very same
+tree, so numbers taken on different releases are comparable.
+"""
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import random
+
+from os.path import exists, join
+
+
+EXTENSIONS = ('py', 'txt', 'md', 'log', 'png', 'css', 'js', 'json')
+MAX_ENTRIES = 1000000
+MARKER = '.plant-benchmark-tree.json'
+
+
+class SyntheticTree(object):
+    """describes a tree with ``fanout`` subdirectories per directory
+    down to ``depth`` levels and ``files`` files in every directory.
+
+    :param root: where the tree lives
+    :param depth: the amount of directory levels below ``root``
+    :param fanout: the amount of subdirectories per directory
+    :param files: the amount of files per directory
+    :param seed: the seed of the names and sizes
+    :param max_size: the maximum file size in bytes
+    """
+
+    def __init__(self, root, depth=3, fanout=10, files=10, seed=42, max_size=64):
+        self.root = os.path.abspath(root)
+        self.depth = depth
+        self.fanout = fanout
+        self.files = files
+        self.seed = seed
+        self.max_size = max_size
+
+    @property
+    def parameters(self):
+        return {
+            'depth': self.depth,
+            'fanout': self.fanout,
+            'files': self.files,
+            'seed': self.seed,
+            'max_size': self.max_size,
+        }
+
+    @property
+    def directory_count(self):
+        return sum(self.fanout ** level for level in range(self.depth + 1))
+
+    @property
+    def entry_count(self):
+        """the amount of files plus directories, without building the tree"""
+        return self.directory_count * (self.files + 1) - 1
+
+    def iter_entries(self):
+        """yields ``(relative_path, size)`` for every file and
+        ``(relative_path, None)`` for every directory, parents first"""
+        rng = random.Random(self.seed)
+
+        def visit(relative, level):
+            for index in range(self.files):
+                extension = EXTENSIONS[rng.randrange(len(EXTENSIONS))]
+                name = 'file{0:04d}.{1}'.format(index, extension)
+                yield join(relative, name), rng.randrange(self.max_size + 1)
+
+            if level == self.depth:
+                return
+
+            for index in range(self.fanout):
+                name = join(relative, 'dir{0:04d}'.format(index))
+                yield name, None
+                for entry in visit(name, level + 1):
+                    yield entry
+
+        return visit('', 0)
+
+    def is_built(self):
+        try:
+            with io.open(join(self.root, MARKER)) as fd:
+                return json.load(fd) == self.parameters
+        except (IOError, OSError, ValueError):
+            return False
+
+    def build(self):
+        """materializes the tree on disk, unless a tree with the same
+        parameters is already there
+
+        :returns: the root path
+        """
+        if self.entry_count > MAX_ENTRIES:
+            raise ValueError('the tree would have {0} entries, the maximum is {1}'.format(
+                self.entry_count, MAX_ENTRIES))
+
+        if self.is_built():
+            return self.root
+
+        if not exists(self.root):
+            os.makedirs(self.root)
+
+        for relative, size in self.iter_entries():
+            path = join(self.root, relative)
+            if size is None:
+                if not exists(path):
+                    os.mkdir(path)
+                continue
+
+            with io.open(path, 'wb') as fd:
+                fd.write(b'x' * size)
+
+        with io.open(join(self.root, MARKER), 'w') as fd:
+            fd.write(json.dumps(self.parameters))
+
+        return self.root
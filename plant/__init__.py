@@ -14,23 +14,76 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""plant keeps its package init cheap: :py:mod:`plant.core` and the
+optional engines are only imported the first time one of their names
+is accessed, see :py:func:`__getattr__`.
+"""
 from __future__ import unicode_literals
 
-from plant.core import Node
-from plant.core import absolutify
-from plant.core import isdir
-from plant.core import isdir_base  # noqa
-from plant.core import isfile
-from plant.core import isfile_base  # noqa
+import importlib
+
 from plant.version import version
 
 __version__ = version
 
+# name -> module that defines it
+LAZY_ATTRIBUTES = {
+    'Node': 'plant.core',
+    'absolutify': 'plant.core',
+    'isdir': 'plant.core',
+    'isdir_base': 'plant.core',
+    'isfile': 'plant.core',
+    'isfile_base': 'plant.core',
+    'profile': 'plant.instrument',
+    'throttle': 'plant.throttling',
+}
+
+SUBMODULES = (
+    'backends',
+    'cleanup',
+    'cli',
+    'compare',
+    'core',
+    'estimate',
+    'handy',
+    'hashing',
+    'ignore',
+    'index',
+    'instrument',
+    'manifest',
+    'patterns',
+    'sharedcache',
+    'shards',
+    'statx',
+    'throttling',
+    'trie',
+    'walker',
+)
+
 __all__ = [
     'Node',
     '__version__',
     'absolutify',
     'isdir',
     'isfile',
+    'profile',
+    'throttle',
     'version',
 ]
+
+
+def __getattr__(name):
+    """imports the module that provides ``name`` on first access"""
+    if name in LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(LAZY_ATTRIBUTES[name]), name)
+    elif name in SUBMODULES:
+        value = importlib.import_module('plant.{0}'.format(name))
+    else:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_ATTRIBUTES) | set(SUBMODULES))
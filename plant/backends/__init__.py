@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""storage backends for :py:class:`plant.Node`
+
+A backend answers the few primitive questions :py:class:`plant.Node`
+asks a filesystem: stat, listdir, walk and open. The local disk is
+served by :py:class:`plant.core.LocalBackend`, other backends expose
+their trees through :py:attr:`Backend.Node`, a subclass of
+:py:class:`plant.Node` bound to them:
+
+* :py:mod:`plant.backends.archive` zip and tar files
+* :py:mod:`plant.backends.memory` a filesystem in memory
+* :py:mod:`plant.backends.remote` object storage buckets
+"""
+from __future__ import unicode_literals
+
+from plant.backends.base import Backend
+
+__all__ = [
+    'Backend',
+]
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""zip and tar archives as read-only trees
+
+The member list of an archive is read once into an index, from then on
+``stat``, ``listdir`` and ``isdir`` are dictionary lookups and members
+are streamed straight out of the archive when opened.
+
+::
+
+    >>> from plant.backends.archive import open_archive
+    >>>
+    >>> bundle = open_archive('/srv/releases/site.tar.gz')
+    >>> bundle.root.glob('*.css')
+    [Node('/static/css/main.css')]
+    >>> bundle.root.open('static/css/main.css').read()
+    'body { color: black }'
+"""
+from __future__ import unicode_literals
+
+import errno
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+from collections import OrderedDict
+from stat import S_IFLNK, S_IFMT, S_IFREG
+
+from plant.backends.tree import FILE_MODE, TreeBackend
+
+
+WRITE_MODES = set('wax+')
+ARCHIVES_SIZE = 32
+
+
+class ArchiveBackend(TreeBackend):
+    """the index shared by :py:class:`ZipBackend` and :py:class:`TarBackend`,
+    subclasses implement :py:meth:`load` and :py:meth:`open_member`
+
+    :param path: the path of the archive on the local disk
+    """
+
+    def __init__(self, path):
+        super(ArchiveBackend, self).__init__()
+        self.path = os.path.abspath(path)
+        self.load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, value, traceback):
+        self.close()
+
+    def load(self):
+        raise NotImplementedError
+
+    def open_member(self, member):
+        raise NotImplementedError
+
+    def close(self):
+        """closes the archive and forgets it, so that :py:func:`open_archive`
+        opens it again next time"""
+        forget(self)
+        self.archive.close()
+
+    def open(self, path, mode='r', buffering=-1, encoding=None, errors=None, newline=None):
+        """streams a member out of the archive, archives are read-only.
+        Reading members of the same tar from several threads at once is
+        not supported by :py:mod:`tarfile`."""
+        if WRITE_MODES & set(mode):
+            raise OSError(errno.EROFS, os.strerror(errno.EROFS), path)
+
+        key = self.normalize(path)
+        if key in self.children:
+            raise OSError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+        if key not in self.members:
+            raise self.not_found(path)
+
+        with self.lock:
+            raw = self.open_member(self.members[key])
+
+        if 'b' in mode:
+            return raw
+
+        return io.TextIOWrapper(raw, encoding=encoding or 'utf-8', errors=errors, newline=newline)
+
+
+class ZipBackend(ArchiveBackend):
+    """a zip file, its central directory is read once by :py:mod:`zipfile`"""
+
+    def load(self):
+        self.archive = zipfile.ZipFile(self.path)
+        for info in self.archive.infolist():
+            path = self.normalize(info.filename)
+            mtime = time.mktime(info.date_time + (0, 0, -1))
+            if info.is_dir():
+                self.add_directory(path, mtime)
+                continue
+
+            mode = info.external_attr >> 16
+            if not S_IFMT(mode):
+                mode = FILE_MODE
+            self.add_file(path, info, mode, info.file_size, mtime)
+
+    def open_member(self, member):
+        return self.archive.open(member)
+
+
+class TarBackend(ArchiveBackend):
+    """a tar file, optionally compressed.
+
+    Compressed tars have to be decompressed from the start to reach a
+    member, prefer uncompressed tars for random access.
+    """
+
+    def load(self):
+        self.archive = tarfile.open(self.path)
+        for member in self.archive:
+            path = self.normalize(member.name)
+            if member.isdir():
+                self.add_directory(path, member.mtime, member.uid, member.gid)
+                continue
+
+            kind = member.issym() and S_IFLNK or S_IFREG
+            self.add_file(path, member, kind | member.mode, member.size, member.mtime, member.uid, member.gid)
+
+    def open_member(self, member):
+        fd = self.archive.extractfile(member)
+        if fd is None:
+            raise OSError(errno.EINVAL, 'not a regular file', member.name)
+        return fd
+
+
+_archives = OrderedDict()
+_archives_lock = threading.Lock()
+
+
+def forget(backend):
+    """removes ``backend`` from the cache of :py:func:`open_archive`"""
+    with _archives_lock:
+        for key in [key for key, cached in _archives.items() if cached is backend]:
+            del _archives[key]
+
+
+def open_archive(path, cache=True):
+    """returns the backend of a zip or tar archive
+
+    The backends are cached per path, size and modification time, so
+    opening the same archive again reuses its index. Only the
+    :py:data:`ARCHIVES_SIZE` most recently used ones are kept, closing
+    a backend removes it from the cache.
+
+    :param path: the path of the archive
+    :param cache: bool - reuse the backend of an archive already opened
+    :raises: :py:exc:`ValueError` when the file is not a zip nor a tar
+    :returns: a :py:class:`ZipBackend` or a :py:class:`TarBackend`
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    stats = os.stat(path)
+    key = (path, stats.st_size, stats.st_mtime)
+    with _archives_lock:
+        if cache and key in _archives:
+            _archives.move_to_end(key)
+            return _archives[key]
+
+    if zipfile.is_zipfile(path):
+        backend = ZipBackend(path)
+    elif tarfile.is_tarfile(path):
+        backend = TarBackend(path)
+    else:
+        raise ValueError('{0} is neither a zip nor a tar archive'.format(path))
+
+    if cache:
+        with _archives_lock:
+            # the archive changed on disk, its previous backend is stale
+            for stale in [cached for cached in _archives if cached[0] == path]:
+                del _archives[stale]
+
+            _archives[key] = backend
+            # the evicted ones are closed once nobody else uses them
+            while len(_archives) > ARCHIVES_SIZE:
+                _archives.popitem(last=False)
+
+    return backend
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import unicode_literals
+
+import errno
+import os
+import posixpath
+
+from stat import S_ISDIR, S_ISREG
+
+
+class Backend(object):
+    """the base class of the storage backends.
+
+    Paths are always absolute, ``/`` separated and relative to the root
+    of the backend. Subclasses implement at least :py:meth:`stat`,
+    :py:meth:`listdir` and :py:meth:`open`, the other methods are built
+    on top of them and can be overridden by faster versions.
+
+    ::
+
+        >>> from plant.backends.archive import open_archive
+        >>>
+        >>> root = open_archive('/srv/bundle.zip').root
+        >>> root.glob('*.css')
+        [Node('/static/style.css')]
+    """
+
+    local = False
+
+    def __init__(self):
+        self._node_class = None
+
+    @property
+    def Node(self):
+        """a subclass of :py:class:`plant.Node` whose instances live
+        in this backend"""
+        if self._node_class is None:
+            from plant.core import Node
+            self._node_class = type(str('Node'), (Node,), {'backend': self})
+
+        return self._node_class
+
+    @property
+    def root(self):
+        """the :py:class:`plant.Node` of the root of the backend"""
+        return self.Node('/')
+
+    def normalize(self, path):
+        """turns any path into an absolute, normalized one"""
+        return posixpath.normpath(posixpath.join('/', path))
+
+    def display(self, path):
+        """the path shown by ``repr(node)``"""
+        return path or '/'
+
+    def not_found(self, path):
+        return OSError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+    def stat(self, path):
+        """returns a tuple ordered like :py:data:`plant.core.STAT_LABELS`
+
+        :raises: :py:exc:`OSError` when the path does not exist
+        """
+        raise NotImplementedError
+
+    def lstat(self, path):
+        """like :py:meth:`stat` but describing a symlink itself rather
+        than its target, the same as :py:meth:`stat` for the backends
+        without symlinks"""
+        return self.stat(path)
+
+    def readlink(self, path):
+        """returns the target of a symlink
+
+        :raises: :py:exc:`OSError` when the path is not a symlink
+        """
+        raise OSError(errno.EINVAL, os.strerror(errno.EINVAL), path)
+
+    def listdir(self, path):
+        """returns the names of the children of a directory
+
+        :raises: :py:exc:`OSError` when the path is not a directory
+        """
+        raise NotImplementedError
+
+    def open(self, path, mode='r', *args, **kw):
+        """opens a file of the backend"""
+        raise NotImplementedError
+
+    def exists(self, path):
+        try:
+            self.stat(path)
+        except OSError:
+            return False
+
+        return True
+
+    def isfile(self, path):
+        """like :py:func:`plant.core.isfile`, guesses by the presence of
+        a dot in the name when the path does not exist"""
+        try:
+            return S_ISREG(self.stat(path)[0])
+        except OSError:
+            return '.' in posixpath.basename(path)
+
+    def isdir(self, path):
+        try:
+            return S_ISDIR(self.stat(path)[0])
+        except OSError:
+            return False
+
+    def isfile_many(self, paths):
+        """like :py:meth:`isfile` for a sequence of paths"""
+        return [self.isfile(path) for path in paths]
+
+    def walk(self, top, **options):
+        """yields ``(root, dirs, files)`` like :py:func:`os.walk`
+
+        :param top: the path of the top directory
+        :param ``**options``: traversal options, only supported by
+          :py:class:`plant.core.LocalBackend`
+        """
+        if options:
+            raise TypeError('{0} does not support the traversal options: {1}'.format(
+                type(self).__name__, ', '.join(sorted(options))))
+
+        stack = [self.normalize(top)]
+        while stack:
+            root = stack.pop()
+            try:
+                names = self.listdir(root)
+            except OSError:
+                continue
+
+            dirs, files = [], []
+            for name in names:
+                (dirs if self.isdir(posixpath.join(root, name)) else files).append(name)
+
+            yield root, dirs, files
+            stack.extend(posixpath.join(root, name) for name in reversed(dirs))
+
+    def walk_stats(self, top, **options):
+        """yields ``(path, stats)`` for each file under ``top``"""
+        for root, dirs, files in self.walk(top, **options):
+            for name in files:
+                path = posixpath.join(root, name)
+                try:
+                    yield path, self.stat(path)
+                except OSError:
+                    continue
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""a filesystem living in memory
+
+Handy for tests and for planning runs over large simulated trees, no
+disk I/O is ever performed.
+
+::
+
+    >>> from plant.backends.memory import MemoryBackend
+    >>>
+    >>> fs = MemoryBackend.from_dict({
+    ...     'docs/index.md': '# hello',
+    ...     'static/': None,
+    ... })
+    >>> fs.root.find('index')
+    Node('/docs/index.md')
+    >>> with fs.root.open('static/style.css', 'w') as fd:
+    ...     fd.write('body {}')
+    >>> fs.root.glob('*.css')
+    [Node('/static/style.css')]
+    >>> fs.root.open('static/style.css').read()
+    'body {}'
+"""
+from __future__ import unicode_literals
+
+import errno
+import io
+import os
+import posixpath
+import time
+
+from plant.backends.tree import FILE_MODE, TreeBackend
+
+
+class MemoryFile(io.BytesIO):
+    """a :py:class:`io.BytesIO` that hands its contents to a callback
+    when closed"""
+
+    def __init__(self, data, on_close):
+        super(MemoryFile, self).__init__(data)
+        self.on_close = on_close
+
+    def close(self):
+        if not self.closed and self.on_close is not None:
+            self.on_close(self.getvalue())
+            self.on_close = None
+        super(MemoryFile, self).close()
+
+
+class MemoryBackend(TreeBackend):
+    """a mutable tree of directories and files kept in dictionaries
+
+    :param clock: a callable returning the current time, used for the
+      modification times
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        super(MemoryBackend, self).__init__()
+
+    @classmethod
+    def from_dict(cls, tree, **kw):
+        """builds a backend out of a dict mapping paths to their
+        contents, ``None`` marks a directory
+
+        :param tree: a :py:class:`dict`
+        :returns: a :py:class:`MemoryBackend`
+        """
+        backend = cls(**kw)
+        for path, content in sorted(tree.items()):
+            if content is None:
+                backend.makedirs(path)
+            else:
+                backend.write(path, content)
+
+        return backend
+
+    def makedirs(self, path):
+        """creates a directory and its missing parents"""
+        key = self.normalize(path)
+        with self.lock:
+            if key in self.stats and key not in self.children:
+                raise OSError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            self.add_directory(key, self.clock())
+
+    def write(self, path, content):
+        """creates or replaces a file, creating its missing parents
+
+        :param path: the path of the file
+        :param content: :py:class:`bytes` or text, which is encoded as utf-8
+        """
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+
+        key = self.normalize(path)
+        with self.lock:
+            if key in self.children:
+                raise OSError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+            self.add_file(key, content, FILE_MODE, len(content), self.clock())
+
+    def remove(self, path):
+        """removes a file, or a directory with everything under it"""
+        key = self.normalize(path)
+        with self.lock:
+            if key not in self.stats:
+                raise self.not_found(path)
+            if key == '/':
+                raise OSError(errno.EBUSY, os.strerror(errno.EBUSY), path)
+
+            for name in list(self.children.get(key, ())):
+                self.remove(posixpath.join(key, name))
+
+            self.children.pop(key, None)
+            self.members.pop(key, None)
+            del self.stats[key]
+            del self.children[posixpath.dirname(key)][posixpath.basename(key)]
+
+    def open(self, path, mode='r', buffering=-1, encoding=None, errors=None, newline=None):
+        """opens a file in memory, written contents are stored when the
+        file is closed"""
+        key = self.normalize(path)
+        if key in self.children:
+            raise OSError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+
+        writing = bool(set('wax+') & set(mode))
+        exists = key in self.members
+        if not exists and not writing:
+            raise self.not_found(path)
+        if 'x' in mode and exists:
+            raise OSError(errno.EEXIST, os.strerror(errno.EEXIST), path)
+        if writing and posixpath.dirname(key) not in self.children:
+            raise self.not_found(path)
+
+        data = b''
+        if exists and 'w' not in mode:
+            data = self.members[key]
+
+        raw = MemoryFile(data, writing and (lambda content: self.write(key, content)) or None)
+        if 'a' in mode:
+            raw.seek(0, io.SEEK_END)
+
+        if 'b' in mode:
+            return raw
+
+        return io.TextIOWrapper(raw, encoding=encoding or 'utf-8', errors=errors, newline=newline)
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""object storage buckets as trees
+
+Object stores have no directories, only keys, so listing a tree one
+directory at a time would cost a request per directory. The
+:py:class:`RemoteBackend` lists whole prefixes instead, one page of up
+to :py:data:`PAGE_SIZE` keys per request, and keeps what it learned in
+an index: after the first ``walk`` or ``glob`` of a subtree its
+``stat``, ``listdir`` and ``isdir`` calls are dictionary lookups. A
+``listdir`` of a directory not loaded yet only lists its top level.
+
+The top level of a subtree is listed with a ``/`` delimiter and every
+common prefix found there is prefetched concurrently, each over its
+own connection taken from a :py:class:`ConnectionPool`.
+
+Clients implement the small :py:class:`ObjectStore` protocol,
+:py:class:`S3ObjectStore` adapts a ``boto3`` client and
+:py:class:`MemoryObjectStore` is an in-process stand-in with the same
+paging semantics, for tests.
+
+::
+
+    >>> import boto3
+    >>> from plant.backends.remote import RemoteBackend, S3ObjectStore
+    >>>
+    >>> backend = RemoteBackend(lambda: S3ObjectStore(boto3.client('s3'), 'assets'), prefix='site/')
+    >>> backend.root.glob('*.css')
+    [Node('/static/css/main.css')]
+    >>> backend.root.open('static/css/main.css').read()
+    'body {}'
+"""
+from __future__ import unicode_literals
+
+import bisect
+import contextlib
+import errno
+import io
+import os
+import posixpath
+import threading
+import queue
+import time
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from plant import instrument
+from plant.backends.memory import MemoryFile
+from plant.backends.tree import FILE_MODE, TreeBackend
+
+
+# the maximum page size of ``ListObjectsV2``
+PAGE_SIZE = 1000
+DEFAULT_CONNECTIONS = 8
+WRITE_MODES = set('wax+')
+
+
+class ObjectStore(object):
+    """the protocol of the clients used by :py:class:`RemoteBackend`.
+
+    Keys are ``/`` separated strings without a leading slash, a key
+    ending in ``/`` is a directory marker.
+    """
+
+    def list_objects(self, prefix, delimiter=None, token=None, limit=PAGE_SIZE):
+        """lists one page of the keys starting with ``prefix``, in
+        lexicographic order.
+
+        :param prefix: the key prefix
+        :param delimiter: when given, keys containing it after the
+          prefix are rolled up into common prefixes
+        :param token: the continuation token returned by the previous page
+        :param limit: the maximum amount of keys plus common prefixes
+        :returns: a tuple ``(objects, prefixes, token)`` where
+          ``objects`` is a list of ``(key, size, mtime)``, ``prefixes``
+          a list of common prefixes ending in the delimiter and
+          ``token`` is ``None`` on the last page
+        """
+        raise NotImplementedError
+
+    def get_object(self, key):
+        """returns the contents of a key as :py:class:`bytes`"""
+        raise NotImplementedError
+
+    def put_object(self, key, data):
+        """stores :py:class:`bytes` under a key"""
+        raise NotImplementedError
+
+
+class MemoryObjectStore(ObjectStore):
+    """an in-process object store with the listing semantics of S3,
+    it counts the requests it serves in :py:attr:`requests`
+
+    :param objects: an optional :py:class:`dict` mapping keys to contents
+    :param clock: a callable returning the current time
+    """
+
+    def __init__(self, objects=None, clock=time.time):
+        self.clock = clock
+        self.keys = []
+        self.objects = {}
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        for key, data in sorted((objects or {}).items()):
+            self.put_object(key, data)
+        self.requests.clear()
+
+    def list_objects(self, prefix, delimiter=None, token=None, limit=PAGE_SIZE):
+        self.requests['list'] += 1
+        with self.lock:
+            start = bisect.bisect_left(self.keys, token or prefix)
+            objects, prefixes, position = [], [], start
+            while position < len(self.keys) and len(objects) + len(prefixes) < limit:
+                key = self.keys[position]
+                if not key.startswith(prefix):
+                    break
+
+                position += 1
+                cut = key.find(delimiter, len(prefix)) if delimiter else -1
+                if cut == -1:
+                    data, mtime = self.objects[key]
+                    objects.append((key, len(data), mtime))
+                    continue
+
+                common = key[:cut + len(delimiter)]
+                prefixes.append(common)
+                # skips the rest of the keys rolled up in the same prefix
+                position = bisect.bisect_left(self.keys, common[:-1] + chr(ord(delimiter) + 1))
+
+            more = position < len(self.keys) and self.keys[position].startswith(prefix)
+            return objects, prefixes, more and self.keys[position] or None
+
+    def get_object(self, key):
+        self.requests['get'] += 1
+        with self.lock:
+            if key not in self.objects:
+                raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), key)
+            return self.objects[key][0]
+
+    def put_object(self, key, data):
+        self.requests['put'] += 1
+        with self.lock:
+            if key not in self.objects:
+                bisect.insort(self.keys, key)
+            self.objects[key] = (bytes(data), self.clock())
+
+
+class S3ObjectStore(ObjectStore):
+    """adapts a ``boto3`` S3 client, or any client with the same
+    ``list_objects_v2``, ``get_object`` and ``put_object`` methods
+
+    :param client: the client
+    :param bucket: the name of the bucket
+    """
+
+    def __init__(self, client, bucket):
+        self.client = client
+        self.bucket = bucket
+
+    def list_objects(self, prefix, delimiter=None, token=None, limit=PAGE_SIZE):
+        params = dict(Bucket=self.bucket, Prefix=prefix, MaxKeys=limit)
+        if delimiter:
+            params['Delimiter'] = delimiter
+        if token:
+            params['ContinuationToken'] = token
+
+        page = self.client.list_objects_v2(**params)
+        objects = [
+            (item['Key'], item['Size'], time.mktime(item['LastModified'].timetuple()))
+            for item in page.get('Contents', ())
+        ]
+        prefixes = [item['Prefix'] for item in page.get('CommonPrefixes', ())]
+        return objects, prefixes, page.get('IsTruncated') and page['NextContinuationToken'] or None
+
+    def get_object(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), key)
+
+    def put_object(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+
+class ConnectionPool(object):
+    """hands out at most ``size`` clients at a time, reusing the idle
+    ones instead of connecting again
+
+    :param connect: a callable returning a new :py:class:`ObjectStore`
+    :param size: the maximum amount of clients in use at once
+    """
+
+    def __init__(self, connect, size=DEFAULT_CONNECTIONS):
+        self.connect = connect
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextlib.contextmanager
+    def connection(self):
+        with self.slots:
+            try:
+                client = self.idle.get_nowait()
+            except queue.Empty:
+                client = self.connect()
+
+            try:
+                yield client
+            finally:
+                self.idle.put(client)
+
+
+class RemoteBackend(TreeBackend):
+    """a bucket, or a prefix of it, listed lazily and in batches
+
+    :param connect: a callable returning a new :py:class:`ObjectStore`,
+      or a :py:class:`ConnectionPool`
+    :param prefix: the key prefix that is the root of the tree
+    :param page_size: the amount of keys requested per listing
+    :param workers: the amount of listings prefetched concurrently,
+      also the size of the pool created out of ``connect``
+    """
+
+    def __init__(self, connect, prefix='', page_size=PAGE_SIZE, workers=DEFAULT_CONNECTIONS):
+        super(RemoteBackend, self).__init__()
+        if isinstance(connect, ConnectionPool):
+            self.pool = connect
+        else:
+            self.pool = ConnectionPool(connect, workers)
+
+        self.prefix = prefix and prefix.rstrip('/') + '/' or ''
+        self.page_size = page_size
+        self.workers = workers
+        # the paths whose whole subtree is in the index
+        self.loaded = set()
+        # the paths whose children, but not their subtrees, are in the index
+        self.listed = set()
+
+    def key_for(self, path):
+        """the object key of a normalized path"""
+        return self.prefix + path.lstrip('/')
+
+    def path_for(self, key):
+        return self.normalize(key[len(self.prefix):])
+
+    def is_loaded(self, path):
+        """whether the whole subtree of the path is in the index"""
+        while True:
+            if path in self.loaded:
+                return True
+            if path == '/':
+                return False
+            path = posixpath.dirname(path)
+
+    def list_pages(self, prefix, delimiter=None):
+        """yields the pages of a listing, one request each"""
+        token = None
+        while True:
+            with self.pool.connection() as client:
+                objects, prefixes, token = instrument.call(
+                    'listdir', client.list_objects, prefix,
+                    delimiter=delimiter, token=token, limit=self.page_size)
+
+            yield objects, prefixes
+            if not token:
+                return
+
+    def add_objects(self, objects):
+        with self.lock:
+            for key, size, mtime in objects:
+                path = self.path_for(key)
+                if key.endswith('/'):
+                    self.add_directory(path, mtime)
+                elif path not in self.children:
+                    self.add_file(path, key, FILE_MODE, size, mtime)
+
+    def load_prefix(self, prefix):
+        for objects, prefixes in self.list_pages(prefix):
+            self.add_objects(objects)
+
+    def load_children(self, path):
+        """lists the top level of a path into the index
+
+        :param path: a normalized path
+        :returns: the key prefixes of its subdirectories
+        """
+        prefix = path == '/' and self.prefix or self.key_for(path) + '/'
+        subtrees = []
+        for objects, prefixes in self.list_pages(prefix, delimiter='/'):
+            self.add_objects(objects)
+            with self.lock:
+                for common in prefixes:
+                    self.add_directory(self.path_for(common), 0)
+            subtrees.extend(prefixes)
+
+        with self.lock:
+            if path in self.children:
+                self.listed.add(path)
+
+        return subtrees
+
+    def load(self, path):
+        """lists the whole subtree of a path into the index, the
+        common prefixes of its top level are listed concurrently
+
+        :param path: a normalized path
+        """
+        if self.is_loaded(path):
+            return
+
+        subtrees = self.load_children(path)
+        if subtrees:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(self.load_prefix, subtrees))
+
+        with self.lock:
+            if path in self.children:
+                self.loaded.add(path)
+
+    def prefetch(self, *paths):
+        """starts listing the given paths in the background
+
+        :returns: a :py:class:`threading.Thread` to join
+        """
+        thread = threading.Thread(target=lambda: [self.load(self.normalize(p)) for p in paths])
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def lookup(self, path):
+        """makes sure the index knows about a path, listing only the
+        path itself when its parent was not loaded yet"""
+        key = self.normalize(path)
+        parent = posixpath.dirname(key)
+        if key in self.stats or parent in self.listed or self.is_loaded(parent):
+            return key
+
+        # the keys come sorted, so the listing stops at the first page
+        # that went past both the key and its directory prefix
+        name = self.key_for(key)
+        for objects, prefixes in self.list_pages(name, delimiter='/'):
+            self.add_objects(o for o in objects if o[0] == name)
+            if name + '/' in prefixes:
+                with self.lock:
+                    self.add_directory(key, 0)
+
+            seen = [o[0] for o in objects] + prefixes
+            if seen and max(seen) >= name + '/':
+                break
+
+        return key
+
+    def stat(self, path):
+        return super(RemoteBackend, self).stat(self.lookup(path))
+
+    def exists(self, path):
+        return super(RemoteBackend, self).exists(self.lookup(path))
+
+    def isdir(self, path):
+        return super(RemoteBackend, self).isdir(self.lookup(path))
+
+    def listdir(self, path):
+        key = self.normalize(path)
+        if key not in self.listed and not self.is_loaded(key):
+            self.load_children(key)
+
+        return super(RemoteBackend, self).listdir(self.lookup(key))
+
+    def walk(self, top, **options):
+        self.load(self.normalize(top))
+        return super(RemoteBackend, self).walk(top, **options)
+
+    def open(self, path, mode='r', buffering=-1, encoding=None, errors=None, newline=None):
+        """downloads an object, or uploads it when the file opened for
+        writing is closed"""
+        key = self.lookup(path)
+        if key in self.children:
+            raise OSError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+
+        writing = bool(WRITE_MODES & set(mode))
+        exists = key in self.members
+        if not exists and not writing:
+            raise self.not_found(path)
+        if 'x' in mode and exists:
+            raise OSError(errno.EEXIST, os.strerror(errno.EEXIST), path)
+
+        data = b''
+        if exists and 'w' not in mode:
+            with self.pool.connection() as client:
+                data = client.get_object(self.members[key])
+
+        def upload(content):
+            with self.pool.connection() as client:
+                client.put_object(self.key_for(key), content)
+            with self.lock:
+                self.add_file(key, self.key_for(key), FILE_MODE, len(content), time.time())
+
+        raw = MemoryFile(data, writing and upload or None)
+        if 'a' in mode:
+            raw.seek(0, io.SEEK_END)
+
+        if 'b' in mode:
+            return raw
+
+        return io.TextIOWrapper(raw, encoding=encoding or 'utf-8', errors=errors, newline=newline)
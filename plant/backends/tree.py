@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""a tree held in dictionaries, the base of the backends that know
+their whole tree up front"""
+from __future__ import unicode_literals
+
+import errno
+import itertools
+import os
+import posixpath
+import threading
+
+from stat import S_IFDIR, S_IFREG
+
+from plant.backends.base import Backend
+
+
+DIR_MODE = S_IFDIR | 0o755
+FILE_MODE = S_IFREG | 0o644
+
+
+class TreeBackend(Backend):
+    """keeps the stats of every path and the children of every
+    directory in dictionaries, so ``stat``, ``listdir``, ``isdir`` and
+    ``exists`` are O(1) and ``walk`` never touches a disk.
+
+    ``self.members`` maps the path of each file to whatever the
+    subclass needs to open it: an archive member, the contents in
+    memory, etc.
+    """
+
+    def __init__(self):
+        super(TreeBackend, self).__init__()
+        self.inodes = itertools.count(1)
+        self.stats = {}
+        self.members = {}
+        self.children = {}
+        self.lock = threading.RLock()
+        self.add_directory('/', 0)
+
+    def make_stats(self, mode, size, mtime, uid=0, gid=0):
+        mtime = int(mtime)
+        return (mode, next(self.inodes), 0, 1, uid, gid, size, mtime, mtime, mtime)
+
+    def add_directory(self, path, mtime, uid=0, gid=0):
+        if path in self.children:
+            if mtime:
+                self.stats[path] = self.make_stats(DIR_MODE, 0, mtime, uid, gid)
+            return
+
+        self.children[path] = {}
+        self.stats[path] = self.make_stats(DIR_MODE, 0, mtime, uid, gid)
+        if path != '/':
+            self.link(path, mtime)
+
+    def link(self, path, mtime):
+        parent = posixpath.dirname(path)
+        if parent not in self.children:
+            self.add_directory(parent, 0)
+        self.children[parent][posixpath.basename(path)] = True
+
+    def add_file(self, path, member, mode, size, mtime, uid=0, gid=0):
+        self.stats[path] = self.make_stats(mode, size, mtime, uid, gid)
+        self.members[path] = member
+        self.link(path, mtime)
+
+    def stat(self, path):
+        stats = self.stats.get(self.normalize(path))
+        if stats is None:
+            raise self.not_found(path)
+        return stats
+
+    def exists(self, path):
+        return self.normalize(path) in self.stats
+
+    def isdir(self, path):
+        return self.normalize(path) in self.children
+
+    def listdir(self, path):
+        key = self.normalize(path)
+        names = self.children.get(key)
+        if names is None:
+            if key in self.stats:
+                raise OSError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            raise self.not_found(path)
+
+        return list(names)
+
+    def walk(self, top, **options):
+        if options:
+            return super(TreeBackend, self).walk(top, **options)
+
+        return self.walk_index(self.normalize(top))
+
+    def walk_index(self, top):
+        stack = [top]
+        while stack:
+            root = stack.pop()
+            names = self.children.get(root)
+            if names is None:
+                continue
+
+            dirs, files = [], []
+            for name in names:
+                (dirs if posixpath.join(root, name) in self.children else files).append(name)
+
+            yield root, dirs, files
+            stack.extend(posixpath.join(root, name) for name in reversed(dirs))
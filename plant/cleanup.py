@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""bulk removal of files and directories
+
+Removals happen bottom-up in a single pass, each directory is opened
+once and its files are unlinked relative to that file descriptor so
+the kernel doesn't resolve the whole path again for every file. The
+directories of every level are handed to a pool of threads.
+"""
+from __future__ import unicode_literals
+
+import errno
+import os
+import threading
+
+from os.path import join
+
+from plant import instrument
+
+
+OPEN_DIRECTORY = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_NOFOLLOW', 0)
+
+
+class RemovalReport(object):
+    """what a :py:class:`Remover` removed, or would remove when
+    ``dry_run`` is set
+
+    :param dry_run: bool - collect the would-be removed paths in ``self.paths``
+    """
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.files = 0
+        self.dirs = 0
+        self.paths = []
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def removed(self, path, is_dir):
+        with self.lock:
+            if is_dir:
+                self.dirs += 1
+            else:
+                self.files += 1
+            if self.dry_run:
+                self.paths.append(path)
+
+    def failed(self, error):
+        with self.lock:
+            self.errors.append(error)
+
+    def __repr__(self):
+        return 'RemovalReport(files={0}, dirs={1}, errors={2}, dry_run={3})'.format(
+            self.files, self.dirs, len(self.errors), self.dry_run)
+
+
+class Directory(object):
+    """a directory being cleared, removed once the last one of its
+    subdirectories is done
+
+    :param path: its absolute path
+    :param parent: the :py:class:`Directory` it was listed from, if any
+    :param inode: the inode it had when listed, checked once opened
+    :param remove: bool - whether to remove it when it ends up empty
+    """
+
+    def __init__(self, path, parent=None, inode=None, remove=True):
+        self.path = path
+        self.parent = parent
+        self.inode = inode
+        self.remove = remove
+        self.empty = True
+        self.pending = 0
+
+
+class Remover(object):
+    """removes the files accepted by ``predicate`` and, when
+    ``remove_dirs`` is set, the directories left empty.
+
+    Directories are work items: each one is opened, listed, cleared of
+    its files and closed before its subdirectories are handed to the
+    pool, so the amount of open descriptors is bounded by ``workers``
+    rather than by the depth of the tree. A directory is removed once
+    its last subdirectory is done.
+
+    :param predicate: a callable taking a :py:class:`plant.Node` built
+      from the already fetched stats, ``None`` removes every file and
+      ``False`` removes none
+    :param remove_dirs: bool - remove the directories that end up empty
+    :param workers: the amount of threads, ``1`` works serially
+    :param dry_run: bool - do not remove anything, just report it
+    """
+
+    def __init__(self, predicate=None, remove_dirs=True, workers=None, dry_run=False):
+        self.predicate = predicate
+        self.remove_dirs = remove_dirs
+        self.workers = workers
+        self.dry_run = dry_run
+        self.lock = threading.Lock()
+
+    def accepts(self, path, entry):
+        if self.predicate is None:
+            return True
+        if self.predicate is False:
+            return False
+
+        from plant.core import Node
+        stats = instrument.call('stat', entry.stat, follow_symlinks=False)
+        return self.predicate(Node(path, stats=tuple(stats)))
+
+    def unlink(self, name, dir_fd, path, is_dir, report):
+        if not self.dry_run:
+            remove = is_dir and os.rmdir or os.unlink
+            instrument.call('remove', remove, name, dir_fd=dir_fd)
+
+        report.removed(path, is_dir)
+
+    def entries(self, dir_fd):
+        """lists a directory file descriptor, split into directories and files"""
+        dirs, files = [], []
+        for entry in instrument.call('listdir', list, os.scandir(dir_fd)):
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            (dirs if is_dir else files).append(entry)
+
+        return dirs, files
+
+    def clear_files(self, dir_fd, path, files, report):
+        """returns ``True`` when every file was removed"""
+        empty = True
+        for entry in files:
+            child = join(path, entry.name)
+            try:
+                if self.accepts(child, entry):
+                    self.unlink(entry.name, dir_fd, child, False, report)
+                    continue
+            except OSError as error:
+                report.failed(error)
+            empty = False
+
+        return empty
+
+    def open(self, directory):
+        """opens a directory refusing symlinks, mount points and
+        directories swapped since their parent was listed"""
+        fd = instrument.call('open', os.open, directory.path, OPEN_DIRECTORY)
+        if directory.inode is not None and os.fstat(fd).st_ino != directory.inode:
+            os.close(fd)
+            raise OSError(errno.ESTALE, 'changed since it was listed', directory.path)
+
+        return fd
+
+    def clear(self, directory, report):
+        """removes the files of a directory, returns its subdirectories
+        as new work items"""
+        try:
+            dir_fd = self.open(directory)
+        except OSError as error:
+            report.failed(error)
+            directory.empty = False
+            self.finish(directory, report)
+            return []
+
+        try:
+            dirs, files = self.entries(dir_fd)
+            directory.empty = self.clear_files(dir_fd, directory.path, files, report)
+        except OSError as error:
+            report.failed(error)
+            directory.empty, dirs = False, []
+        finally:
+            os.close(dir_fd)
+
+        children = [
+            Directory(join(directory.path, entry.name), directory, entry.inode(), self.remove_dirs)
+            for entry in dirs
+        ]
+        directory.pending = len(children)
+        if not children:
+            self.finish(directory, report)
+
+        return children
+
+    def finish(self, directory, report):
+        """removes a directory whose subdirectories are all done when
+        it is empty, and so on up the tree"""
+        while directory is not None:
+            removed = False
+            if directory.empty and directory.remove:
+                try:
+                    self.unlink(directory.path, None, directory.path, True, report)
+                    removed = True
+                except OSError as error:
+                    report.failed(error)
+
+            parent = directory.parent
+            if parent is None:
+                return
+
+            with self.lock:
+                parent.empty = parent.empty and removed
+                parent.pending -= 1
+                if parent.pending:
+                    return
+
+            directory = parent
+
+    def run(self, top, remove_top=False):
+        """clears the tree rooted at ``top``
+
+        :param top: the absolute path of the top directory
+        :param remove_top: bool - also remove ``top`` when it ends up empty
+        :returns: a :py:class:`RemovalReport`
+        """
+        report = RemovalReport(self.dry_run)
+        stack = [Directory(top, remove=remove_top)]
+        if self.workers == 1:
+            while stack:
+                stack.extend(reversed(self.clear(stack.pop(), report)))
+            return report
+
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            running = set(executor.submit(self.clear, directory, report) for directory in stack)
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.update(executor.submit(self.clear, child, report) for child in future.result())
+
+        return report
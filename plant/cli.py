@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""the ``plant`` command line interface
+
+::
+
+    $ plant find /srv '[.]py$' --jobs 8 -0 | xargs -0 wc -l
+    $ plant glob /srv '*.log' --max-depth 2
+    $ plant du /srv --max-depth 1 --human
+    $ plant dupes /srv/media
+    $ plant index /srv
+    $ plant manifest /srv/releases/1.0
+    $ plant verify /srv/releases/1.0 --deep --idle --bytes-per-second 50000000
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import os
+import re
+import sys
+
+from collections import defaultdict
+from fnmatch import fnmatch
+from os.path import dirname
+
+from plant import instrument
+from plant.core import Node
+
+
+def walk_options(args, parallel=False):
+    """turns the traversal flags into :py:class:`plant.walker.Walker` options
+
+    :param parallel: bool - whether to add the amount of listing
+      threads, left out for the commands that hand ``--jobs`` over as
+      ``workers`` themselves
+    """
+    options = {}
+    if parallel and args.jobs and args.jobs > 1:
+        options['workers'] = args.jobs
+    if args.max_depth is not None:
+        options['max_depth'] = args.max_depth
+    if args.ignore_files:
+        options['ignore_files'] = True
+    if args.follow:
+        options['followlinks'] = True
+    if args.xdev:
+        options['one_file_system'] = True
+    if args.order != 'dfs':
+        options['order'] = args.order
+
+    return options
+
+
+def candidates(args):
+    """the files under ``args.root``, read from the index when one is
+    present and no traversal flag asks for a real walk"""
+    from plant.index import Index, find_index
+
+    node = Node(args.root)
+    index_path = not args.no_index and not walk_options(args) and find_index(node.path)
+    if index_path:
+        return iter(Index.load(index_path).paths())
+
+    return node.walk(lazy=True, **walk_options(args, parallel=True))
+
+
+def output(paths, args):
+    terminator = args.null and '\0' or '\n'
+    write = sys.stdout.write
+    for path in paths:
+        write(path + terminator)
+
+
+def human(size):
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if size < 1024 or unit == 'T':
+            return unit == 'B' and '{0}{1}'.format(size, unit) or '{0:.1f}{1}'.format(size, unit)
+        size /= 1024.0
+
+
+def command_find(args):
+    regex = re.compile(args.pattern)
+    output((path for path in candidates(args) if regex.search(path)), args)
+
+
+def command_glob(args):
+    output((path for path in candidates(args) if fnmatch(path, args.pattern)), args)
+
+
+def command_du(args):
+    from plant.walker import Walker
+
+    node = Node(args.root)
+    options = walk_options(args, parallel=True)
+    # like GNU du, --max-depth limits what is printed, not what is counted
+    options.pop('max_depth', None)
+
+    totals = defaultdict(int)
+    for root, dirs, files in instrument.iterate('listdir', Walker(**options).walk(node.path)):
+        size = 0
+        for name in files:
+            try:
+                size += instrument.call('stat', os.lstat, os.path.join(root, name)).st_size
+            except OSError:
+                continue
+
+        path = root
+        while True:
+            totals[path] += size
+            if path == node.path or path == dirname(path):
+                break
+            path = dirname(path)
+
+    terminator = args.null and '\0' or '\n'
+    for path in sorted(totals, reverse=True):
+        depth = path != node.path and path[len(node.path):].count(os.sep) or 0
+        if args.max_depth is not None and depth > args.max_depth:
+            continue
+        size = args.human and human(totals[path]) or totals[path]
+        sys.stdout.write('{0}\t{1}{2}'.format(size, path, terminator))
+
+
+def command_dupes(args):
+    from plant.hashing import find_duplicates
+
+    groups = find_duplicates(candidates(args), algorithm=args.algorithm, workers=args.jobs)
+    for group in groups:
+        output(group, args)
+        sys.stdout.write(args.null and '\0' or '\n')
+
+
+def command_index(args):
+    from plant.index import Index
+
+    index = Index.build(Node(args.root), workers=args.jobs, **walk_options(args))
+    path = index.save(args.output)
+    print('{0} files indexed into {1}'.format(len(index), path), file=sys.stderr)
+
+
+def command_manifest(args):
+    from plant.manifest import Manifest
+
+    manifest = Manifest.build(Node(args.root), args.algorithm, workers=args.jobs, **walk_options(args))
+    path = manifest.save(args.output)
+    print('{0} files hashed into {1}'.format(len(manifest), path), file=sys.stderr)
+    for relative in manifest.unreadable:
+        print('unreadable\t{0}'.format(relative), file=sys.stderr)
+
+
+def command_verify(args):
+    report = Node(args.root).verify(args.manifest, deep=args.deep, workers=args.jobs, find_added=args.added)
+    for status in ('changed', 'missing', 'added', 'unreadable'):
+        for relative in getattr(report, status):
+            sys.stdout.write('{0}\t{1}{2}'.format(status, relative, args.null and '\0' or '\n'))
+
+    print(report, file=sys.stderr)
+    return 0 if report.passed else 1
+
+
+def parser():
+    main = argparse.ArgumentParser(prog='plant', description='filesystem for humans')
+    commands = main.add_subparsers(dest='command')
+    commands.required = True
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='threads listing, stating and hashing in parallel')
+    common.add_argument('--max-depth', type=int, help='how many directory levels to go through')
+    common.add_argument('--ignore-files', action='store_true', help='honor .gitignore and .plantignore files')
+    common.add_argument('-L', '--follow', action='store_true', help='follow symlinked directories')
+    common.add_argument('-x', '--xdev', action='store_true', help='do not cross mount points')
+    common.add_argument('--order', choices=('dfs', 'bfs', 'newest'), default='dfs',
+                        help='list directories depth-first, level by level or the newest first')
+    common.add_argument('--no-index', action='store_true', help='walk the tree even when an index is present')
+    common.add_argument('-0', '--null', action='store_true', help='separate output paths with NUL')
+    common.add_argument('--ops-per-second', type=int, help='limit the stat, listing and open calls per second')
+    common.add_argument('--bytes-per-second', type=int, help='limit the bytes read per second')
+    common.add_argument('--idle', action='store_true', help='use the idle I/O scheduling class, linux only')
+
+    find = commands.add_parser('find', parents=[common], help='paths matching a regex')
+    find.add_argument('root')
+    find.add_argument('pattern')
+    find.set_defaults(function=command_find)
+
+    glob = commands.add_parser('glob', parents=[common], help='paths matching a fnmatch pattern')
+    glob.add_argument('root')
+    glob.add_argument('pattern')
+    glob.set_defaults(function=command_glob)
+
+    du = commands.add_parser('du', parents=[common], help='disk usage of a tree')
+    du.add_argument('root')
+    du.add_argument('-H', '--human', action='store_true', help='print sizes like 1.2M')
+    du.set_defaults(function=command_du)
+
+    dupes = commands.add_parser('dupes', parents=[common], help='files with identical contents')
+    dupes.add_argument('root')
+    dupes.add_argument('--algorithm', default='sha256')
+    dupes.set_defaults(function=command_dupes)
+
+    index = commands.add_parser('index', parents=[common], help='save a listing of the tree for faster searches')
+    index.add_argument('root')
+    index.add_argument('-o', '--output', help='where to save it, defaults to ROOT/.plantindex')
+    index.set_defaults(function=command_index)
+
+    manifest = commands.add_parser('manifest', parents=[common], help='save the checksums of the files of a tree')
+    manifest.add_argument('root')
+    manifest.add_argument('--algorithm', default='sha256')
+    manifest.add_argument('-o', '--output', help='where to save it, defaults to ROOT/.plantmanifest')
+    manifest.set_defaults(function=command_manifest)
+
+    verify = commands.add_parser('verify', parents=[common], help='check a tree against its manifest')
+    verify.add_argument('root')
+    verify.add_argument('manifest', nargs='?', help='defaults to ROOT/.plantmanifest')
+    verify.add_argument('--deep', action='store_true', help='hash every file, even the unchanged ones')
+    verify.add_argument('--added', action='store_true', help='also report files missing from the manifest')
+    verify.set_defaults(function=command_verify)
+
+    return main
+
+
+def main(argv=None):
+    from plant.throttling import Throttle
+
+    args = parser().parse_args(argv)
+    throttled = args.ops_per_second or args.bytes_per_second or args.idle
+    try:
+        if not throttled:
+            # no limiter keeps instrument.call() on its fast path
+            return args.function(args) or 0
+
+        with Throttle(args.ops_per_second, args.bytes_per_second, args.idle):
+            return args.function(args) or 0
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""comparison of two trees
+
+Both trees are walked side by side one directory at a time, so a
+difference is reported as soon as its directory has been listed and
+only the entries of the directories being compared are held in memory.
+Contents are only read for files of the same size, a chunk at a time
+and by a pool of threads, stopping at the first differing chunk.
+"""
+from __future__ import unicode_literals
+
+import collections
+import posixpath
+
+from concurrent.futures import ThreadPoolExecutor
+from stat import S_ISDIR, S_ISLNK
+
+from plant import instrument
+from plant.hashing import CHUNK_SIZE
+
+
+MODES = ('stat', 'size', 'content')
+STATUSES = ('only_left', 'only_right', 'different', 'same')
+
+# indexes in the tuples ordered like plant.core.STAT_LABELS
+MODE, INO, DEV, SIZE, MTIME = 0, 1, 2, 6, 8
+
+
+class Comparison(object):
+    """the relative paths of the files found in each state, along with
+    the :py:exc:`OSError` of the paths that could not be compared"""
+
+    def __init__(self):
+        self.only_left = set()
+        self.only_right = set()
+        self.different = set()
+        self.same = set()
+        self.errors = []
+
+    def add(self, status, path):
+        getattr(self, status).add(path)
+
+    @property
+    def identical(self):
+        """whether both trees have the same files with the same contents"""
+        return not (self.only_left or self.only_right or self.different or self.errors)
+
+    def __repr__(self):
+        return 'Comparison(only_left={0}, only_right={1}, different={2}, same={3}, errors={4})'.format(
+            len(self.only_left), len(self.only_right), len(self.different), len(self.same), len(self.errors))
+
+
+class TreeComparer(object):
+    """compares the files under two :py:class:`plant.Node`
+
+    Symlinks are compared as links, by their targets in ``content``
+    mode, unless ``followlinks`` is set. A directory that cannot be
+    listed on either side is reported to ``onerror`` and left out of
+    the comparison rather than reported as missing.
+
+    :param mode: ``stat`` compares the size and the modification time,
+      ``size`` only the size and ``content`` the bytes of the files with
+      the same size
+    :param workers: the amount of threads comparing contents
+    :param chunk_size: how many bytes are compared at a time
+    :param followlinks: bool - compare what the symlinks point to, each
+      directory is entered once per ``(st_dev, st_ino)`` so cycles are broken
+    :param onerror: what to do with the :py:exc:`OSError` of a path
+      that cannot be listed or stated: ``'skip'``, ``'raise'`` or a
+      callable such as a :py:class:`plant.walker.WalkReport`
+    """
+
+    def __init__(self, mode='stat', workers=None, chunk_size=CHUNK_SIZE, followlinks=False, onerror='skip'):
+        if mode not in MODES:
+            raise ValueError('mode must be one of {0}, got {1!r}'.format(', '.join(MODES), mode))
+
+        self.mode = mode
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.followlinks = followlinks
+        self.onerror = onerror
+        # the content comparisons kept in flight before results are yielded
+        self.backlog = (workers or 8) * 4
+
+    def error(self, error):
+        """applies the ``onerror`` policy to the given :py:exc:`OSError`"""
+        if self.onerror == 'raise':
+            raise error
+        elif callable(self.onerror):
+            self.onerror(error)
+
+    def entries(self, node, relative, visited):
+        """returns ``(dirs, files)``, the names of the subdirectories and
+        a :py:class:`dict` mapping the names of the files to their stats,
+        or ``None`` when the directory cannot be listed
+
+        :param visited: the set of ``(st_dev, st_ino)`` of the directories
+          already entered, only filled when following symlinks
+        """
+        backend = node.backend
+        path = posixpath.join(node.path or '/', relative)
+        stat = self.followlinks and backend.stat or backend.lstat
+        try:
+            names = instrument.call('listdir', backend.listdir, path)
+        except OSError as error:
+            self.error(error)
+            return None
+
+        dirs, files = set(), {}
+        for name in names:
+            try:
+                stats = instrument.call('stat', stat, posixpath.join(path, name))
+            except OSError as error:
+                self.error(error)
+                continue
+
+            if not S_ISDIR(stats[MODE]):
+                files[name] = stats
+            elif not self.followlinks or not stats[INO]:
+                dirs.add(name)
+            elif (stats[DEV], stats[INO]) not in visited:
+                visited.add((stats[DEV], stats[INO]))
+                dirs.add(name)
+
+        return dirs, files
+
+    def subtree(self, node, relative, visited):
+        """yields the relative paths of the files under a directory"""
+        stack = [relative]
+        while stack:
+            relative = stack.pop()
+            listing = self.entries(node, relative, visited)
+            if listing is None:
+                continue
+
+            dirs, files = listing
+            for name in sorted(files):
+                yield posixpath.join(relative, name)
+            stack.extend(posixpath.join(relative, name) for name in sorted(dirs, reverse=True))
+
+    def same_contents(self, left, right, relative, links):
+        left_path = posixpath.join(left.path or '/', relative)
+        right_path = posixpath.join(right.path or '/', relative)
+        if links:
+            return left.backend.readlink(left_path) == right.backend.readlink(right_path)
+
+        with instrument.call('open', left.backend.open, left_path, 'rb') as a, \
+                instrument.call('open', right.backend.open, right_path, 'rb') as b:
+            while True:
+                chunk = a.read(self.chunk_size)
+                if chunk != b.read(self.chunk_size):
+                    return False
+                if not chunk:
+                    return True
+
+    def verdict(self, left_stats, right_stats):
+        """the status of a pair of files, ``None`` when their contents
+        have to be read"""
+        if S_ISLNK(left_stats[MODE]) != S_ISLNK(right_stats[MODE]):
+            return 'different'
+        if left_stats[SIZE] != right_stats[SIZE]:
+            return 'different'
+        if self.mode == 'size':
+            return 'same'
+        if self.mode == 'stat':
+            return int(left_stats[MTIME]) == int(right_stats[MTIME]) and 'same' or 'different'
+
+        return None
+
+    def visited(self, node):
+        """the directories entered so far on one side, starting with its top"""
+        visited = set()
+        if self.followlinks:
+            try:
+                stats = node.backend.stat(node.path or '/')
+            except OSError:
+                return visited
+            if stats[INO]:
+                visited.add((stats[DEV], stats[INO]))
+
+        return visited
+
+    def compare(self, left, right):
+        """yields a ``(status, relative_path)`` tuple for every file
+        found under either node"""
+        left_visited, right_visited = self.visited(left), self.visited(right)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = collections.deque()
+
+            def read_contents(relative, links):
+                try:
+                    same = self.same_contents(left, right, relative, links)
+                except (IOError, OSError):
+                    same = False
+                return same and 'same' or 'different'
+
+            stack = ['']
+            while stack:
+                relative = stack.pop()
+                left_listing = self.entries(left, relative, left_visited)
+                right_listing = self.entries(right, relative, right_visited)
+                if left_listing is None or right_listing is None:
+                    # already reported, the other side can't be told missing
+                    continue
+
+                left_dirs, left_files = left_listing
+                right_dirs, right_files = right_listing
+                for name in sorted(set(left_files) | set(right_files)):
+                    path = posixpath.join(relative, name)
+                    if name not in right_files:
+                        yield 'only_left', path
+                    elif name not in left_files:
+                        yield 'only_right', path
+                    else:
+                        status = self.verdict(left_files[name], right_files[name])
+                        if status is not None:
+                            yield status, path
+                        else:
+                            links = S_ISLNK(left_files[name][MODE])
+                            pending.append((path, executor.submit(read_contents, path, links)))
+
+                for name in sorted(left_dirs - right_dirs):
+                    for path in self.subtree(left, posixpath.join(relative, name), left_visited):
+                        yield 'only_left', path
+                for name in sorted(right_dirs - left_dirs):
+                    for path in self.subtree(right, posixpath.join(relative, name), right_visited):
+                        yield 'only_right', path
+
+                stack.extend(posixpath.join(relative, name) for name in sorted(left_dirs & right_dirs, reverse=True))
+
+                while len(pending) > self.backlog or (pending and not stack):
+                    path, future = pending.popleft()
+                    yield future.result(), path
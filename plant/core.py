@@ -18,11 +18,16 @@ from __future__ import unicode_literals
 
 version = __version__ = '0.1.2'
 
+import heapq
 import io
 import os
 import re
+import threading
 
+from collections import OrderedDict
 from fnmatch import fnmatch
+from itertools import islice
+from operator import itemgetter
 from os.path import (
     abspath,
     join,
@@ -35,6 +40,10 @@ from os.path import (
 )
 from os.path import isfile as isfile_base
 from os.path import isdir as isdir_base
+from stat import S_ISDIR, S_ISREG
+
+from plant import instrument
+from plant.backends.base import Backend
 
 
 absolutify = lambda reference_path: lambda *path: join(abspath(dirname(reference_path)), *path)
@@ -68,6 +77,139 @@ STAT_LABELS = ["mode", "ino", "dev", "nlink", "uid", "gid", "size", "atime", "mt
 DOTDOTSLASH = '..{0}'.format(os.sep)
 
 
+def is_plain(path):
+    """whether joining a relative path to a normalized one can skip
+    normalizing the result: no ``.`` or ``..`` parts, no empty parts and
+    nothing to expand"""
+    return bool(path) and path[0] not in '/~.' and path[-1] != '/' and '//' not in path and '/.' not in path
+
+
+def metadata_key(label):
+    """returns a sort key that reads the given :py:data:`STAT_LABELS`
+    label from the metadata of a :py:class:`Node`"""
+    return lambda node: node.metadata[label]
+
+
+def stat_keys(paths, label, backend=None, onerror='skip'):
+    """stats each path string and yields ``(value, path)`` tuples where
+    value is the given :py:data:`STAT_LABELS` label. Paths that can't be
+    stated, like files removed during a walk, are left out and their
+    :py:exc:`OSError` goes to ``onerror``: ``'skip'``, ``'raise'`` or a
+    callable"""
+    index = STAT_LABELS.index(label)
+    stat = (backend or LOCAL).stat
+    for path in paths:
+        try:
+            yield instrument.call('stat', stat, path)[index], path
+        except OSError as error:
+            if onerror == 'raise':
+                raise
+            elif callable(onerror):
+                onerror(error)
+
+
+def select(iterable, sort_by=None, limit=None, reverse=False, make_key=metadata_key):
+    """streams through ``iterable`` keeping only what the caller asked for.
+
+    With a ``limit`` and a ``sort_by`` only a heap of ``limit`` items
+    is kept in memory, regardless of how many items are consumed.
+
+    :param iterable: the candidates
+    :param sort_by: a callable key or a label from :py:data:`STAT_LABELS`
+    :param limit: the maximum amount of items to return
+    :param reverse: bool - if True the greatest items come first
+    :param make_key: turns a ``sort_by`` label into a callable key
+    :returns: an iterator
+    """
+    if sort_by is None:
+        return iterable if limit is None else islice(iterable, limit)
+
+    key = sort_by if callable(sort_by) else make_key(sort_by)
+    if limit is None:
+        return iter(sorted(iterable, key=key, reverse=reverse))
+
+    pick = reverse and heapq.nlargest or heapq.nsmallest
+    return iter(pick(limit, iterable, key=key))
+
+
+class LocalBackend(Backend):
+    """the local filesystem, the default :py:attr:`Node.backend`"""
+
+    local = True
+
+    @property
+    def Node(self):
+        return Node
+
+    def normalize(self, path):
+        return abspath(expanduser(path))
+
+    def display(self, path):
+        return relpath(path)
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def lstat(self, path):
+        return os.lstat(path)
+
+    def readlink(self, path):
+        return os.readlink(path)
+
+    def listdir(self, path):
+        return os.listdir(path)
+
+    def open(self, path, *args, **kw):
+        return io.open(path, *args, **kw)
+
+    def exists(self, path):
+        return exists(path)
+
+    def isfile(self, path):
+        return isfile(path, exists(path))
+
+    def isdir(self, path):
+        return isdir(path, exists(path))
+
+    def isfile_many(self, paths):
+        # reads each parent directory once instead of stating every path
+        parents = {}
+        for path in paths:
+            parents.setdefault(dirname(path), {})
+
+        for parent, types in parents.items():
+            try:
+                for entry in os.scandir(parent or os.sep):
+                    types[entry.name] = entry.is_file()
+            except OSError:
+                continue
+
+        return [
+            parents[dirname(path)].get(basename(path), isfile(path, exists=False))
+            for path in paths
+        ]
+
+    def walk(self, top, **options):
+        if not options:
+            return os.walk(top)
+
+        from plant.walker import Walker
+        return Walker(**options).walk(top)
+
+    def walk_stats(self, top, **options):
+        from plant.walker import Walker
+        return Walker(**options).walk_stats(top)
+
+
+LOCAL = LocalBackend()
+
+# (backend, names, stop, directory) -> the Node found by Node.find_up,
+# or None, the least recently used beyond FOUND_UP_SIZE are dropped
+FOUND_UP = OrderedDict()
+FOUND_UP_SIZE = 10000
+FOUND_UP_LOCK = threading.Lock()
+
+
 class Node(object):
     """Node is a file abstraction.
 
@@ -81,12 +223,39 @@ class Node(object):
     It also has `self.metadata`, which is just a handy `DotDict`
     containing the results of calling `os.stat` (mode, ino, dev,
     nlink, uid, giu, size, atime, mtime, ctime)
+
+    When ``stats`` is given the constructor trusts it instead of
+    calling `os.stat`, an empty sequence means the path does not
+    exist. See :py:meth:`Node.stat_many`.
+
+    The filesystem operations go through :py:attr:`Node.backend`,
+    which is the local disk unless the node comes from another
+    :py:class:`plant.backends.Backend`.
     """
-    def __init__(self, path):
-        self.path = abspath(expanduser(path)).rstrip('/')
+    backend = LOCAL
+
+    def __init__(self, path, stats=None):
+        self.path = self.backend.normalize(path).rstrip('/')
         self.path_regex = '^{0}'.format(re.escape(self.path))
+        if stats is None and not self.backend.local:
+            try:
+                stats = tuple(instrument.call('stat', self.backend.stat, self.path))
+            except OSError:
+                stats = ()
+
+        if stats is not None:
+            self.exists = bool(stats)
+            self.metadata = DotDict(zip(STAT_LABELS, stats or [0] * len(STAT_LABELS)))
+            if self.exists:
+                self.is_file = S_ISREG(self.metadata.mode)
+                self.is_dir = S_ISDIR(self.metadata.mode)
+            else:
+                self.is_file = isfile(self.path, exists=False)
+                self.is_dir = isdir(self.path, exists=False)
+            return
+
         try:
-            stats = os.stat(self.path)
+            stats = instrument.call('stat', self.backend.stat, self.path)
             self.exists = True
         except OSError:
             stats = [0] * len(STAT_LABELS)
@@ -107,6 +276,60 @@ class Node(object):
         """
         return cls(*args, **kw)
 
+    @classmethod
+    def stat_many(cls, paths, workers=None, fields=None, dont_sync=False):
+        """stats many paths at once and returns one :py:class:`Node`
+        per path, in the same order, without stating them again.
+
+        The calls are spread across a thread pool so that the
+        round-trips of network filesystems overlap. When ``fields`` is
+        given and the platform supports ``statx(2)`` only those fields
+        are requested from the kernel, the others are left as ``0``.
+
+        ::
+
+            >>> from plant import Node
+            >>>
+            >>> paths = Node('/opt/media').walk()
+            >>> Node.stat_many(paths, workers=16, fields=['size', 'mtime'])
+            [
+                Node('/opt/media/mp3/music1.mp3'),
+                Node('/opt/media/mp3/music2.mp3'),
+            ]
+
+        :param paths: an iterable of path strings
+        :param workers: the amount of threads, ``1`` stats serially
+        :param fields: optional list of labels from :py:data:`STAT_LABELS`
+        :param dont_sync: bool - with ``fields``, accept the attributes
+          network filesystems cached locally even if they may be stale,
+          see :py:data:`plant.statx.AT_STATX_DONT_SYNC`
+        :returns: a :py:class:`list` of :py:class:`Node`
+        """
+        from plant import statx
+
+        paths = list(paths)
+        if cls.backend.local and fields is not None and statx.is_available():
+            mask = statx.mask_for(fields)
+            flags = dont_sync and statx.AT_STATX_DONT_SYNC or statx.AT_STATX_SYNC_AS_STAT
+            stat = lambda path: statx.statx(path, mask, flags)
+        else:
+            stat = cls.backend.stat
+
+        def stat_one(path):
+            try:
+                return tuple(instrument.call('stat', stat, cls.backend.normalize(path)))
+            except OSError:
+                return ()
+
+        if workers == 1 or len(paths) < 2:
+            results = list(map(stat_one, paths))
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(stat_one, paths))
+
+        return [cls.new(path, stats=stats) for path, stats in zip(paths, results)]
+
     @property
     def basename(self):
         """extracts the basename the node path
@@ -139,7 +362,9 @@ class Node(object):
 
         :returns: a  :py:class:`list` of :py:class:`Node`
         """
-        return list(map(self.new, os.listdir(self.dir.path)))
+        directory = self.dir.path
+        names = instrument.call('listdir', self.backend.listdir, directory)
+        return [self.new(join(directory, name)) for name in names]
 
     @property
     def dir(self):
@@ -242,7 +467,114 @@ class Node(object):
         """
         return re.sub(self.path_regex, '', path).lstrip(os.sep)
 
-    def trip_at(self, path, lazy=False):
+    def relative_many(self, paths):
+        """like :py:meth:`Node.relative` for a sequence of paths
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> Node('/opt/media').relative_many(['/opt/media/mp3/a.mp3', '/opt/media/mp4'])
+           ['mp3/a.mp3', 'mp4']
+
+        :param paths: an iterable of path strings
+        :returns: a :py:class:`list` of :py:class:`bytes`
+        """
+        prefix, size = self.path, len(self.path)
+        return [
+            (path[size:] if path.startswith(prefix) else path).lstrip(os.sep)
+            for path in paths
+        ]
+
+    def join_many(self, paths):
+        """like :py:meth:`Node.join` for a sequence of paths, plain
+        relative paths are concatenated without being normalized again
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> Node('/opt/media').join_many(['mp3/a.mp3', '../docs'])
+           ['/opt/media/mp3/a.mp3', '/opt/docs']
+
+        :param paths: an iterable of path strings
+        :returns: a :py:class:`list` of :py:class:`bytes`
+        """
+        if not self.path:
+            return [self.join(path) for path in paths]
+
+        prefix = self.path + os.sep
+        return [
+            prefix + path if is_plain(path) else self.join(path)
+            for path in paths
+        ]
+
+    def depth_many(self, paths):
+        """like :py:meth:`Node.depth_of` for a sequence of paths.
+
+        Telling files from directories takes one directory listing per
+        distinct parent instead of one ``stat`` per path.
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> Node('/foo/bar').depth_many(['/foo/bar/another/dir/file.py', '/foo/bar/docs'])
+           [2, 1]
+
+        :param paths: a sequence of path strings
+        :returns: a :py:class:`list` of :py:class:`int`
+        """
+        relatives = self.relative_many(paths)
+        files = instrument.call('stat', self.backend.isfile_many, self.join_many(relatives))
+
+        depths = []
+        for relative, is_file in zip(relatives, files):
+            if is_file:
+                relative = dirname(relative)
+            depths.append(relative.rstrip(os.sep).count(os.sep) + 1)
+
+        return depths
+
+    def path_to_related_many(self, paths):
+        """like :py:meth:`Node.path_to_related` for a sequence of
+        paths, the chain of parent directories of this node is resolved
+        once and shared by all of them
+
+        ::
+
+            >>> from plant import Node
+            >>>
+            >>> logo = Node('/foo/bar/docs/static/logo.png')
+            >>> logo.path_to_related_many(['/foo/bar/docs/intro/index.md', '/foo/bar/docs/index.md'])
+            ['../static/logo.png', './static/logo.png']
+
+        :param paths: an iterable of path strings
+        :returns: a :py:class:`list` of :py:class:`bytes`
+        """
+        chain = [self.dir]
+        prefixes = [chain[0].dir.path]
+        remaining = {}
+        results = []
+        for path in paths:
+            index = 0
+            while not path.startswith(prefixes[index]):
+                index += 1
+                if index == len(chain):
+                    chain.append(chain[-1].dir.parent.dir)
+                    prefixes.append(chain[-1].dir.path)
+
+            current = chain[index]
+            if index not in remaining:
+                remaining[index] = current.relative(self.path)
+
+            level = current.relative(path).count(os.sep)
+            way_back = os.sep.join(['..'] * level) or '.'
+            results.append("{0}/{1}".format(way_back, remaining[index]))
+
+        return results
+
+    def trip_at(self, path, lazy=False, **options):
         """Iterates recursively on a subpath of the current :py:class:`Node`
 
         It basically performs a py:func:`os.walk` at the given path and yields the absolute path
@@ -258,18 +590,25 @@ class Node(object):
                '/opt/media/mp3/music2.mp3',
             ]
 
+        Traversal options are handed to a :py:class:`plant.walker.Walker`,
+        for example ``ignore_files=True`` skips whatever the
+        ``.gitignore`` and ``.plantignore`` files found along the tree
+        exclude, without ever listing the ignored folders.
+
         :param path: a path string
         :param lazy: bool - if True returns an iterator, defaults to a flat :py:class:`list`
+        :param ``**options``: passed onto :py:class:`plant.walker.Walker`
         :returns: an iterator or a list of :py:class:`bytes`
         """
         def iterator():
-            for root, folders, filenames in os.walk(self.join(path)):
+            walk = self.backend.walk(self.join(path), **options)
+            for root, folders, filenames in instrument.iterate('listdir', walk):
                 for filename in filenames:
                     yield join(root, filename)
 
         return lazy and iterator() or list(iterator())
 
-    def walk(self, lazy=False):
+    def walk(self, lazy=False, sort_by=None, limit=None, reverse=False, **options):
         """Same as :py:meth:`Node.trip_at` but iterates recursively within the current :py:class:`Node` instead.
 
         ::
@@ -283,13 +622,174 @@ class Node(object):
                '/opt/media/mp4/my-video.mp4',
             ]
 
-        :param path: a path string
+        The results can be ordered and capped without holding all of
+        them in memory, see :py:func:`select`:
+
+        ::
+
+           >>> Node('/opt/media').walk(sort_by='size', reverse=True, limit=1)
+           ['/opt/media/mp4/my-video.mp4']
+
         :param lazy: bool - if True returns an iterator, defaults to a flat :py:class:`list`
+        :param sort_by: a callable key taking a path or a label from :py:data:`STAT_LABELS`
+        :param limit: the maximum amount of paths to return
+        :param reverse: bool - if True the greatest paths come first
+        Files that vanish before they are stated for ``sort_by`` are
+        left out, their :py:exc:`OSError` goes to ``onerror``, see
+        :py:func:`stat_keys`.
+
+        :param ``**options``: traversal options, see :py:meth:`Node.trip_at`
         :returns: an iterator or a list of :py:class:`bytes`
         """
-        return self.trip_at(self.path, lazy=lazy)
+        if sort_by is None and limit is None:
+            return self.trip_at(self.path, lazy=lazy, **options)
+
+        paths = self.trip_at(self.path, lazy=True, **options)
+        if sort_by is None or callable(sort_by):
+            results = select(paths, sort_by, limit, reverse)
+        else:
+            keyed = stat_keys(paths, sort_by, self.backend, options.get('onerror'))
+            results = (path for value, path in select(keyed, itemgetter(0), limit, reverse))
+
+        return lazy and results or list(results)
 
-    def glob(self, pattern, lazy=False):
+    def walk_nodes(self, lazy=False, **options):
+        """Like :py:meth:`Node.walk` but returns a :py:class:`Node` for
+        each file, built from the stats fetched during the walk rather
+        than stating each path again.
+
+        With ``use_dir_fd=True`` the tree is listed and stated relative
+        to open directory descriptors, see :py:class:`plant.walker.DirectoryCache`
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> Node('/opt/media').walk_nodes(use_dir_fd=True)
+           [
+               Node('/opt/media/mp3/music1.mp3'),
+               Node('/opt/media/mp3/music2.mp3'),
+               Node('/opt/media/mp4/my-video.mp4'),
+            ]
+
+        :param lazy: bool - if True returns an iterator, defaults to a flat :py:class:`list`
+        :param ``**options``: traversal options, see :py:meth:`Node.trip_at`
+        :returns: an iterator or a list of :py:class:`Node`
+        """
+        def iterator():
+            stats = self.backend.walk_stats(self.path, **options)
+            for path, result in instrument.iterate('stat', stats):
+                yield self.new(path, stats=tuple(result))
+
+        return lazy and iterator() or list(iterator())
+
+    def compare(self, other, mode='stat', lazy=False, workers=None, followlinks=False, onerror=None):
+        """compares the files under this node with the ones under
+        another, which may live in another backend
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> result = Node('/srv/build').compare(Node('/srv/www'), mode='content')
+           >>> result.different
+           {'static/css/main.css'}
+           >>> result.only_right
+           {'old/index.html'}
+
+        Files of different sizes are different in every mode, ``stat``
+        also compares the modification times and ``content`` reads the
+        files of the same size in parallel, see :py:class:`plant.compare.TreeComparer`
+
+        :param other: the other :py:class:`Node`
+        :param mode: ``stat``, ``size`` or ``content``
+        :param lazy: bool - if True returns an iterator of ``(status, relative_path)``
+        :param workers: the amount of threads comparing contents
+        :param followlinks: bool - compare what symlinks point to instead of the links
+        :param onerror: ``'raise'`` or a callable taking the :py:exc:`OSError`
+          of the paths that could not be listed or stated, by default
+          they are collected in :py:attr:`plant.compare.Comparison.errors`,
+          or skipped when ``lazy``
+        :returns: an iterator or a :py:class:`plant.compare.Comparison`
+        """
+        from plant.compare import Comparison, TreeComparer
+
+        comparison = Comparison()
+        if onerror is None:
+            onerror = lazy and 'skip' or comparison.errors.append
+
+        results = TreeComparer(mode, workers, followlinks=followlinks, onerror=onerror).compare(self, other)
+        if lazy:
+            return results
+
+        for status, path in results:
+            comparison.add(status, path)
+
+        return comparison
+
+    def estimate(self, samples=100, timeout=None, seed=None, confidence=0.95):
+        """estimates how many files, bytes and directories are under
+        this node by sampling random paths down the tree instead of
+        walking all of it
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> estimate = Node('/srv/media').estimate(samples=200, timeout=2)
+           >>> estimate.files_interval
+           (1119000.0, 1281000.0)
+           >>> estimate.depths
+           {0: 12.0, 1: 380.0, 2: 1199608.0}
+
+        The cost is bounded by ``samples`` descents, or by ``timeout``
+        seconds when given, whatever the size of the tree. Trees with
+        a few much bigger subtrees need more samples for narrow
+        intervals, see :py:mod:`plant.estimate`
+
+        :param samples: the maximum amount of random descents
+        :param timeout: stop sampling after these many seconds
+        :param seed: seeds the random choices, for repeatable estimates
+        :param confidence: the probability covered by the intervals
+        :returns: a :py:class:`plant.estimate.Estimate`
+        """
+        from plant.estimate import Estimator
+
+        return Estimator(self, seed).estimate(samples, timeout, confidence)
+
+    def shards(self, count, by=None, samples=20, seed=0):
+        """splits the tree under this node into ``count`` shards of
+        similar size that can be crawled independently
+
+        ::
+
+           >>> from plant import Node
+           >>> from plant.shards import ShardExecutor
+           >>>
+           >>> shards = Node('/srv/media').shards(4, by='fanout')
+           >>> shards
+           [Shard(units=5, weight=1204), Shard(units=4, weight=1198), ...]
+           >>> paths = list(ShardExecutor(workers=4).walk(shards))
+
+        Subtrees are weighed by the amount of entries they hold right
+        away (``fanout``), by a quick :py:meth:`Node.estimate`
+        (``estimate``) or by the counts of a saved
+        :py:class:`plant.index.Index` (``index``), see :py:mod:`plant.shards`
+
+        :param count: the amount of shards
+        :param by: ``fanout``, ``estimate`` or ``index``, defaults to
+          ``index`` when the tree has one and to ``estimate`` otherwise
+        :param samples: descents per subtree with the ``estimate`` strategy
+        :param seed: seeds the random choices of the estimates, every
+          machine passing the same seed gets the same shards
+        :returns: a list of :py:class:`plant.shards.Shard`, heaviest first
+        """
+        from plant.shards import partition
+
+        self.require_local('shards')
+        return partition(self, count, by, samples, seed)
+
+    def glob(self, pattern, lazy=False, sort_by=None, limit=None, reverse=False, **options):
         """
         searches for globs recursively in all the children node of the
         current node returning a respective [python`Node`] instance
@@ -308,18 +808,31 @@ class Node(object):
                Node('/opt/media/mp3/music2.mp3'),
             ]
 
+        The oldest 100 logs, keeping no more than 100 nodes in memory:
+
+        ::
+
+           >>> Node('/var/log').glob('*.log', sort_by='mtime', limit=100)
+
         :param pattern: a valid :py:mod:`fnmatch` pattern string
         :param lazy: bool - if True returns an iterator, defaults to a flat :py:class:`list`
+        :param sort_by: a callable key taking a :py:class:`Node` or a label from :py:data:`STAT_LABELS`
+        :param limit: the maximum amount of nodes to return
+        :param reverse: bool - if True the greatest nodes come first
+        :param ``**options``: traversal options, see :py:meth:`Node.trip_at`
         :returns: an iterator or a list of :py:class:`Node`
         """
+        streaming = lazy or sort_by is not None or limit is not None
+
         def iterator():
-            for filename in self.walk(lazy=lazy):
-                if fnmatch(filename, pattern):
+            for filename in self.walk(lazy=streaming, **options):
+                if instrument.call('match', fnmatch, filename, pattern):
                     yield self.new(filename)
 
-        return lazy and iterator() or list(iterator())
+        results = select(iterator(), sort_by, limit, reverse)
+        return lazy and results or list(results)
 
-    def find_with_regex(self, pattern, flags=0, lazy=False):
+    def find_with_regex(self, pattern, flags=0, lazy=False, sort_by=None, limit=None, reverse=False, **options):
         """
         searches recursively for children that match the given regex
         returning a respective [python`Node`] instance for that given.
@@ -337,17 +850,109 @@ class Node(object):
                Node('/opt/media/mp4/my-video.mp4'),
             ]
 
+        Accepts ``sort_by``, ``limit`` and ``reverse`` just like :py:meth:`Node.glob`
+
         :param pattern: a valid :py:mod:`fnmatch` pattern string
         :param lazy: bool - if True returns an iterator, defaults to a flat :py:class:`list`
+        :param sort_by: a callable key taking a :py:class:`Node` or a label from :py:data:`STAT_LABELS`
+        :param limit: the maximum amount of nodes to return
+        :param reverse: bool - if True the greatest nodes come first
+        :param ``**options``: traversal options, see :py:meth:`Node.trip_at`
         :returns: an iterator or a list of :py:class:`Node`
         """
+        streaming = lazy or sort_by is not None or limit is not None
 
         def iterator():
-            for filename in self.walk(lazy=lazy):
-                if re.search(pattern, filename, flags):
+            for filename in self.walk(lazy=streaming, **options):
+                if instrument.call('match', re.search, pattern, filename, flags):
                     yield self.new(filename)
 
-        return lazy and iterator() or list(iterator())
+        results = select(iterator(), sort_by, limit, reverse)
+        return lazy and results or list(results)
+
+    def find_many(self, patterns=None, flags=0, globs=None, lazy=False, sort_by=None, limit=None, reverse=False, **options):
+        """
+        searches for several regexes and globs in a single walk,
+        returning the matching nodes bucketed by the name of each
+        pattern.
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> Node('/srv/site').find_many({'img': r'[.](png|jpg)$'}, globs={'css': '*.css'})
+           {
+               'css': [Node('/srv/site/static/main.css')],
+               'img': [Node('/srv/site/static/logo.png')],
+           }
+
+        Patterns that only check a literal ending, like ``*.css``, are
+        looked up in a table, the others are tried together through a
+        single compiled alternation, see :py:class:`plant.patterns.PatternSet`.
+
+        :param patterns: a :py:class:`dict` mapping names to regexes, applied like :py:meth:`Node.find_with_regex`
+        :param flags: the :py:mod:`re` flags of the regexes
+        :param globs: a :py:class:`dict` mapping names to globs, applied like :py:meth:`Node.glob`
+        :param lazy: bool - if True returns an iterator of ``(name, node)`` tuples, which
+          only streams while the walk runs when no ``sort_by`` is given
+        :param sort_by: a callable key taking a :py:class:`Node` or a label from :py:data:`STAT_LABELS`, applied to each bucket
+        :param limit: the maximum amount of nodes in each bucket
+        :param reverse: bool - if True the greatest nodes come first
+        :param ``**options``: traversal options, see :py:meth:`Node.trip_at`
+        :returns: an iterator or a :py:class:`dict` of lists of :py:class:`Node`
+        """
+        from plant.patterns import PatternSet
+
+        matcher = PatternSet(patterns, flags, globs)
+
+        def iterator():
+            # without sort_by each bucket is full after its first `limit` nodes
+            counts = dict((name, 0) for name in matcher.names)
+            full = limit is not None and sort_by is None
+            for filename in self.walk(lazy=True, **options):
+                names = instrument.call('match', matcher.match, filename)
+                if full:
+                    names = [name for name in names if counts[name] < limit]
+                if names:
+                    node = self.new(filename)
+                    for name in names:
+                        counts[name] += 1
+                        yield name, node
+                if full and all(count >= limit for count in counts.values()):
+                    return
+
+        if lazy and sort_by is None:
+            return iterator()
+
+        buckets = dict((name, []) for name in matcher.names)
+        for name, node in iterator():
+            buckets[name].append(node)
+
+        buckets = dict(
+            (name, list(select(nodes, sort_by, limit, reverse)))
+            for name, nodes in buckets.items()
+        )
+        if lazy:
+            return ((name, node) for name in matcher.names for node in buckets[name])
+
+        return buckets
+
+    def glob_many(self, globs, **kw):
+        """shortcut for :py:meth:`Node.find_many` with globs only
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> assets = Node('/srv/site').glob_many({'css': '*.css', 'js': '*.js'})
+           >>> assets['js']
+           [Node('/srv/site/static/app.js')]
+
+        :param globs: a :py:class:`dict` mapping names to :py:mod:`fnmatch` patterns
+        :param ``**kw``: the other arguments of :py:meth:`Node.find_many`
+        :returns: an iterator or a :py:class:`dict` of lists of :py:class:`Node`
+        """
+        return self.find_many(globs=globs, **kw)
 
     def __eq__(self, other):
         """Compares two :py:class:`Node` objects
@@ -365,7 +970,7 @@ class Node(object):
         """
         return self.path == other.path and self.metadata == other.metadata
 
-    def find(self, relative_path):
+    def find(self, relative_path, **options):
         """Calls :py:meth:`Node.find_with_regex` with ``lazy=True`` but only
         returns the first occurrence.
 
@@ -377,13 +982,108 @@ class Node(object):
            Node('/opt/media/mp3/music1.mp3')
 
         :param relative_path: :py:class:`bytes`
+        :param ``**options``: traversal options, see :py:meth:`Node.trip_at`
         :returns: a :py:class:`Node`
         """
-        for found in self.find_with_regex(relative_path, lazy=True):
+        for found in self.find_with_regex(relative_path, lazy=True, **options):
             return found
 
         return None
 
+    def find_up(self, *names, **kw):
+        """looks for the nearest of the given names in the directory
+        of the current :py:class:`Node` and then in each one of its
+        ancestors, like tools looking for their ``setup.cfg`` or ``.git``
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> Node('/srv/app/src/app/views.py').find_up('setup.cfg', 'tox.ini')
+           Node('/srv/app/setup.cfg')
+
+        Each directory costs a single ``stat`` when looking for one
+        name, or a single listing when looking for several. The answer
+        is remembered for every directory visited on the way, so the
+        other files of the same tree resolve it without any system call.
+        Answers are never revalidated, not even the ``None`` ones: pass
+        ``cache=False`` or call ``plant.core.FOUND_UP.clear()`` after
+        creating or removing the files looked for. Only the
+        :py:data:`FOUND_UP_SIZE` most recently used answers are kept.
+
+        :param ``*names``: the names to look for, the first one present wins
+        :param cache: bool - use and fill the cache, defaults to ``True``
+        :param stop: the path of the last directory to look into
+        :returns: a :py:class:`Node` or ``None``
+        """
+        use_cache = kw.pop('cache', True)
+        stop = kw.pop('stop', None)
+        if kw:
+            raise TypeError('unexpected arguments: {0}'.format(', '.join(sorted(kw))))
+
+        stop = stop and self.backend.normalize(stop)
+        # self.dir would stat the parent of a file
+        directory = (self.is_dir and self.path or dirname(self.path)) or os.sep
+        visited = []
+        found = None
+        while True:
+            key = (self.backend, names, stop, directory)
+            if use_cache:
+                with FOUND_UP_LOCK:
+                    cached = key in FOUND_UP
+                    if cached:
+                        FOUND_UP.move_to_end(key)
+                        found = FOUND_UP[key]
+                if cached:
+                    break
+
+            visited.append(key)
+            found = self.look_into(directory, names)
+            parent = dirname(directory)
+            if found is not None or directory == stop or parent == directory:
+                break
+            directory = parent
+
+        if use_cache:
+            with FOUND_UP_LOCK:
+                for key in visited:
+                    FOUND_UP[key] = found
+                while len(FOUND_UP) > FOUND_UP_SIZE:
+                    FOUND_UP.popitem(last=False)
+
+        return found
+
+    def look_into(self, directory, names):
+        """returns the first of the given names present in a single
+        directory, used by :py:meth:`Node.find_up` for each directory it
+        visits.
+
+        A single name costs one ``stat``, whose result also builds the
+        returned :py:class:`Node`. Several names cost one listing.
+
+        :param directory: the path of the directory to look into
+        :param names: a tuple of names, the first one present wins
+        :returns: a :py:class:`Node` or ``None``
+        """
+        if len(names) == 1:
+            path = join(directory, names[0])
+            try:
+                stats = instrument.call('stat', self.backend.stat, path)
+            except OSError:
+                return None
+            return self.new(path, stats=tuple(stats))
+
+        try:
+            present = set(instrument.call('listdir', self.backend.listdir, directory))
+        except OSError:
+            return None
+
+        for name in names:
+            if name in present:
+                return self.new(join(directory, name))
+
+        return None
+
     def depth_of(self, path):
         """Calculates the level of depth of the given path inside of the
         instance's path.
@@ -403,7 +1103,7 @@ class Node(object):
         """
         new_path = self.relative(path)
         final_path = self.join(new_path)
-        if isfile(final_path, exists(final_path)):
+        if instrument.call('stat', self.backend.isfile, final_path):
             new_path = dirname(new_path)
 
         new_path = new_path.rstrip('/')
@@ -497,7 +1197,7 @@ class Node(object):
         :returns: :py:class:`bool`
         """
 
-        return exists(self.join(path))
+        return instrument.call('stat', self.backend.exists, self.join(path))
 
     def join(self, *path):
         """Joins the given path with that of the current node's
@@ -517,7 +1217,7 @@ class Node(object):
         :param path: :py:class:`bytes`
         :returns: :py:class:`bytes`
         """
-        return abspath(join(self.path, *path))
+        return self.backend.normalize(join(self.path, *path))
 
     def open(self, path, *args, **kw):
         """performs an :py:func:`io.open` on the given relative path to the current node.
@@ -539,7 +1239,141 @@ class Node(object):
         :param ``*kw``: passed onto :py:func:`io.open`
         :returns: :py:class:`io.FileIO`
         """
-        return io.open(self.join(path), *args, **kw)
+        return instrument.call('open', self.backend.open, self.join(path), *args, **kw)
+
+    def manifest(self, algorithm=None, path=None, workers=None, **options):
+        """hashes every file under the current :py:class:`Node` with
+        a pool of processes and saves a manifest of their digests
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> Node('/srv/releases/1.0').manifest('sha256', workers=8)
+           Manifest('/srv/releases/1.0', algorithm='sha256', files=1200)
+
+        :param algorithm: any algorithm name known by :py:func:`hashlib.new`, defaults to ``sha256``
+        :param path: where to save it, defaults to :py:data:`plant.manifest.MANIFEST_FILENAME` at the root
+        :param workers: the amount of processes hashing files
+        :param ``**options``: traversal options, see :py:meth:`Node.trip_at`
+        :returns: a :py:class:`plant.manifest.Manifest`
+        """
+        from plant.hashing import DEFAULT_ALGORITHM
+        from plant.manifest import Manifest
+
+        self.require_local('manifest')
+        manifest = Manifest.build(self, algorithm or DEFAULT_ALGORITHM, workers, **options)
+        manifest.save(path)
+        return manifest
+
+    def verify(self, manifest=None, deep=False, workers=None, find_added=False):
+        """checks the files under the current :py:class:`Node` against
+        a manifest saved by :py:meth:`Node.manifest`, only hashing the
+        files whose size, modification time or inode changed unless
+        ``deep`` is set
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> report = Node('/srv/releases/1.0').verify()
+           >>> report.passed
+           True
+
+        :param manifest: a :py:class:`plant.manifest.Manifest` or the path of one,
+          defaults to the manifest saved at the root
+        :param deep: bool - hash every file
+        :param workers: the amount of processes hashing files
+        :param find_added: bool - also report the files missing from the manifest
+        :returns: a :py:class:`plant.manifest.Verification`
+        """
+        from plant.manifest import MANIFEST_FILENAME, Manifest
+
+        self.require_local('verify')
+        if not isinstance(manifest, Manifest):
+            manifest = Manifest.load(manifest or self.join(MANIFEST_FILENAME))
+
+        return manifest.verify(self.path, deep=deep, workers=workers, find_added=find_added)
+
+    def require_local(self, operation):
+        """makes sure the current :py:class:`Node` lives on the local
+        filesystem before running an operation that needs real paths,
+        like hashing or removing files in other processes.
+
+        :param operation: the name of the operation, used in the error message
+        :raises: :py:exc:`NotImplementedError` when the backend is not local
+        """
+        if not self.backend.local:
+            raise NotImplementedError('{0} is only supported on the local filesystem, not by {1}'.format(
+                operation, type(self.backend).__name__))
+
+    def remove_tree(self, workers=None, dry_run=False):
+        """removes the current :py:class:`Node` and everything under it,
+        bottom-up in a single pass. See :py:class:`plant.cleanup.Remover`
+
+        ::
+
+           >>> from plant import Node
+           >>>
+           >>> Node('/tmp/cache').remove_tree(workers=8)
+           RemovalReport(files=2000000, dirs=4200, errors=0, dry_run=False)
+
+        :param workers: the amount of threads clearing subtrees in parallel
+        :param dry_run: bool - only report what would be removed
+        :returns: a :py:class:`plant.cleanup.RemovalReport`
+        """
+        from plant.cleanup import RemovalReport, Remover
+
+        self.require_local('remove_tree')
+        if self.is_dir:
+            return Remover(workers=workers, dry_run=dry_run).run(self.path, remove_top=True)
+
+        report = RemovalReport(dry_run)
+        try:
+            if not dry_run:
+                instrument.call('remove', os.unlink, self.path)
+            report.removed(self.path, False)
+        except OSError as error:
+            report.failed(error)
+
+        return report
+
+    def prune(self, predicate, remove_empty_dirs=False, workers=None, dry_run=False):
+        """removes the files under the current :py:class:`Node` accepted by ``predicate``
+
+        ::
+
+           >>> import time
+           >>> from plant import Node
+           >>>
+           >>> week_ago = time.time() - 7 * 24 * 3600
+           >>> Node('/tmp/cache').prune(lambda node: node.metadata.mtime < week_ago)
+           RemovalReport(files=1200, dirs=0, errors=0, dry_run=False)
+
+        :param predicate: a callable taking a :py:class:`Node` of each file
+        :param remove_empty_dirs: bool - also remove the folders left empty
+        :param workers: the amount of threads clearing subtrees in parallel
+        :param dry_run: bool - only report what would be removed
+        :returns: a :py:class:`plant.cleanup.RemovalReport`
+        """
+        from plant.cleanup import Remover
+
+        self.require_local('prune')
+        remover = Remover(predicate, remove_dirs=remove_empty_dirs, workers=workers, dry_run=dry_run)
+        return remover.run(self.path)
+
+    def remove_empty_dirs(self, workers=None, dry_run=False):
+        """removes the folders under the current :py:class:`Node` that
+        are empty or only contain empty folders
+
+        :param workers: the amount of threads clearing subtrees in parallel
+        :param dry_run: bool - only report what would be removed
+        :returns: a :py:class:`plant.cleanup.RemovalReport`
+        """
+        from plant.cleanup import Remover
+
+        self.require_local('remove_empty_dirs')
+        return Remover(False, remove_dirs=True, workers=workers, dry_run=dry_run).run(self.path)
 
     def __repr__(self):
         """string representation of a :py:class:`Node`
@@ -551,4 +1385,4 @@ class Node(object):
            >>> repr(Node('/opt/documents'))
            'Node("/opt/documents")'
         """
-        return 'Node({0})'.format(repr(relpath(self.path)))
+        return 'Node({0})'.format(repr(self.backend.display(self.path)))
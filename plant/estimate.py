@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""estimates of the size of a tree without walking it
+
+Each sample is a random descent from the top: at every directory a
+subdirectory is picked at random until a leaf is reached. Weighting
+what each directory holds by the product of the fan-outs met on the way
+down gives an unbiased estimate of the whole tree (Knuth, 1975),
+averaging several descents narrows it down.
+
+Listings are cached during an estimate, the upper levels shared by
+most descents are only listed once.
+
+::
+
+    >>> from plant import Node
+    >>>
+    >>> Node('/srv/media').estimate(samples=200, timeout=2)
+    Estimate(files=1.2e+06 ±8.1e+04, bytes=3.4e+12 ±4e+11, dirs=5.1e+04, samples=200)
+"""
+from __future__ import unicode_literals
+
+import math
+import os
+import posixpath
+import random
+import time
+
+from collections import defaultdict
+from stat import S_ISDIR
+
+from plant import instrument
+
+
+DEFAULT_SAMPLES = 100
+# files stated per directory to estimate its bytes
+SIZE_SAMPLES = 16
+
+
+class Estimate(object):
+    """the averages of the samples, each with its confidence interval
+
+    :param samples: the per-sample ``(files, bytes, dirs, depths)``
+      tuples, ``depths`` maps a depth to the files estimated there
+    :param confidence: the probability covered by the intervals
+    :param seconds: the time spent sampling
+    """
+
+    def __init__(self, samples, confidence=0.95, seconds=0.0):
+        self.samples = len(samples)
+        self.confidence = confidence
+        self.seconds = seconds
+        self.z = z_score(confidence)
+
+        self.files, self.files_error = self.summarize([s[0] for s in samples])
+        self.bytes, self.bytes_error = self.summarize([s[1] for s in samples])
+        self.dirs, self.dirs_error = self.summarize([s[2] for s in samples])
+
+        totals = defaultdict(float)
+        for sample in samples:
+            for depth, files in sample[3].items():
+                totals[depth] += files
+        self.depths = dict((depth, files / len(samples)) for depth, files in sorted(totals.items()))
+
+    def summarize(self, values):
+        """returns the mean and the half width of its confidence interval"""
+        if not values:
+            return 0.0, 0.0
+
+        mean = sum(values) / float(len(values))
+        if len(values) < 2:
+            return mean, float('inf')
+
+        variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+        return mean, self.z * math.sqrt(variance / len(values))
+
+    @property
+    def files_interval(self):
+        return max(0.0, self.files - self.files_error), self.files + self.files_error
+
+    @property
+    def bytes_interval(self):
+        return max(0.0, self.bytes - self.bytes_error), self.bytes + self.bytes_error
+
+    @property
+    def dirs_interval(self):
+        return max(1.0, self.dirs - self.dirs_error), self.dirs + self.dirs_error
+
+    def __repr__(self):
+        return 'Estimate(files={0:.2g} ±{1:.2g}, bytes={2:.2g} ±{3:.2g}, dirs={4:.2g}, samples={5})'.format(
+            self.files, self.files_error, self.bytes, self.bytes_error, self.dirs, self.samples)
+
+
+def z_score(confidence):
+    """the two-sided z score of a normal distribution"""
+    from statistics import NormalDist
+    return NormalDist().inv_cdf((1 + confidence) / 2.0)
+
+
+class Estimator(object):
+    """runs random descents under a :py:class:`plant.Node`
+
+    :param node: the top :py:class:`plant.Node`
+    :param seed: seeds the random choices, for repeatable estimates
+    :param listings: a cache of listings shared with other estimators
+    """
+
+    def __init__(self, node, seed=None, listings=None):
+        self.node = node
+        self.random = random.Random(seed)
+        self.listings = listings if listings is not None else {}
+
+    def listing(self, path):
+        """returns ``(dirs, files, sizes)`` where ``sizes`` holds the
+        sizes of up to :py:data:`SIZE_SAMPLES` random files"""
+        if path in self.listings:
+            return self.listings[path]
+
+        try:
+            scan = self.node.backend.local and self.scan or self.scan_backend
+            dirs, files = instrument.call('listdir', scan, path)
+        except OSError:
+            dirs, files = [], []
+
+        # sorted, so that a seed gives the same estimate whatever
+        # order the filesystem lists the names in
+        dirs.sort()
+        files.sort()
+        sizes = []
+        for name in self.random.sample(files, min(len(files), SIZE_SAMPLES)):
+            try:
+                sizes.append(instrument.call('stat', self.node.backend.stat, posixpath.join(path, name))[6])
+            except OSError:
+                continue
+
+        self.listings[path] = dirs, files, sizes
+        return self.listings[path]
+
+    def scan(self, path):
+        dirs, files = [], []
+        for entry in os.scandir(path):
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            (dirs if is_dir else files).append(entry.name)
+        return dirs, files
+
+    def scan_backend(self, path):
+        dirs, files = [], []
+        backend = self.node.backend
+        for name in backend.listdir(path):
+            try:
+                is_dir = S_ISDIR(backend.stat(posixpath.join(path, name))[0])
+            except OSError:
+                is_dir = False
+            (dirs if is_dir else files).append(name)
+        return dirs, files
+
+    def sample(self):
+        """one random descent, returns ``(files, bytes, dirs, depths)``"""
+        path = self.node.path or '/'
+        weight, depth = 1, 0
+        files_total = bytes_total = dirs_total = 0.0
+        depths = {}
+        while True:
+            dirs, files, sizes = self.listing(path)
+            dirs_total += weight
+            files_total += weight * len(files)
+            if sizes:
+                bytes_total += weight * len(files) * sum(sizes) / float(len(sizes))
+            if files:
+                depths[depth] = weight * len(files)
+            if not dirs:
+                return files_total, bytes_total, dirs_total, depths
+
+            weight *= len(dirs)
+            depth += 1
+            path = posixpath.join(path, self.random.choice(dirs))
+
+    def estimate(self, samples=DEFAULT_SAMPLES, timeout=None, confidence=0.95):
+        """takes up to ``samples`` descents, stopping early once
+        ``timeout`` seconds went by
+
+        :returns: an :py:class:`Estimate`
+        """
+        started = time.time()
+        results = []
+        while len(results) < samples:
+            results.append(self.sample())
+            if timeout is not None and time.time() - started >= timeout:
+                break
+
+        return Estimate(results, confidence, time.time() - started)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""content hashing helpers
+
+The hashing is done in chunks and spread across threads,
+:py:mod:`hashlib` releases the GIL while digesting large buffers.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import os
+
+from collections import defaultdict
+
+from plant import instrument
+
+
+CHUNK_SIZE = 1024 * 1024
+PARTIAL_SIZE = 64 * 1024
+DEFAULT_ALGORITHM = 'sha256'
+
+
+def file_digest(path, algorithm=DEFAULT_ALGORITHM, limit=None, chunk_size=CHUNK_SIZE):
+    """returns the hex digest of the contents of a file
+
+    :param path: the path of the file
+    :param algorithm: any algorithm name known by :py:func:`hashlib.new`
+    :param limit: only hash the first ``limit`` bytes
+    :param chunk_size: how many bytes to read at a time
+    :returns: :py:class:`str`
+    """
+    digest = hashlib.new(algorithm)
+    remaining = limit
+    # opened through instrument, the reads then count against the throttles
+    with instrument.call('open', io.open, path, 'rb') as fd:
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = fd.read(size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+
+    return digest.hexdigest()
+
+
+def parallel_map(function, items, workers=None):
+    """maps ``function`` over ``items`` with a thread pool, serially
+    when ``workers`` is ``1``"""
+    items = list(items)
+    if workers == 1 or len(items) < 2:
+        return list(map(function, items))
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, items))
+
+
+def regroup(groups, key, workers=None):
+    """splits each group of paths by ``key(path)`` keeping only the
+    subgroups with more than one path"""
+    paths = [path for group in groups for path in group]
+
+    def safe_key(path):
+        try:
+            return key(path)
+        except (IOError, OSError):
+            return None
+
+    keys = parallel_map(safe_key, paths, workers)
+    buckets = defaultdict(list)
+    index = 0
+    for number, group in enumerate(groups):
+        for path in group:
+            if keys[index] is not None:
+                buckets[(number, keys[index])].append(path)
+            index += 1
+
+    return [bucket for bucket in buckets.values() if len(bucket) > 1]
+
+
+def find_duplicates(paths, algorithm=DEFAULT_ALGORITHM, workers=None, skip_empty=True):
+    """groups the given files by identical contents
+
+    Only files with the same size are hashed, first their leading
+    :py:data:`PARTIAL_SIZE` bytes and then, if those still collide,
+    their whole contents.
+
+    ::
+
+        >>> from plant import Node
+        >>> from plant.hashing import find_duplicates
+        >>>
+        >>> find_duplicates(Node('/srv/media').walk())
+        [['/srv/media/a.png', '/srv/media/copy-of-a.png']]
+
+    :param paths: an iterable of file paths
+    :param algorithm: any algorithm name known by :py:func:`hashlib.new`
+    :param workers: the amount of threads stating and hashing files
+    :param skip_empty: bool - ignore empty files
+    :returns: a :py:class:`list` of lists of paths
+    """
+    size = lambda path: instrument.call('stat', os.stat, path).st_size
+    groups = regroup([list(paths)], size, workers)
+    if skip_empty:
+        groups = [group for group in groups if size(group[0]) > 0]
+
+    groups = regroup(groups, lambda path: file_digest(path, algorithm, limit=PARTIAL_SIZE), workers)
+    groups = regroup(groups, lambda path: file_digest(path, algorithm), workers)
+    return sorted(sorted(group) for group in groups)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""``.gitignore``-style matching.
+
+Each directory that has an ignore file gets its own
+:py:class:`IgnoreMatcher`, compiled once and chained to the matcher of
+its parent directory so that subdirectories inherit the rules above
+them.
+"""
+from __future__ import unicode_literals
+
+import io
+import re
+
+from os.path import join
+
+from plant import instrument
+
+
+IGNORE_FILES = ('.gitignore', '.plantignore')
+
+# git never looks inside its own metadata folder, neither should we
+IMPLICIT_RULES = ('.git/',)
+
+
+def translate(pattern):
+    """translates a single gitignore glob into a regex string that
+    matches a path relative to the directory of the ignore file.
+
+    :param pattern: a gitignore pattern without the ``!`` prefix or the trailing ``/``
+    :returns: :py:class:`str`
+    """
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+
+    index, size = 0, len(pattern)
+    result = []
+    while index < size:
+        char = pattern[index]
+        if pattern.startswith('**/', index):
+            result.append('(?:.*/)?')
+            index += 3
+            continue
+        elif pattern.startswith('/**', index) and index + 3 == size:
+            result.append('/.*')
+            index += 3
+            continue
+        elif pattern.startswith('**', index):
+            result.append('.*')
+            index += 2
+            continue
+        elif char == '*':
+            result.append('[^/]*')
+        elif char == '?':
+            result.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', index + 1)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                klass = pattern[index + 1:end]
+                if klass.startswith('!'):
+                    klass = '^' + klass[1:]
+                result.append('[{0}]'.format(klass.replace('\\', '\\\\')))
+                index = end
+        elif char == '\\' and index + 1 < size:
+            index += 1
+            result.append(re.escape(pattern[index]))
+        else:
+            result.append(re.escape(char))
+        index += 1
+
+    prefix = '' if anchored else '(?:.*/)?'
+    return '^{0}{1}$'.format(prefix, ''.join(result))
+
+
+class IgnoreRule(object):
+    """a single compiled line of an ignore file"""
+
+    def __init__(self, line):
+        self.negate = line.startswith('!')
+        if self.negate:
+            line = line[1:]
+
+        self.dir_only = line.endswith('/')
+        self.pattern = line.rstrip('/')
+        self.regex = re.compile(translate(self.pattern))
+
+    def matches(self, relative_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+
+        return self.regex.match(relative_path) is not None
+
+
+def parse(lines):
+    """parses the lines of an ignore file into a list of :py:class:`IgnoreRule`
+
+    :param lines: an iterable of strings
+    :returns: a :py:class:`list` of :py:class:`IgnoreRule`
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        if not line.endswith('\\ '):
+            line = line.rstrip(' ')
+
+        if not line or line.startswith('#'):
+            continue
+
+        rules.append(IgnoreRule(line))
+
+    return rules
+
+
+class IgnoreMatcher(object):
+    """the rules that apply to the ``base`` directory and below.
+
+    ::
+
+        >>> from plant.ignore import IgnoreMatcher
+        >>>
+        >>> matcher = IgnoreMatcher('/srv/app', ['*.pyc', 'build/'])
+        >>> matcher.ignores('/srv/app/build', is_dir=True)
+        True
+        >>> matcher.ignores('/srv/app/conf.py', is_dir=False)
+        False
+
+    :param base: the absolute path of the directory holding the rules
+    :param lines: the gitignore-style lines
+    :param parent: the :py:class:`IgnoreMatcher` of an upper directory, if any
+    """
+
+    def __init__(self, base, lines, parent=None):
+        self.base = base.rstrip('/')
+        self.rules = parse(lines)
+        self.parent = parent
+
+        # without negations the last-match-wins rule doesn't matter,
+        # so all the rules can be checked by a single regex
+        self.simple = not any(rule.negate for rule in self.rules)
+        if self.simple:
+            self.files_regex = self.combine(r for r in self.rules if not r.dir_only)
+            self.dirs_regex = self.combine(self.rules)
+
+    @staticmethod
+    def combine(rules):
+        patterns = ['(?:{0})'.format(rule.regex.pattern) for rule in rules]
+        return patterns and re.compile('|'.join(patterns)) or None
+
+    @classmethod
+    def from_directory(cls, base, names, filenames=IGNORE_FILES, parent=None):
+        """compiles the ignore files present in a directory.
+
+        :param base: the absolute path of the directory
+        :param names: the entry names already listed from ``base``
+        :param filenames: the names of the ignore files to read
+        :param parent: the :py:class:`IgnoreMatcher` inherited from upper directories
+        :returns: a new :py:class:`IgnoreMatcher` or ``parent`` when there are no ignore files
+        """
+        lines = []
+        for filename in filenames:
+            if filename not in names:
+                continue
+            try:
+                with instrument.call('open', io.open, join(base, filename), encoding='utf-8', errors='replace') as fd:
+                    lines.extend(fd.readlines())
+            except (IOError, OSError):
+                continue
+
+        if not lines:
+            return parent
+
+        return cls(base, lines, parent)
+
+    def verdict(self, path, is_dir):
+        """returns ``True`` or ``False`` when one of the rules of this
+        very matcher decides about the path, ``None`` otherwise"""
+        relative_path = path[len(self.base) + 1:]
+        if self.simple:
+            regex = is_dir and self.dirs_regex or self.files_regex
+            if regex is not None and regex.match(relative_path):
+                return True
+            return None
+
+        for rule in reversed(self.rules):
+            if rule.matches(relative_path, is_dir):
+                return not rule.negate
+
+        return None
+
+    def ignores(self, path, is_dir):
+        """checks whether the given absolute path is ignored by this
+        matcher or by the matchers inherited from upper directories
+
+        :param path: an absolute path under ``self.base``
+        :param is_dir: bool - whether the path is a directory
+        :returns: :py:class:`bool`
+        """
+        matcher = self
+        while matcher is not None:
+            verdict = matcher.verdict(path, is_dir)
+            if verdict is not None:
+                return verdict
+            matcher = matcher.parent
+
+        return False
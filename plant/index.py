@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""a flat, on-disk listing of a tree
+
+Building an :py:class:`Index` walks the tree once, later searches can
+read the index instead of walking again.
+"""
+from __future__ import unicode_literals
+
+import io
+import os
+
+from os.path import exists, join
+
+
+INDEX_FILENAME = '.plantindex'
+HEADER = 'plant-index 1'
+
+
+class Index(object):
+    """the files of a tree with their size and modification time
+
+    ::
+
+        >>> from plant import Node
+        >>> from plant.index import Index
+        >>>
+        >>> index = Index.build(Node('/srv/media'), workers=8)
+        >>> index.save()
+        >>> Index.load('/srv/media/.plantindex').paths()[:1]
+        ['/srv/media/mp3/music1.mp3']
+
+    :param root: the absolute path of the indexed tree
+    :param entries: a list of ``(relative_path, size, mtime)``
+    """
+
+    def __init__(self, root, entries):
+        self.root = root.rstrip('/') or '/'
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, node, workers=None, chunk_size=10000, **options):
+        """walks the given :py:class:`plant.Node` and stats its files
+
+        :param node: the root :py:class:`plant.Node`
+        :param workers: the amount of threads used by :py:meth:`plant.Node.stat_many`
+        :param chunk_size: how many paths are stated per batch
+        :param ``**options``: traversal options, see :py:meth:`plant.Node.trip_at`
+        :returns: an :py:class:`Index`
+        """
+        entries = []
+        chunk = []
+
+        def flush():
+            for found in node.stat_many(chunk, workers=workers, fields=['size', 'mtime']):
+                if found.exists:
+                    entries.append((node.relative(found.path), found.metadata.size, found.metadata.mtime))
+            del chunk[:]
+
+        for path in node.walk(lazy=True, **options):
+            if os.path.basename(path) == INDEX_FILENAME:
+                continue
+            chunk.append(path)
+            if len(chunk) >= chunk_size:
+                flush()
+
+        flush()
+        return cls(node.path, entries)
+
+    @classmethod
+    def load(cls, path):
+        """reads an index saved by :py:meth:`Index.save`
+
+        :param path: the path of the index file
+        :raises: :py:exc:`ValueError` when the file is not an index
+        :returns: an :py:class:`Index`
+        """
+        with io.open(path, 'r', encoding='utf-8', newline='') as fd:
+            records = fd.read().split('\0')
+
+        if not records or records[0] != HEADER:
+            raise ValueError('{0} is not a plant index'.format(path))
+
+        root = records[1]
+        entries = []
+        for record in records[2:]:
+            if not record:
+                continue
+            size, mtime, relative = record.split(' ', 2)
+            entries.append((relative, int(size), int(mtime)))
+
+        return cls(root, entries)
+
+    def save(self, path=None):
+        """writes the index, by default into :py:data:`INDEX_FILENAME`
+        at the root of the tree
+
+        :returns: the path of the index file
+        """
+        path = path or join(self.root, INDEX_FILENAME)
+        with io.open(path, 'w', encoding='utf-8', newline='') as fd:
+            fd.write('{0}\0{1}\0'.format(HEADER, self.root))
+            for relative, size, mtime in self.entries:
+                fd.write('{0} {1} {2}\0'.format(size, mtime, relative))
+
+        return path
+
+    def paths(self):
+        """returns the absolute paths of the indexed files"""
+        return [join(self.root, relative) for relative, size, mtime in self.entries]
+
+
+def find_index(root):
+    """returns the path of the index saved at ``root``, if any"""
+    path = join(root, INDEX_FILENAME)
+    return exists(path) and path or None
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""counters and timers for the filesystem operations performed by plant
+
+Every ``os.stat``, directory listing, ``io.open``, removal and
+pattern match that :py:class:`plant.Node` performs goes through :py:func:`call`,
+which costs a single check while nobody is profiling.
+
+::
+
+    >>> import plant
+    >>>
+    >>> with plant.profile() as stats:
+    ...     plant.Node('/srv').glob('*.py')
+    >>> print(stats)
+    operation      count      seconds
+    stat            1200     0.004311
+    listdir          130     0.002092
+    match           1200     0.000954
+"""
+from __future__ import unicode_literals
+
+import io
+import threading
+import time
+
+from collections import OrderedDict
+
+
+OPERATIONS = ('stat', 'listdir', 'open', 'remove', 'match')
+
+_active = []
+_limiters = []
+
+
+def add_limiter(limiter):
+    """makes every operation wait for ``limiter``, an object with the
+    ``acquire(operation)``, ``transfer(size)``, ``wrap(fd)`` and
+    ``split(parts)`` methods of :py:class:`plant.throttling.Throttle`"""
+    _limiters.append(limiter)
+
+
+def remove_limiter(limiter):
+    if limiter in _limiters:
+        _limiters.remove(limiter)
+
+
+def split_limiters(parts):
+    """returns the active limiters each split for one of ``parts``
+    worker processes, see :py:meth:`plant.throttling.Throttle.split`"""
+    return [limiter.split(parts) for limiter in _limiters]
+
+
+def set_limiters(limiters):
+    """replaces the active limiters, meant as the ``initializer`` of
+    worker processes that may have inherited the ones of their parent"""
+    _limiters[:] = limiters
+
+
+def transferred(size):
+    """accounts ``size`` bytes read outside of :py:meth:`plant.Node.open`,
+    by the hashing helpers for example"""
+    for limiter in _limiters:
+        limiter.transfer(size)
+
+
+def call(operation, function, *args, **kw):
+    """calls ``function(*args, **kw)`` accounting it as ``operation``
+    in every active :py:class:`Profile` and waiting for the active
+    limiters first"""
+    if not _active and not _limiters:
+        return function(*args, **kw)
+
+    for limiter in _limiters:
+        limiter.acquire(operation)
+
+    if not _active:
+        result = function(*args, **kw)
+    else:
+        started = time.perf_counter()
+        try:
+            result = function(*args, **kw)
+        finally:
+            elapsed = time.perf_counter() - started
+            for recorder in _active:
+                recorder.record(operation, elapsed)
+
+    if operation == 'open':
+        for limiter in _limiters:
+            result = limiter.wrap(result)
+
+    return result
+
+
+def iterate(operation, iterator):
+    """yields from ``iterator`` accounting each step as ``operation``,
+    meant for generators like :py:func:`os.walk` that perform one
+    directory read per step"""
+    iterator = iter(iterator)
+    while True:
+        try:
+            item = call(operation, next, iterator)
+        except StopIteration:
+            return
+
+        yield item
+
+
+class Profile(object):
+    """the totals of the operations performed while it is active,
+    use :py:func:`profile` to create one.
+
+    :param sinks: objects with an ``export(profile)`` method called when
+      the profile finishes, see :py:class:`StatsdSink` and
+      :py:class:`PrometheusSink`
+    """
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.counts = OrderedDict((operation, 0) for operation in OPERATIONS)
+        self.seconds = OrderedDict((operation, 0.0) for operation in OPERATIONS)
+        self.lock = threading.Lock()
+
+    def record(self, operation, elapsed):
+        with self.lock:
+            self.counts[operation] = self.counts.get(operation, 0) + 1
+            self.seconds[operation] = self.seconds.get(operation, 0.0) + elapsed
+
+    def start(self):
+        _active.append(self)
+        return self
+
+    def stop(self):
+        if self in _active:
+            _active.remove(self)
+
+        for sink in self.sinks:
+            sink.export(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, _type, value, traceback):
+        self.stop()
+
+    def report(self):
+        """returns a :py:class:`dict` mapping each operation to its
+        ``count`` and ``seconds``"""
+        return OrderedDict(
+            (operation, {'count': self.counts[operation], 'seconds': self.seconds[operation]})
+            for operation in self.counts
+        )
+
+    def __str__(self):
+        lines = ['{0:10} {1:>9} {2:>12}'.format('operation', 'count', 'seconds')]
+        for operation, totals in self.report().items():
+            lines.append('{0:10} {1:>9} {2:>12.6f}'.format(operation, totals['count'], totals['seconds']))
+
+        return '\n'.join(lines)
+
+
+def profile(*sinks):
+    """returns a :py:class:`Profile` to be used as a context manager
+
+    :param ``*sinks``: exporters called when the block exits
+    :returns: a :py:class:`Profile`
+    """
+    return Profile(sinks)
+
+
+class StatsdSink(object):
+    """sends the totals of a profile to a StatsD daemon over UDP, as
+    one counter and one timer per operation
+
+    :param host: the StatsD host
+    :param port: the StatsD port
+    :param prefix: the prefix of the metric names
+    """
+
+    def __init__(self, host='localhost', port=8125, prefix='plant'):
+        self.address = (host, port)
+        self.prefix = prefix
+
+    def lines(self, profile):
+        for operation, totals in profile.report().items():
+            name = '{0}.{1}'.format(self.prefix, operation)
+            yield '{0}:{1}|c'.format(name, totals['count'])
+            yield '{0}.time:{1:.3f}|ms'.format(name, totals['seconds'] * 1000)
+
+    def export(self, profile):
+        import socket
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.sendto('\n'.join(self.lines(profile)).encode('utf-8'), self.address)
+        except (IOError, OSError):
+            pass
+        finally:
+            sock.close()
+
+
+class PrometheusSink(object):
+    """writes the totals of a profile in the prometheus text format,
+    for example into the textfile collector folder of node_exporter
+
+    :param path: the file to write, ``None`` keeps the text in ``self.text``
+    :param prefix: the prefix of the metric names
+    """
+
+    def __init__(self, path=None, prefix='plant'):
+        self.path = path
+        self.prefix = prefix
+        self.text = ''
+
+    def render(self, profile):
+        report = profile.report()
+        lines = [
+            '# TYPE {0}_operations_total counter'.format(self.prefix),
+        ]
+        for operation, totals in report.items():
+            lines.append('{0}_operations_total{{operation="{1}"}} {2}'.format(
+                self.prefix, operation, totals['count']))
+
+        lines.append('# TYPE {0}_operation_seconds_total counter'.format(self.prefix))
+        for operation, totals in report.items():
+            lines.append('{0}_operation_seconds_total{{operation="{1}"}} {2:.6f}'.format(
+                self.prefix, operation, totals['seconds']))
+
+        return '\n'.join(lines) + '\n'
+
+    def export(self, profile):
+        self.text = self.render(profile)
+        if self.path:
+            with io.open(self.path, 'w', encoding='utf-8') as fd:
+                fd.write(self.text)
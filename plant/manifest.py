@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""checksum manifests of whole trees
+
+A manifest records the digest, size, modification time and inode of
+every file, and the files that could not be read while building it.
+Verifying it later only hashes again the files whose size,
+modification time or inode changed, unless a deep verification is
+asked for. Hashing is spread across a pool of processes.
+
+::
+
+    >>> from plant import Node
+    >>>
+    >>> Node('/srv/releases/1.0').manifest()
+    Manifest('/srv/releases/1.0', algorithm='sha256', files=1200)
+    >>> Node('/srv/releases/1.0').verify(deep=True)
+    Verification(ok=1200, skipped=0, changed=0, missing=0, added=0, unreadable=0)
+"""
+from __future__ import unicode_literals
+
+import io
+import os
+
+from os.path import join
+
+from plant import instrument
+from plant.hashing import DEFAULT_ALGORITHM, file_digest
+from plant.index import INDEX_FILENAME
+
+
+MANIFEST_FILENAME = '.plantmanifest'
+HEADER = 'plant-manifest 1'
+
+# how many files each worker process hashes per round-trip
+BATCH_SIZE = 64
+
+
+def digest_entry(item):
+    """hashes ``(path, algorithm)``, returns ``None`` when the file
+    can't be read. Module level so that worker processes can pickle it."""
+    path, algorithm = item
+    try:
+        return file_digest(path, algorithm)
+    except (IOError, OSError):
+        return None
+
+
+def manifest_entry(item):
+    """stats and hashes ``(path, algorithm)``, returns ``(digest,
+    size, mtime_ns, inode)`` or ``None`` when the file can't be read"""
+    path, algorithm = item
+    try:
+        stats = instrument.call('stat', os.stat, path)
+        return file_digest(path, algorithm), stats.st_size, stats.st_mtime_ns, stats.st_ino
+    except (IOError, OSError):
+        return None
+
+
+def process_map(function, items, workers=None):
+    """maps ``function`` over ``items`` with a pool of processes,
+    serially when ``workers`` is ``1`` or there is little to do"""
+    items = list(items)
+    if workers == 1 or len(items) < 2:
+        return list(map(function, items))
+
+    with process_pool(workers) as executor:
+        return list(executor.map(function, items, chunksize=BATCH_SIZE))
+
+
+def process_pool(workers=None):
+    """a :py:class:`concurrent.futures.ProcessPoolExecutor` whose
+    processes share the active throttles, each one gets an equal part
+    of their rates"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=instrument.set_limiters,
+        initargs=(instrument.split_limiters(workers),),
+    )
+
+
+class Verification(object):
+    """the outcome of :py:meth:`Manifest.verify`, lists of relative paths"""
+
+    def __init__(self):
+        self.ok = []
+        self.skipped = []
+        self.changed = []
+        self.missing = []
+        self.added = []
+        # recorded as unreadable when the manifest was built
+        self.unreadable = []
+
+    @property
+    def passed(self):
+        """whether no file changed nor went missing"""
+        return not (self.changed or self.missing)
+
+    def __repr__(self):
+        return 'Verification(ok={0}, skipped={1}, changed={2}, missing={3}, added={4}, unreadable={5})'.format(
+            len(self.ok), len(self.skipped), len(self.changed), len(self.missing), len(self.added),
+            len(self.unreadable))
+
+
+class Manifest(object):
+    """the digests of the files of a tree
+
+    :param root: the absolute path of the tree
+    :param algorithm: any algorithm name known by :py:func:`hashlib.new`
+    :param entries: a list of ``(relative_path, digest, size, mtime_ns, inode)``
+    :param unreadable: the relative paths of the files that could not
+      be stated or hashed, so that :py:meth:`verify` doesn't mistake them
+      for added files
+    """
+
+    def __init__(self, root, algorithm, entries, unreadable=()):
+        self.root = root.rstrip('/') or '/'
+        self.algorithm = algorithm
+        self.entries = entries
+        self.unreadable = list(unreadable)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return 'Manifest({0!r}, algorithm={1!r}, files={2})'.format(self.root, self.algorithm, len(self))
+
+    @classmethod
+    def build(cls, node, algorithm=DEFAULT_ALGORITHM, workers=None, **options):
+        """walks and hashes the files under a :py:class:`plant.Node`
+
+        :param node: the root :py:class:`plant.Node`
+        :param algorithm: any algorithm name known by :py:func:`hashlib.new`
+        :param workers: the amount of processes hashing files
+        :param ``**options``: traversal options, see :py:meth:`plant.Node.trip_at`
+        :returns: a :py:class:`Manifest`
+        """
+        paths = [
+            path for path in node.walk(lazy=True, **options)
+            if os.path.basename(path) not in (MANIFEST_FILENAME, INDEX_FILENAME)
+        ]
+        results = process_map(manifest_entry, [(path, algorithm) for path in paths], workers)
+        entries, unreadable = [], []
+        for path, result in zip(paths, results):
+            if result is None:
+                unreadable.append(node.relative(path))
+            else:
+                entries.append((node.relative(path),) + result)
+
+        return cls(node.path, algorithm, entries, unreadable)
+
+    @classmethod
+    def load(cls, path):
+        """reads a manifest saved by :py:meth:`Manifest.save`
+
+        :param path: the path of the manifest file
+        :raises: :py:exc:`ValueError` when the file is not a manifest
+        :returns: a :py:class:`Manifest`
+        """
+        with io.open(path, 'r', encoding='utf-8', newline='') as fd:
+            records = fd.read().split('\0')
+
+        if len(records) < 3 or records[0] != HEADER:
+            raise ValueError('{0} is not a plant manifest'.format(path))
+
+        root, algorithm = records[1], records[2]
+        entries, unreadable = [], []
+        for record in records[3:]:
+            if not record:
+                continue
+            if record.startswith('!'):
+                unreadable.append(record[1:])
+                continue
+            digest, size, mtime_ns, inode, relative = record.split(' ', 4)
+            entries.append((relative, digest, int(size), int(mtime_ns), int(inode)))
+
+        return cls(root, algorithm, entries, unreadable)
+
+    def save(self, path=None):
+        """writes the manifest, by default into :py:data:`MANIFEST_FILENAME`
+        at the root of the tree
+
+        :returns: the path of the manifest file
+        """
+        path = path or join(self.root, MANIFEST_FILENAME)
+        with io.open(path, 'w', encoding='utf-8', newline='') as fd:
+            fd.write('{0}\0{1}\0{2}\0'.format(HEADER, self.root, self.algorithm))
+            for relative, digest, size, mtime_ns, inode in self.entries:
+                fd.write('{0} {1} {2} {3} {4}\0'.format(digest, size, mtime_ns, inode, relative))
+            # digests are hex, a record starting with ! can't be an entry
+            for relative in self.unreadable:
+                fd.write('!{0}\0'.format(relative))
+
+        return path
+
+    def verify(self, root=None, deep=False, workers=None, find_added=False):
+        """checks the files of the tree against the manifest
+
+        Files whose size differs are changed without being hashed, the
+        ones whose size, modification time and inode are unchanged are
+        skipped unless ``deep`` is set.
+
+        :param root: the path of the tree, defaults to the one recorded
+        :param deep: bool - hash every file
+        :param workers: the amount of processes hashing files
+        :param find_added: bool - also walk the tree looking for files
+          missing from the manifest, the ones recorded as unreadable are
+          reported in ``unreadable`` instead
+        :returns: a :py:class:`Verification`
+        """
+        root = root or self.root
+        report = Verification()
+        report.unreadable.extend(self.unreadable)
+        pending = []
+        for relative, digest, size, mtime_ns, inode in self.entries:
+            path = join(root, relative)
+            try:
+                stats = instrument.call('stat', os.stat, path)
+            except OSError:
+                report.missing.append(relative)
+                continue
+
+            if stats.st_size != size:
+                report.changed.append(relative)
+            elif not deep and (stats.st_mtime_ns, stats.st_ino) == (mtime_ns, inode):
+                report.skipped.append(relative)
+            else:
+                pending.append((relative, digest))
+
+        digests = process_map(digest_entry, [(join(root, relative), self.algorithm) for relative, _ in pending], workers)
+        for (relative, expected), digest in zip(pending, digests):
+            (report.ok if digest == expected else report.changed).append(relative)
+
+        if find_added:
+            from plant.core import Node
+
+            node = Node(root)
+            known = set(entry[0] for entry in self.entries) | set(self.unreadable)
+            for path in node.walk(lazy=True):
+                relative = node.relative(path)
+                if relative not in known and os.path.basename(path) not in (MANIFEST_FILENAME, INDEX_FILENAME):
+                    report.added.append(relative)
+
+        return report
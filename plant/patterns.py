@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""several patterns matched in a single pass
+
+:py:class:`PatternSet` sorts the patterns by how cheap they are to
+check: globs and regexes that only test a literal ending, like
+``*.css`` or ``\\.css$``, go into a lookup table keyed by that ending,
+the others are compiled into one alternation that rejects most paths
+with a single :py:func:`re.search` before the individual patterns are
+tried. Regexes with backreferences, named groups or global inline
+flags such as ``(?i)`` would change meaning or fail to compile inside
+the alternation, they are always searched on their own.
+
+::
+
+    >>> from plant.patterns import PatternSet
+    >>>
+    >>> patterns = PatternSet({'img': r'\\.(png|jpg)$'}, globs={'css': '*.css', 'all': '*'})
+    >>> patterns.match('/srv/static/logo.png')
+    ['all', 'img']
+"""
+from __future__ import unicode_literals
+
+import re
+
+from fnmatch import translate
+
+
+GLOB_MAGIC = re.compile(r'[*?[]')
+REGEX_LITERAL_SUFFIX = re.compile(r'^((?:\\[^0-9A-Za-z]|[^.^$*+?{}\[\]\\|()])+)\$$')
+
+
+def glob_suffix(pattern):
+    """the literal ending of globs like ``*.css``, ``None`` for the others"""
+    if pattern.startswith('*') and not GLOB_MAGIC.search(pattern, 1):
+        return pattern[1:]
+
+    return None
+
+
+def regex_suffix(pattern, flags=0):
+    """the literal ending of regexes like ``\\.css$``, ``None`` for the others"""
+    found = not flags and REGEX_LITERAL_SUFFIX.match(pattern)
+    if not found:
+        return None
+
+    return re.sub(r'\\(.)', r'\1', found.group(1))
+
+
+GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+# numbered backreferences and conditionals, which refer to the group
+# numbers that shift once the regex joins an alternation
+GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?\(')
+
+
+def combinable(regex):
+    """whether a compiled regex means the same inside an alternation:
+    no references to group numbers, no named groups that could clash
+    with the ones of another regex and no global inline flags"""
+    pattern = regex.pattern
+    return not (regex.groupindex or GROUP_REFERENCE.search(pattern) or GLOBAL_FLAGS.search(pattern))
+
+
+SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+
+
+def scoped(regex):
+    """the pattern of a compiled regex wrapped in a group carrying its
+    own flags, so regexes with different flags can be alternated"""
+    letters = ''.join(letter for flag, letter in SCOPED_FLAGS if regex.flags & flag)
+    return '(?{0}:{1})'.format(letters, regex.pattern) if letters else '(?:{0})'.format(regex.pattern)
+
+
+class PatternSet(object):
+    """named regexes and :py:mod:`fnmatch` globs matched together
+
+    :param regexes: a :py:class:`dict` mapping names to regexes, which
+      are searched anywhere in the path like :py:meth:`plant.Node.find_with_regex`
+    :param flags: the :py:mod:`re` flags of the regexes
+    :param globs: a :py:class:`dict` mapping names to globs, which must
+      match the whole path like :py:meth:`plant.Node.glob`
+    """
+
+    def __init__(self, regexes=None, flags=0, globs=None):
+        self.names = []
+        # names matching any path, like the ``*`` glob
+        self.always = []
+        # ending -> names, and the distinct lengths of the endings
+        self.suffixes = {}
+        self.lengths = []
+        self.compiled = []
+        # the compiled ones that can't go into the alternation
+        self.separate = []
+
+        for name, pattern in sorted((globs or {}).items()):
+            self.add(name, glob_suffix(pattern), lambda: re.compile(r'\A' + translate(pattern)))
+
+        for name, pattern in sorted((regexes or {}).items()):
+            self.add(name, regex_suffix(pattern, flags), lambda: re.compile(pattern, flags))
+
+        self.lengths.sort(reverse=True)
+        self.combined = None
+        if self.compiled:
+            self.combined = re.compile('|'.join(scoped(regex) for name, regex in self.compiled))
+
+    def add(self, name, suffix, compile_pattern):
+        if name not in self.names:
+            self.names.append(name)
+
+        if suffix == '':
+            self.always.append(name)
+        elif suffix is None:
+            regex = compile_pattern()
+            if combinable(regex):
+                self.compiled.append((name, regex))
+            else:
+                self.separate.append((name, regex))
+        else:
+            self.suffixes.setdefault(suffix, []).append(name)
+            if len(suffix) not in self.lengths:
+                self.lengths.append(len(suffix))
+
+    def match(self, path):
+        """returns the names of the patterns matching the path
+
+        :param path: a path string
+        :returns: a sorted :py:class:`list` of names
+        """
+        found = set(self.always)
+        for length in self.lengths:
+            found.update(self.suffixes.get(path[-length:], ()))
+
+        if self.combined is not None and self.combined.search(path):
+            found.update(name for name, regex in self.compiled if regex.search(path))
+
+        found.update(name for name, regex in self.separate if regex.search(path))
+
+        return sorted(found)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""splits a tree into shards that can be crawled independently
+
+A shard is a list of work units, each one either a whole subtree or
+only the files directly inside a directory whose subdirectories went
+elsewhere. The units are found by repeatedly splitting the heaviest
+subtree, then packed into shards of similar weight. Shards are plain
+data, they can be handed to processes of a :py:class:`ShardExecutor`
+or saved and shipped to other machines.
+
+::
+
+    >>> from plant import Node
+    >>> from plant.shards import ShardExecutor
+    >>>
+    >>> shards = Node('/srv/media').shards(8)
+    >>> for path, digest in ShardExecutor(workers=8).hash(shards):
+    ...     print(path, digest)
+"""
+from __future__ import unicode_literals
+
+import heapq
+import os
+import posixpath
+
+from fnmatch import fnmatch
+
+from plant.estimate import Estimator
+from plant.hashing import DEFAULT_ALGORITHM
+from plant.index import Index, find_index
+from plant.manifest import digest_entry, process_pool
+
+
+STRATEGIES = ('fanout', 'estimate', 'index')
+
+# how many units to aim for per shard before packing them, more units
+# balance the shards better at the cost of more listings
+SPLIT_FACTOR = 4
+
+# descents taken to weigh each subtree with the ``estimate`` strategy
+DEFAULT_SAMPLES = 20
+
+# descents shared by the subdirectories of a directory being split, so
+# directories with thousands of them take a descent or so each
+SPLIT_SAMPLES = 1000
+
+
+class Shard(object):
+    """a share of a tree
+
+    :param units: a list of ``(path, recursive)``, ``recursive`` is
+      ``False`` for the directories whose subdirectories belong to
+      other units
+    :param weight: the estimated amount of files
+    """
+
+    def __init__(self, units=None, weight=0.0):
+        self.units = units or []
+        self.weight = weight
+
+    def __len__(self):
+        return len(self.units)
+
+    def add(self, path, recursive, weight):
+        self.units.append((path, recursive))
+        self.weight += weight
+
+    def split(self):
+        """returns a single-unit :py:class:`Shard` per unit"""
+        return [Shard([unit]) for unit in self.units]
+
+    def paths(self, **options):
+        """yields the paths of the files in this shard
+
+        :param ``**options``: traversal options applied within each
+          subtree, see :py:meth:`plant.Node.trip_at`
+        """
+        from plant.core import Node
+
+        for path, recursive in self.units:
+            if recursive:
+                for found in Node(path).walk(lazy=True, **options):
+                    yield found
+                continue
+
+            try:
+                entries = list(os.scandir(path))
+            except OSError:
+                continue
+
+            for entry in entries:
+                # symlinked directories aren't followed by walks either
+                if not entry.is_dir():
+                    yield entry.path
+
+    def to_dict(self):
+        return {'weight': self.weight, 'units': [[path, recursive] for path, recursive in self.units]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([(path, recursive) for path, recursive in data['units']], data['weight'])
+
+    def __repr__(self):
+        return 'Shard(units={0}, weight={1:.0f})'.format(len(self.units), self.weight)
+
+
+def index_counts(index):
+    """counts the files under every directory of an :py:class:`plant.index.Index`"""
+    counts = {}
+    for relative, size, mtime in index.entries:
+        directory = posixpath.dirname(posixpath.join(index.root, relative))
+        while True:
+            counts[directory] = counts.get(directory, 0) + 1
+            if directory == index.root or len(directory) <= len(index.root):
+                break
+            directory = posixpath.dirname(directory)
+
+    return counts
+
+
+def weigher(node, estimator, by, samples, seed):
+    """returns a function that weighs the subtree at a given path,
+    given the amount of its siblings"""
+    if by == 'fanout':
+        return lambda path, siblings=1: float(sum(len(names) for names in estimator.listing(path)[:2]))
+
+    if by == 'estimate':
+        def estimate(path, siblings=1):
+            # seeded by path, so that every machine computing the
+            # shards of the same tree gets the same ones
+            subtree = Estimator(node.new(path), '{0}:{1}'.format(seed, path), estimator.listings)
+            return subtree.estimate(max(1, min(samples, SPLIT_SAMPLES // siblings))).files
+        return estimate
+
+    path = find_index(node.path)
+    if path is None:
+        raise ValueError('there is no index at {0}'.format(node.path))
+
+    counts = index_counts(Index.load(path))
+    return lambda path, siblings=1: float(counts.get(path, 0))
+
+
+def partition(node, count, by=None, samples=DEFAULT_SAMPLES, seed=0):
+    """splits the tree under ``node`` into ``count`` shards
+
+    :param node: the top :py:class:`plant.Node`
+    :param count: the amount of shards
+    :param by: how subtrees are weighed, one of :py:data:`STRATEGIES`,
+      defaults to ``index`` when the tree has one and to ``estimate`` otherwise
+    :param samples: descents per subtree with the ``estimate`` strategy,
+      fewer when the subtree has more than :py:data:`SPLIT_SAMPLES`
+      divided by ``samples`` siblings
+    :param seed: seeds the random choices of the estimates, the same
+      seed over the same tree always gives the same shards
+    :returns: a list of ``count`` :py:class:`Shard`, heaviest first
+    """
+    if by is None:
+        by = find_index(node.path) and 'index' or 'estimate'
+    if by not in STRATEGIES:
+        raise ValueError('unknown strategy {0!r}, expected one of: {1}'.format(by, ', '.join(STRATEGIES)))
+    if count < 1:
+        raise ValueError('the amount of shards must be positive, got {0}'.format(count))
+
+    estimator = Estimator(node, seed)
+    weigh = weigher(node, estimator, by, samples, seed)
+
+    units = []
+    heap = [(-weigh(node.path), node.path)]
+    while heap and len(heap) + len(units) < count * SPLIT_FACTOR:
+        weight, path = heapq.heappop(heap)
+        dirs, files, sizes = estimator.listing(path)
+        if not dirs:
+            units.append((path, True, -weight))
+            continue
+
+        if files:
+            units.append((path, False, float(len(files))))
+        for name in dirs:
+            child = posixpath.join(path, name)
+            heapq.heappush(heap, (-weigh(child, len(dirs)), child))
+
+    units.extend((path, True, -weight) for weight, path in heap)
+
+    # the heaviest units go first, each into the lightest shard so far
+    shards = [Shard() for index in range(count)]
+    for path, recursive, weight in sorted(units, key=lambda unit: -unit[2]):
+        min(shards, key=lambda shard: shard.weight).add(path, recursive, weight)
+
+    return sorted(shards, key=lambda shard: -shard.weight)
+
+
+def walk_shard(item):
+    """the paths of ``(shard, options)``, module level so that worker
+    processes can pickle it"""
+    shard, options = item
+    return list(shard.paths(**options))
+
+
+def glob_shard(item):
+    shard, pattern = item
+    return [path for path in shard.paths() if fnmatch(path, pattern)]
+
+
+def hash_shard(item):
+    shard, algorithm = item
+    return [(path, digest_entry((path, algorithm))) for path in shard.paths()]
+
+
+class ShardExecutor(object):
+    """crawls shards with a pool of processes
+
+    Each unit of the given shards becomes a job, the results of every
+    job are yielded as soon as it finishes, so they come in no
+    particular order.
+
+    :param workers: the amount of processes, ``1`` crawls serially
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers
+
+    def map(self, function, items):
+        """yields ``function(item)`` for each item, in completion order"""
+        items = list(items)
+        if self.workers == 1 or len(items) < 2:
+            for item in items:
+                yield function(item)
+            return
+
+        from concurrent.futures import as_completed
+        with process_pool(self.workers) as executor:
+            futures = [executor.submit(function, item) for item in items]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def jobs(self, shards, argument):
+        return [(unit, argument) for shard in shards for unit in shard.split()]
+
+    def walk(self, shards, **options):
+        """yields the paths of the files in the shards
+
+        :param ``**options``: traversal options, see :py:meth:`plant.Node.trip_at`
+        """
+        for paths in self.map(walk_shard, self.jobs(shards, options)):
+            for path in paths:
+                yield path
+
+    def glob(self, shards, pattern):
+        """yields the paths matching ``pattern``, see :py:func:`fnmatch.fnmatch`"""
+        for paths in self.map(glob_shard, self.jobs(shards, pattern)):
+            for path in paths:
+                yield path
+
+    def hash(self, shards, algorithm=DEFAULT_ALGORITHM):
+        """yields ``(path, digest)`` for the files in the shards, the
+        digest is ``None`` when a file can't be read"""
+        for results in self.map(hash_shard, self.jobs(shards, algorithm)):
+            for result in results:
+                yield result
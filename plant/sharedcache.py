@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""a metadata cache shared by every process of a host
+
+The cache is a hash table in a memory-mapped file, ideally under
+``/dev/shm``, mapping paths to their stats and directories to their
+listings. Every process that opens the same file sees the entries the
+others stored, so a tree is stated once per host rather than once per
+worker process.
+
+Reads take no lock: each slot carries a sequence number that writers
+make odd while they change it, readers retry when it moved under them.
+Records are appended to an arena and never modified, when the arena is
+full the whole table is cleared. Writers serialize on a ``flock``.
+
+A ``flock`` belongs to an open file description, which forked
+processes share with their parent: a cache opened before a fork, such
+as in an app preloaded by a gunicorn master, would not exclude the
+writers of the other workers. Each cache reopens its lock file in the
+children, see :py:meth:`SharedCache.forked`.
+
+Entries are trusted for ``ttl`` seconds, then listings are revalidated
+against the modification time of their directory and stats are taken
+again.
+
+::
+
+    >>> from plant.sharedcache import SharedCache
+    >>>
+    >>> cache = SharedCache('/dev/shm/plant-assets.cache', ttl=30)
+    >>> static = cache.backend.Node('/srv/site/static')
+    >>> static.glob('*.css')
+    [Node('/srv/site/static/css/main.css')]
+"""
+from __future__ import unicode_literals
+
+import errno
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+
+from plant.backends.base import Backend
+from plant.core import LocalBackend
+
+
+MAGIC = b'PLNTCACH'
+VERSION = 1
+DEFAULT_SIZE = 64 * 1024 * 1024
+DEFAULT_TTL = 5.0
+MAX_PROBES = 16
+
+# magic, version, slot count, generation, arena write offset
+HEADER = struct.Struct('<8sIIQQ')
+HEADER_SIZE = 64
+# sequence, key hash, record offset, record length, padding, checked at
+SLOT = struct.Struct('<QQQIId')
+KEY_LENGTH = struct.Struct('<I')
+STATS = struct.Struct('<10q')
+MTIME = struct.Struct('<q')
+
+STAT_PREFIX = b's'
+LISTING_PREFIX = b'l'
+MISSING = b''
+
+
+# the caches open in this process, reopened in the forked children
+_caches = weakref.WeakSet()
+
+
+def reopen_after_fork():
+    for cache in list(_caches):
+        try:
+            cache.forked()
+        except OSError:
+            # the file of this cache is gone, the others still need reopening
+            pass
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reopen_after_fork)
+
+
+def key_hash(key):
+    # hash() is salted per process, the hash has to be the same everywhere
+    value = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+    return value | 1
+
+
+class SharedCache(object):
+    """the memory-mapped table, opened or created at ``path``
+
+    :param path: the file backing the cache, every process has to use the same
+    :param size: the size of the file in bytes, used when creating it
+    :param ttl: the seconds an entry is trusted before it is revalidated
+    :param clock: a callable returning the current time
+    """
+
+    def __init__(self, path, size=DEFAULT_SIZE, ttl=DEFAULT_TTL, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+        self.depth = 0
+        self._backend = None
+
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # the descriptor locked by writers, one per process
+        self.lock_fd = os.open(path, os.O_RDWR)
+        _caches.add(self)
+        with self.writing():
+            if os.fstat(self.fd).st_size < HEADER_SIZE:
+                os.ftruncate(self.fd, size)
+            self.size = os.fstat(self.fd).st_size
+            self.map = mmap.mmap(self.fd, self.size)
+            if self.map[:len(MAGIC)] != MAGIC:
+                self.initialize()
+
+        magic, version, self.slots, generation, used = HEADER.unpack_from(self.map, 0)
+        if version != VERSION:
+            raise ValueError('{0} is a cache of another version of plant'.format(path))
+
+        self.arena = HEADER_SIZE + self.slots * SLOT.size
+
+    def close(self):
+        _caches.discard(self)
+        self.map.close()
+        os.close(self.fd)
+        os.close(self.lock_fd)
+
+    def forked(self):
+        """called in the child of a fork: takes a new open file
+        description to ``flock``, the inherited one is shared with the
+        parent and the other children, and drops the in-process lock
+        state of the threads that did not survive the fork"""
+        inherited = self.lock_fd
+        self.lock_fd = os.open(self.path, os.O_RDWR)
+        os.close(inherited)
+        self.lock = threading.RLock()
+        self.depth = 0
+
+    def initialize(self):
+        slots = max(1024, (self.size - HEADER_SIZE) // 256)
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, slots, 0, HEADER_SIZE + slots * SLOT.size)
+        self.map[HEADER_SIZE:HEADER_SIZE + slots * SLOT.size] = b'\0' * (slots * SLOT.size)
+
+    def writing(self):
+        return Writing(self)
+
+    def generation(self):
+        return HEADER.unpack_from(self.map, 0)[3]
+
+    def positions(self, hashed):
+        start = hashed % self.slots
+        for probe in range(MAX_PROBES):
+            yield HEADER_SIZE + ((start + probe) % self.slots) * SLOT.size
+
+    def get(self, key):
+        """returns ``(value, checked_at)`` or ``None``, without locking"""
+        hashed = key_hash(key)
+        for attempt in range(3):
+            generation = self.generation()
+            if generation & 1:
+                continue
+
+            found = self.lookup(key, hashed)
+            if found is not False and self.generation() == generation:
+                return found
+
+        return None
+
+    def lookup(self, key, hashed):
+        for position in self.positions(hashed):
+            sequence, slot_hash, offset, length, _, checked = SLOT.unpack_from(self.map, position)
+            if sequence & 1:
+                return False
+            if slot_hash == 0:
+                return None
+            if slot_hash != hashed or offset + length > self.size:
+                continue
+
+            record = self.map[offset:offset + length]
+            if SLOT.unpack_from(self.map, position)[0] != sequence:
+                return False
+
+            size = KEY_LENGTH.unpack_from(record, 0)[0]
+            if record[KEY_LENGTH.size:KEY_LENGTH.size + size] == key:
+                return record[KEY_LENGTH.size + size:], checked
+
+        return None
+
+    def put(self, key, value, checked=None):
+        """stores ``value`` under ``key``, replacing any previous one"""
+        checked = self.clock() if checked is None else checked
+        record = KEY_LENGTH.pack(len(key)) + key + value
+        hashed = key_hash(key)
+        with self.writing():
+            magic, version, slots, generation, used = HEADER.unpack_from(self.map, 0)
+            if used + len(record) > self.size:
+                if self.arena + len(record) > self.size:
+                    return
+                self.clear()
+                used = self.arena
+
+            self.map[used:used + len(record)] = record
+            HEADER.pack_into(self.map, 0, MAGIC, VERSION, slots, self.generation(), used + len(record))
+            position = self.slot_for(key, hashed)
+            self.write_slot(position, hashed, used, len(record), checked)
+
+    def touch(self, key, checked=None):
+        """marks an entry as revalidated at ``checked``"""
+        checked = self.clock() if checked is None else checked
+        hashed = key_hash(key)
+        with self.writing():
+            for position in self.positions(hashed):
+                sequence, slot_hash, offset, length, _, previous = SLOT.unpack_from(self.map, position)
+                if slot_hash == 0:
+                    return
+                if slot_hash == hashed:
+                    size = KEY_LENGTH.unpack_from(self.map, offset)[0]
+                    if self.map[offset + KEY_LENGTH.size:offset + KEY_LENGTH.size + size] == key:
+                        self.write_slot(position, hashed, offset, length, checked)
+                        return
+
+    def slot_for(self, key, hashed):
+        """the position of the slot holding ``key``, or of a free one,
+        evicting the first probed slot when all of them are taken"""
+        positions = list(self.positions(hashed))
+        for position in positions:
+            sequence, slot_hash, offset, length, _, checked = SLOT.unpack_from(self.map, position)
+            if slot_hash == 0:
+                return position
+            if slot_hash == hashed:
+                size = KEY_LENGTH.unpack_from(self.map, offset)[0]
+                if self.map[offset + KEY_LENGTH.size:offset + KEY_LENGTH.size + size] == key:
+                    return position
+
+        return positions[0]
+
+    def write_slot(self, position, hashed, offset, length, checked):
+        sequence = SLOT.unpack_from(self.map, position)[0]
+        struct.pack_into('<Q', self.map, position, sequence + 1)
+        SLOT.pack_into(self.map, position, sequence + 1, hashed, offset, length, 0, checked)
+        struct.pack_into('<Q', self.map, position, sequence + 2)
+
+    def clear(self):
+        """drops every entry"""
+        with self.writing():
+            magic, version, slots, generation, used = HEADER.unpack_from(self.map, 0)
+            HEADER.pack_into(self.map, 0, MAGIC, VERSION, slots, generation + 1, used)
+            self.map[HEADER_SIZE:self.arena] = b'\0' * (self.arena - HEADER_SIZE)
+            HEADER.pack_into(self.map, 0, MAGIC, VERSION, slots, generation + 2, self.arena)
+
+    def fresh(self, checked):
+        return self.clock() - checked < self.ttl
+
+    def stat(self, path):
+        """returns the stats of a path like :py:func:`os.stat`, as a tuple
+
+        :raises: :py:exc:`OSError` when the path does not exist
+        """
+        key = STAT_PREFIX + os.fsencode(path)
+        found = self.get(key)
+        if found is not None and self.fresh(found[1]):
+            self.hits += 1
+            value = found[0]
+        else:
+            self.misses += 1
+            try:
+                value = STATS.pack(*os.stat(path)[:10])
+            except OSError:
+                value = MISSING
+            self.put(key, value)
+
+        if value == MISSING:
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+        return STATS.unpack(value)
+
+    def listdir(self, path):
+        """returns the names in a directory like :py:func:`os.listdir`,
+        revalidating the cached listing by the directory modification time"""
+        key = LISTING_PREFIX + os.fsencode(path)
+        found = self.get(key)
+        if found is not None:
+            value, checked = found
+            if self.fresh(checked):
+                self.hits += 1
+                return self.names(value)
+
+            mtime = os.stat(path).st_mtime_ns
+            if MTIME.unpack_from(value, 0)[0] == mtime:
+                self.hits += 1
+                self.touch(key)
+                return self.names(value)
+
+        self.misses += 1
+        mtime = os.stat(path).st_mtime_ns
+        names = os.listdir(path)
+        self.put(key, MTIME.pack(mtime) + b'\0'.join(os.fsencode(name) for name in names))
+        return names
+
+    def names(self, value):
+        data = value[MTIME.size:]
+        return [os.fsdecode(name) for name in data.split(b'\0')] if data else []
+
+    @property
+    def backend(self):
+        """a :py:class:`SharedCacheBackend` reading through this cache"""
+        if self._backend is None:
+            self._backend = SharedCacheBackend(self)
+
+        return self._backend
+
+
+class Writing(object):
+    """holds the in-process lock and the ``flock`` of a cache, the
+    ``flock`` is only taken by the outermost block of a thread"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __enter__(self):
+        self.cache.lock.acquire()
+        self.cache.depth += 1
+        if self.cache.depth == 1:
+            fcntl.flock(self.cache.lock_fd, fcntl.LOCK_EX)
+
+    def __exit__(self, _type, value, traceback):
+        self.cache.depth -= 1
+        if not self.cache.depth:
+            fcntl.flock(self.cache.lock_fd, fcntl.LOCK_UN)
+        self.cache.lock.release()
+
+
+class SharedCacheBackend(LocalBackend):
+    """the local filesystem with ``stat`` and ``listdir`` answered by a
+    :py:class:`SharedCache`, everything else goes to the disk.
+
+    Walks without traversal options are served by the cache too, with
+    options they go through :py:class:`plant.walker.Walker` as usual.
+    """
+
+    local = False
+    Node = Backend.Node
+    exists = Backend.exists
+    isfile = Backend.isfile
+    isdir = Backend.isdir
+    walk_stats = Backend.walk_stats
+
+    def __init__(self, cache):
+        super(SharedCacheBackend, self).__init__()
+        self.cache = cache
+
+    def stat(self, path):
+        return self.cache.stat(path or '/')
+
+    def listdir(self, path):
+        return self.cache.listdir(path or '/')
+
+    def walk(self, top, **options):
+        if options:
+            return super(SharedCacheBackend, self).walk(top, **options)
+
+        return Backend.walk(self, top)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""thin :py:mod:`ctypes` binding to the linux ``statx(2)`` syscall.
+
+``statx`` lets the caller tell the kernel which fields it actually
+needs, network filesystems can then skip the round-trips required to
+fill the others.
+"""
+from __future__ import unicode_literals
+
+import ctypes
+import ctypes.util
+import errno
+import os
+
+
+STATX_TYPE = 0x0001
+STATX_MODE = 0x0002
+STATX_NLINK = 0x0004
+STATX_UID = 0x0008
+STATX_GID = 0x0010
+STATX_ATIME = 0x0020
+STATX_MTIME = 0x0040
+STATX_CTIME = 0x0080
+STATX_INO = 0x0100
+STATX_SIZE = 0x0200
+STATX_BASIC_STATS = 0x07ff
+
+AT_FDCWD = -100
+# like os.stat: whatever the filesystem does, network ones revalidate
+AT_STATX_SYNC_AS_STAT = 0x0000
+AT_STATX_FORCE_SYNC = 0x2000
+# trust the attributes cached locally even when they may be stale
+AT_STATX_DONT_SYNC = 0x4000
+
+# maps each one of the labels in :py:data:`plant.core.STAT_LABELS`
+# to the mask bit that requests it
+FIELD_MASKS = {
+    'mode': STATX_TYPE | STATX_MODE,
+    'ino': STATX_INO,
+    'dev': 0,
+    'nlink': STATX_NLINK,
+    'uid': STATX_UID,
+    'gid': STATX_GID,
+    'size': STATX_SIZE,
+    'atime': STATX_ATIME,
+    'mtime': STATX_MTIME,
+    'ctime': STATX_CTIME,
+}
+
+
+class StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ('tv_sec', ctypes.c_int64),
+        ('tv_nsec', ctypes.c_uint32),
+        ('reserved', ctypes.c_int32),
+    ]
+
+
+class StatxResult(ctypes.Structure):
+    _fields_ = [
+        ('stx_mask', ctypes.c_uint32),
+        ('stx_blksize', ctypes.c_uint32),
+        ('stx_attributes', ctypes.c_uint64),
+        ('stx_nlink', ctypes.c_uint32),
+        ('stx_uid', ctypes.c_uint32),
+        ('stx_gid', ctypes.c_uint32),
+        ('stx_mode', ctypes.c_uint16),
+        ('spare0', ctypes.c_uint16),
+        ('stx_ino', ctypes.c_uint64),
+        ('stx_size', ctypes.c_uint64),
+        ('stx_blocks', ctypes.c_uint64),
+        ('stx_attributes_mask', ctypes.c_uint64),
+        ('stx_atime', StatxTimestamp),
+        ('stx_btime', StatxTimestamp),
+        ('stx_ctime', StatxTimestamp),
+        ('stx_mtime', StatxTimestamp),
+        ('stx_rdev_major', ctypes.c_uint32),
+        ('stx_rdev_minor', ctypes.c_uint32),
+        ('stx_dev_major', ctypes.c_uint32),
+        ('stx_dev_minor', ctypes.c_uint32),
+        ('spare2', ctypes.c_uint64 * 14),
+    ]
+
+
+def _load_libc_statx():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        function = libc.statx
+    except (OSError, AttributeError):
+        return None
+
+    function.argtypes = [
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.c_uint,
+        ctypes.POINTER(StatxResult),
+    ]
+    function.restype = ctypes.c_int
+    return function
+
+
+_statx = _load_libc_statx()
+
+
+def is_available():
+    """returns ``True`` when the running libc exposes ``statx``"""
+    return _statx is not None
+
+
+def mask_for(fields):
+    """computes the ``statx`` mask for the given field labels.
+
+    The file type and mode are always requested since
+    :py:class:`plant.Node` needs them to tell files from directories.
+
+    :param fields: an iterable of labels from :py:data:`plant.core.STAT_LABELS`
+    :returns: :py:class:`int`
+    """
+    mask = STATX_TYPE | STATX_MODE
+    for field in fields:
+        mask |= FIELD_MASKS[field]
+
+    return mask
+
+
+def statx(path, mask=STATX_BASIC_STATS, flags=AT_STATX_SYNC_AS_STAT):
+    """calls ``statx(2)`` on the given path and returns a tuple
+    ordered like :py:data:`plant.core.STAT_LABELS`
+
+    Fields that the kernel did not fill are returned as ``0``.
+
+    :param path: a path string
+    :param mask: a combination of the ``STATX_*`` constants
+    :param flags: a combination of the ``AT_*`` constants, pass
+      :py:data:`AT_STATX_DONT_SYNC` to skip the round-trips of network
+      filesystems at the cost of possibly stale results
+    :raises: :py:exc:`OSError` when the syscall fails or is unavailable
+    :returns: :py:class:`tuple`
+    """
+    if _statx is None:
+        raise OSError(errno.ENOSYS, 'statx is not available', path)
+
+    result = StatxResult()
+    if _statx(AT_FDCWD, os.fsencode(path), flags, mask, ctypes.byref(result)) != 0:
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code), path)
+
+    filled = result.stx_mask
+
+    def field(bit, value):
+        return value if filled & bit else 0
+
+    return (
+        field(STATX_TYPE, result.stx_mode),
+        field(STATX_INO, result.stx_ino),
+        os.makedev(result.stx_dev_major, result.stx_dev_minor),
+        field(STATX_NLINK, result.stx_nlink),
+        field(STATX_UID, result.stx_uid),
+        field(STATX_GID, result.stx_gid),
+        field(STATX_SIZE, result.stx_size),
+        field(STATX_ATIME, result.stx_atime.tv_sec),
+        field(STATX_MTIME, result.stx_mtime.tv_sec),
+        field(STATX_CTIME, result.stx_ctime.tv_sec),
+    )
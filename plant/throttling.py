@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""I/O throttling for background scans
+
+While a :py:class:`Throttle` is active every ``stat``, directory
+listing, ``open`` and removal performed through :py:mod:`plant.instrument` waits
+for a token of its operations bucket, and every byte read from the
+files opened by :py:meth:`plant.Node.open` or hashed by
+:py:mod:`plant.hashing` waits for the bytes bucket.
+
+::
+
+    >>> import plant
+    >>> from plant.throttling import between
+    >>>
+    >>> # full speed at night, 200 operations and 20MB per second by day
+    >>> with plant.throttle(200, 20 * 1024 * 1024, idle_priority=True, active=between(8, 20)):
+    ...     plant.Node('/srv').manifest()
+
+The buckets live in the process that created them, the worker
+processes started by :py:mod:`plant.manifest` and
+:py:mod:`plant.shards` each get an equal share of the rates, see
+:py:meth:`Throttle.split`.
+"""
+from __future__ import unicode_literals
+
+import platform
+import threading
+import time
+
+from plant import instrument
+
+
+THROTTLED_OPERATIONS = ('stat', 'listdir', 'open', 'remove')
+
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASS_IDLE = 3
+
+# machine -> (ioprio_set, ioprio_get) syscall numbers
+IOPRIO_SYSCALLS = {
+    'x86_64': (251, 252),
+    'i386': (289, 290),
+    'i686': (289, 290),
+    'aarch64': (30, 31),
+    'armv7l': (314, 315),
+    'ppc64le': (273, 274),
+}
+
+
+class TokenBucket(object):
+    """allows ``rate`` units per second with bursts of up to ``burst``
+    units, callers reserve their units up front and sleep off the debt
+
+    :param rate: the units refilled per second
+    :param burst: the size of the bucket, defaults to one second worth
+    :param clock: a monotonic clock
+    :param sleep: the function used to wait
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        """takes ``amount`` units, waiting for them when the bucket is
+        short, returns the seconds waited"""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = self.tokens < 0 and -self.tokens / self.rate or 0
+
+        if wait:
+            self.sleep(wait)
+
+        return wait
+
+
+class ThrottledFile(object):
+    """a file object whose reads wait for the bytes bucket of a
+    :py:class:`Throttle`"""
+
+    def __init__(self, fd, throttle):
+        self.fd = fd
+        self.throttle = throttle
+
+    def __getattr__(self, name):
+        return getattr(self.fd, name)
+
+    def __enter__(self):
+        self.fd.__enter__()
+        return self
+
+    def __exit__(self, _type, value, traceback):
+        return self.fd.__exit__(_type, value, traceback)
+
+    def __iter__(self):
+        for line in self.fd:
+            self.throttle.transfer(len(line))
+            yield line
+
+    def read(self, *args):
+        data = self.fd.read(*args)
+        self.throttle.transfer(len(data))
+        return data
+
+    def readline(self, *args):
+        line = self.fd.readline(*args)
+        self.throttle.transfer(len(line))
+        return line
+
+    def readlines(self, *args):
+        lines = self.fd.readlines(*args)
+        self.throttle.transfer(sum(map(len, lines)))
+        return lines
+
+    def readinto(self, buffer):
+        size = self.fd.readinto(buffer)
+        self.throttle.transfer(size or 0)
+        return size
+
+
+class Hours(object):
+    """tells whether the current hour is in the ``[start, end)``
+    range, which may wrap around midnight. A class rather than a
+    closure so that worker processes can unpickle it."""
+
+    def __init__(self, start, end, clock=time.localtime):
+        self.start = start
+        self.end = end
+        self.clock = clock
+
+    def __call__(self):
+        hour = self.clock().tm_hour
+        if self.start <= self.end:
+            return self.start <= hour < self.end
+        return hour >= self.start or hour < self.end
+
+
+def between(start, end, clock=time.localtime):
+    """returns a callable telling whether the current hour is in the
+    ``[start, end)`` range, which may wrap around midnight
+
+    :param start: the first hour, from 0 to 23
+    :param end: the hour at which it stops
+    """
+    return Hours(start, end, clock)
+
+
+def ioprio_syscalls():
+    if platform.system() != 'Linux':
+        return None
+
+    return IOPRIO_SYSCALLS.get(platform.machine())
+
+
+def get_io_priority(pid=0):
+    """returns the ``ioprio`` of a process, ``None`` when unsupported"""
+    syscalls = ioprio_syscalls()
+    if syscalls is None:
+        return None
+
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    value = libc.syscall(syscalls[1], IOPRIO_WHO_PROCESS, pid)
+    return value if value >= 0 else None
+
+
+def set_io_priority(value, pid=0):
+    """sets the ``ioprio`` of a process, by default of the calling
+    thread and of the threads and processes it starts afterwards
+
+    :returns: bool - whether the kernel accepted it
+    """
+    syscalls = ioprio_syscalls()
+    if syscalls is None:
+        return False
+
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    return libc.syscall(syscalls[0], IOPRIO_WHO_PROCESS, pid, value) == 0
+
+
+def set_idle_priority(pid=0):
+    """puts a process in the idle I/O scheduling class, it then only
+    gets disk time when no other process needs it"""
+    return set_io_priority(IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT, pid)
+
+
+class Throttle(object):
+    """limits the I/O of plant while it is active, use
+    :py:func:`throttle` to create one
+
+    :param ops_per_second: the ``stat``, listing and ``open`` calls allowed per second
+    :param bytes_per_second: the bytes allowed to be read per second
+    :param idle_priority: bool - switch to the idle I/O class while active, linux only
+    :param active: a callable telling whether to limit right now, see :py:func:`between`
+    """
+
+    def __init__(self, ops_per_second=None, bytes_per_second=None, idle_priority=False, active=None):
+        self.ops_per_second = ops_per_second
+        self.bytes_per_second = bytes_per_second
+        self.operations = ops_per_second and TokenBucket(ops_per_second) or None
+        self.bytes = bytes_per_second and TokenBucket(bytes_per_second) or None
+        self.idle_priority = idle_priority
+        self.active = active
+        self.previous_priority = None
+
+    def limiting(self):
+        return self.active is None or self.active()
+
+    def acquire(self, operation):
+        if self.operations is not None and operation in THROTTLED_OPERATIONS and self.limiting():
+            self.operations.acquire()
+
+    def transfer(self, size):
+        if self.bytes is not None and size and self.limiting():
+            self.bytes.acquire(size)
+
+    def wrap(self, fd):
+        if self.bytes is None or not hasattr(fd, 'read'):
+            return fd
+
+        return ThrottledFile(fd, self)
+
+    def split(self, parts):
+        """returns a :py:class:`Throttle` allowing a ``parts``-th of the
+        rates, for each one of ``parts`` worker processes. The idle
+        I/O class is inherited by the processes, it is not set again."""
+        share = lambda rate: rate and float(rate) / parts or None
+        return Throttle(share(self.ops_per_second), share(self.bytes_per_second), False, self.active)
+
+    def __reduce__(self):
+        # the buckets hold a lock, a copy starts with full buckets instead
+        return Throttle, (self.ops_per_second, self.bytes_per_second, False, self.active)
+
+    def start(self):
+        if self.idle_priority:
+            self.previous_priority = get_io_priority()
+            set_idle_priority()
+
+        instrument.add_limiter(self)
+        return self
+
+    def stop(self):
+        instrument.remove_limiter(self)
+        if self.idle_priority and self.previous_priority is not None:
+            set_io_priority(self.previous_priority)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, _type, value, traceback):
+        self.stop()
+
+
+def throttle(ops_per_second=None, bytes_per_second=None, idle_priority=False, active=None):
+    """returns a :py:class:`Throttle` to be used as a context manager
+
+    :param ops_per_second: the ``stat``, listing and ``open`` calls allowed per second
+    :param bytes_per_second: the bytes allowed to be read per second
+    :param idle_priority: bool - switch to the idle I/O class while active, linux only
+    :param active: a callable telling whether to limit right now, see :py:func:`between`
+    :returns: a :py:class:`Throttle`
+    """
+    return Throttle(ops_per_second, bytes_per_second, idle_priority, active)
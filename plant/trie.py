@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""an in-memory index of a tree shaped like the tree itself
+
+A :py:class:`PathTrie` keeps one node per path component, so checking
+that a path exists, listing a directory or counting the files under a
+prefix costs one dictionary lookup per component instead of a system
+call. Its :py:attr:`PathTrie.backend` serves the navigation methods of
+:py:class:`plant.Node` out of the trie.
+
+::
+
+    >>> from plant.trie import PathTrie
+    >>>
+    >>> trie = PathTrie.from_walk('/srv/site')
+    >>> trie.exists('/srv/site/static/css/main.css')
+    True
+    >>> trie.count('/srv/site/static')
+    120
+    >>> site = trie.backend.Node('/srv/site')
+    >>> site.cd('static').list()
+    [Node('/srv/site/static/css'), Node('/srv/site/static/img')]
+"""
+from __future__ import unicode_literals
+
+import io
+import os
+import posixpath
+
+from stat import S_ISDIR
+
+from plant import instrument
+
+from plant.backends.base import Backend
+from plant.backends.tree import DIR_MODE, FILE_MODE
+
+
+class TrieNode(object):
+    """a path component, ``children`` is ``None`` for files and
+    ``files`` counts the files at or under it"""
+
+    __slots__ = ('children', 'stats', 'files')
+
+    def __init__(self, is_dir, stats=None):
+        self.children = {} if is_dir else None
+        self.stats = stats
+        self.files = 0
+
+
+class PathTrie(object):
+    """the files and directories under ``root``
+
+    :param root: the absolute path of the indexed tree
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.top = TrieNode(True)
+        self._backend = None
+
+    def __len__(self):
+        return self.top.files
+
+    @classmethod
+    def from_walk(cls, top, stats=False, **options):
+        """walks a tree into a new trie
+
+        :param top: a path or a :py:class:`plant.Node`
+        :param stats: bool - whether to keep the metadata of the files,
+          which costs a ``stat`` per file
+        :param ``**options``: traversal options, see :py:meth:`plant.Node.trip_at`
+        :returns: a :py:class:`PathTrie`
+        """
+        from plant.core import Node
+
+        node = top if isinstance(top, Node) else Node(top)
+        trie = cls(node.path or '/')
+        for root, dirs, files in node.backend.walk(node.path or '/', **options):
+            for name in dirs:
+                trie.add(posixpath.join(root, name), is_dir=True)
+            for name in files:
+                path = posixpath.join(root, name)
+                if not stats:
+                    trie.add(path)
+                    continue
+                try:
+                    trie.add(path, tuple(instrument.call('stat', node.backend.stat, path)))
+                except OSError:
+                    continue
+
+        return trie
+
+    @classmethod
+    def from_index(cls, index):
+        """loads a :py:class:`plant.index.Index` into a new trie, the
+        files keep their size and modification time"""
+        trie = cls(index.root)
+        for relative, size, mtime in index.entries:
+            trie.add(posixpath.join(trie.root, relative), (FILE_MODE, 0, 0, 1, 0, 0, size, mtime, mtime, mtime))
+
+        return trie
+
+    def parts(self, path):
+        """splits an absolute path into the components under the root,
+        returns ``None`` for paths outside of it"""
+        path = os.path.abspath(path)
+        if path == self.root:
+            return []
+
+        prefix = self.root.rstrip('/') + '/'
+        if not path.startswith(prefix):
+            return None
+
+        return path[len(prefix):].split('/')
+
+    def lookup(self, path):
+        """returns the :py:class:`TrieNode` of a path or ``None``"""
+        parts = self.parts(path)
+        if parts is None:
+            return None
+
+        node = self.top
+        for part in parts:
+            if node.children is None:
+                return None
+            node = node.children.get(part)
+            if node is None:
+                return None
+
+        return node
+
+    def add(self, path, stats=None, is_dir=False):
+        """adds a path and its missing parent directories
+
+        :param path: an absolute path under the root
+        :param stats: an optional tuple ordered like :py:data:`plant.core.STAT_LABELS`,
+          its mode decides whether the path is a directory
+        :param is_dir: bool - whether the path is a directory when no stats are given
+        :raises: :py:exc:`ValueError` when the path is outside of the root or under a file
+        """
+        parts = self.parts(path)
+        if parts is None:
+            raise ValueError('{0} is not under {1}'.format(path, self.root))
+        if stats is not None:
+            is_dir = S_ISDIR(stats[0])
+
+        chain = [self.top]
+        for part in parts[:-1]:
+            node = chain[-1].children.get(part)
+            if node is None:
+                node = chain[-1].children[part] = TrieNode(True)
+            elif node.children is None:
+                raise ValueError('{0} is under the file {1}'.format(path, part))
+            chain.append(node)
+
+        if not parts:
+            self.top.stats = stats
+            return
+
+        parent, name = chain[-1], parts[-1]
+        node = parent.children.get(name)
+        if node is not None and (node.children is not None) == is_dir:
+            node.stats = stats
+            return
+        if node is not None:
+            raise ValueError('{0} already exists with another type'.format(path))
+
+        parent.children[name] = TrieNode(is_dir, stats)
+        if not is_dir:
+            parent.children[name].files = 1
+            for node in chain:
+                node.files += 1
+
+    def exists(self, path):
+        return self.lookup(path) is not None
+
+    def isdir(self, path):
+        node = self.lookup(path)
+        return node is not None and node.children is not None
+
+    def isfile(self, path):
+        node = self.lookup(path)
+        return node is not None and node.children is None
+
+    def children(self, path):
+        """the names of the entries of a directory, ``None`` when the
+        path is not a directory of the trie"""
+        node = self.lookup(path)
+        if node is None or node.children is None:
+            return None
+
+        return list(node.children)
+
+    def count(self, path):
+        """the amount of files at or under a path"""
+        node = self.lookup(path)
+        return node and node.files or 0
+
+    def walk(self, top):
+        """yields ``(root, dirs, files)`` like :py:func:`os.walk`"""
+        top = os.path.abspath(top)
+        node = self.lookup(top)
+        if node is None or node.children is None:
+            return
+
+        stack = [(top, node)]
+        while stack:
+            root, node = stack.pop()
+            dirs, files = [], []
+            for name, child in node.children.items():
+                (dirs if child.children is not None else files).append(name)
+
+            yield root, dirs, files
+            stack.extend((posixpath.join(root, name), node.children[name]) for name in reversed(dirs))
+
+    def iterate(self, top=None):
+        """yields the absolute path of every file under ``top``,
+        which defaults to the root"""
+        for root, dirs, files in self.walk(top or self.root):
+            for name in files:
+                yield posixpath.join(root, name)
+
+    @property
+    def backend(self):
+        """a :py:class:`TrieBackend` reading this trie"""
+        if self._backend is None:
+            self._backend = TrieBackend(self)
+
+        return self._backend
+
+
+class TrieBackend(Backend):
+    """answers ``stat``, ``listdir``, ``exists`` and ``walk`` out of a
+    :py:class:`PathTrie`, files are still opened from the disk.
+
+    Entries added without metadata report zeroes besides their mode.
+    """
+
+    def __init__(self, trie):
+        super(TrieBackend, self).__init__()
+        self.trie = trie
+
+    def normalize(self, path):
+        return os.path.abspath(os.path.expanduser(path))
+
+    def display(self, path):
+        return path or '/'
+
+    def stat(self, path):
+        node = self.trie.lookup(path or '/')
+        if node is None:
+            raise self.not_found(path)
+        if node.stats is not None:
+            return node.stats
+
+        mode = node.children is not None and DIR_MODE or FILE_MODE
+        return (mode, 0, 0, 1, 0, 0, 0, 0, 0, 0)
+
+    def listdir(self, path):
+        names = self.trie.children(path or '/')
+        if names is None:
+            raise self.not_found(path)
+        return names
+
+    def exists(self, path):
+        return self.trie.exists(path or '/')
+
+    def isdir(self, path):
+        return self.trie.isdir(path or '/')
+
+    def isfile(self, path):
+        if self.trie.exists(path or '/'):
+            return self.trie.isfile(path)
+        return super(TrieBackend, self).isfile(path)
+
+    def walk(self, top, **options):
+        if options:
+            return super(TrieBackend, self).walk(top, **options)
+
+        return self.trie.walk(top or '/')
+
+    def open(self, path, *args, **kw):
+        return io.open(path, *args, **kw)
@@ -0,0 +1,618 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""the configurable tree traversal behind :py:meth:`plant.Node.trip_at`
+
+:py:meth:`plant.Node.trip_at` uses plain :py:func:`os.walk` unless it
+is given traversal options, in which case it delegates to a
+:py:class:`Walker`.
+"""
+from __future__ import unicode_literals
+
+import errno
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from collections import Counter, OrderedDict, deque
+from os.path import basename, dirname, join
+
+from plant import instrument
+from plant.ignore import IGNORE_FILES, IMPLICIT_RULES, IgnoreMatcher
+
+
+DEFAULT_WORKERS = 8
+DEFAULT_OPEN_DIRS = 64
+
+OPEN_DIRECTORY = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0)
+NO_FOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+
+
+class WalkTimeout(OSError):
+    """raised, or handed to ``onerror``, when listing a directory
+    takes longer than the walker's ``timeout``"""
+
+    def __init__(self, path, timeout):
+        super(WalkTimeout, self).__init__(
+            errno.ETIMEDOUT, 'listing took longer than {0}s'.format(timeout), path)
+
+
+class WalkReport(object):
+    """an ``onerror`` handler that collects the errors of a walk so
+    that a long crawl can carry on and report what it missed
+
+    ::
+
+        >>> from plant import Node
+        >>> from plant.walker import WalkReport
+        >>>
+        >>> report = WalkReport()
+        >>> files = Node('/srv').walk(onerror=report, timeout=30)
+        >>> report.skipped
+        ['/srv/secret', '/srv/stale-nfs-mount']
+        >>> report.summary()
+        {'skipped': 2, 'timeouts': 1, 'errors': {'EACCES': 1, 'ETIMEDOUT': 1}}
+    """
+
+    def __init__(self):
+        self.errors = []
+
+    def __call__(self, error):
+        self.errors.append(error)
+
+    def __len__(self):
+        return len(self.errors)
+
+    @property
+    def skipped(self):
+        """the paths that could not be walked"""
+        return [error.filename for error in self.errors]
+
+    @property
+    def timeouts(self):
+        """the paths whose listing timed out"""
+        return [error.filename for error in self.errors if isinstance(error, WalkTimeout)]
+
+    def summary(self):
+        """returns a :py:class:`dict` with the amount of skipped paths,
+        timeouts and errors by errno name"""
+        codes = Counter(errno.errorcode.get(error.errno, str(error.errno)) for error in self.errors)
+        return {
+            'skipped': len(self.errors),
+            'timeouts': len(self.timeouts),
+            'errors': dict(codes),
+        }
+
+
+class DirectoryCache(object):
+    """a bounded LRU of open directory file descriptors
+
+    Directories are opened relative to the descriptor of their parent
+    when it is still cached, so the kernel only resolves one path
+    component instead of the whole path. When the parent was evicted
+    the path is opened one component at a time from the nearest
+    cached ancestor, only ``top`` itself is resolved as a whole.
+
+    :param size: the maximum amount of descriptors kept open
+    :param followlinks: bool - when ``False`` symlinked directories are
+      refused with ``ELOOP``, which protects a walk from a directory
+      being swapped by a symlink after it was listed
+    :param top: the top directory of the walk, the one path resolved
+      as a whole, ``None`` opens every path component by component from ``/``
+    """
+
+    def __init__(self, size=DEFAULT_OPEN_DIRS, followlinks=False, top=None):
+        self.size = size
+        self.top = top
+        self.flags = OPEN_DIRECTORY | (not followlinks and NO_FOLLOW or 0)
+        self.descriptors = OrderedDict()
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def open(self, path):
+        """opens a directory, the caller owns the returned descriptor
+        until it hands it to :py:meth:`keep`
+
+        The lock only guards the lookup of the nearest cached ancestor,
+        the directories are opened without it so a stalled open (NFS,
+        FUSE) does not hold back the other listings nor :py:meth:`close`.
+        """
+        with self.lock:
+            ancestor, names = path, []
+            while ancestor not in self.descriptors and ancestor != self.top and dirname(ancestor) != ancestor:
+                names.append(basename(ancestor))
+                ancestor = dirname(ancestor)
+
+            fd = None
+            if ancestor in self.descriptors:
+                self.descriptors.move_to_end(ancestor)
+                # a copy, the cached one may be evicted while we use it
+                fd = os.dup(self.descriptors[ancestor])
+
+        if fd is None:
+            # the top of the walk, resolved like os.walk resolves it
+            fd = os.open(ancestor, OPEN_DIRECTORY)
+
+        try:
+            for name in reversed(names):
+                child = os.open(name, self.flags, dir_fd=fd)
+                os.close(fd)
+                fd = child
+        except BaseException:
+            os.close(fd)
+            raise
+
+        return fd
+
+    def keep(self, path, fd):
+        """caches the descriptor of ``path``, closing the least
+        recently used ones beyond ``size``"""
+        with self.lock:
+            if self.closed:
+                # a listing that outlived its walk, e.g.: after a timeout
+                os.close(fd)
+                return
+
+            previous = self.descriptors.pop(path, None)
+            if previous is not None:
+                os.close(previous)
+
+            self.descriptors[path] = fd
+            while len(self.descriptors) > self.size:
+                os.close(self.descriptors.popitem(last=False)[1])
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            while self.descriptors:
+                os.close(self.descriptors.popitem()[1])
+
+
+class Listing(object):
+    """a directory listing handed to a :py:class:`ListingPool`"""
+
+    def __init__(self, path):
+        self.path = path
+        self.started = None
+        self.abandoned = False
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class ListingPool(object):
+    """threads listing directories ahead of the walk
+
+    The ``timeout`` of a listing counts from the moment a thread starts
+    it, not from the moment the walk asks for it. A listing that runs
+    longer is abandoned: its thread can't be interrupted, so a new
+    thread takes its place and the directories queued behind a stalled
+    one still get listed.
+
+    :param scan: the function listing a path
+    :param workers: the amount of threads
+    :param timeout: seconds a listing may take, ``None`` waits forever
+    """
+
+    # how often a listing still in the queue checks for stalled threads
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, scan, workers, timeout=None):
+        self.scan = scan
+        self.timeout = timeout
+        self.queue = deque()
+        self.running = set()
+        self.condition = threading.Condition()
+        self.closed = False
+        for index in range(workers):
+            self.spawn()
+
+    def spawn(self):
+        thread = threading.Thread(target=self.work)
+        thread.daemon = True
+        thread.start()
+
+    def submit(self, path):
+        listing = Listing(path)
+        with self.condition:
+            self.queue.append(listing)
+            self.condition.notify()
+        return listing
+
+    def work(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                listing = self.queue.popleft()
+                listing.started = time.time()
+                self.running.add(listing)
+
+            try:
+                listing.result = self.scan(listing.path)
+            except BaseException as error:
+                listing.error = error
+
+            with self.condition:
+                self.running.discard(listing)
+                listing.done.set()
+                if listing.abandoned:
+                    # another thread took this one's place
+                    return
+
+    def reap(self):
+        """abandons the listings running for longer than ``timeout``"""
+        now = time.time()
+        with self.condition:
+            for listing in self.running:
+                if not listing.abandoned and now - listing.started >= self.timeout:
+                    listing.abandoned = True
+                    self.spawn()
+
+    def result(self, listing):
+        """waits for a listing
+
+        :raises: :py:class:`WalkTimeout` when it took longer than ``timeout``
+        :returns: whatever ``scan`` returned
+        """
+        while self.timeout is not None and not listing.done.is_set():
+            self.reap()
+            if listing.abandoned:
+                raise WalkTimeout(listing.path, self.timeout)
+
+            if listing.started is None:
+                listing.done.wait(min(self.timeout, self.POLL_INTERVAL))
+            else:
+                listing.done.wait(max(0, listing.started + self.timeout - time.time()))
+
+        listing.done.wait()
+        if listing.error is not None:
+            raise listing.error
+
+        return listing.result
+
+    def close(self):
+        """stops the idle threads, the ones stuck in a stalled listing
+        are left behind"""
+        with self.condition:
+            self.closed = True
+            self.queue.clear()
+            self.condition.notify_all()
+
+
+ORDERS = ('dfs', 'bfs', 'newest')
+
+
+def newest_first(entry, depth):
+    # the stats were fetched along with the listing, see Walker.prefetch
+    return -entry.stat().st_mtime
+
+
+class Frontier(object):
+    """the directories waiting to be listed, popped depth-first,
+    breadth-first or by the lowest key"""
+
+    def __init__(self, order='dfs', top=None):
+        self.order = order
+        self.key = order == 'newest' and newest_first or (callable(order) and order or None)
+        self.items = deque() if self.key is None else []
+        self.counter = itertools.count()
+        # the top directory has no entry to compute a key from
+        self.top = top
+
+    def __len__(self):
+        return len(self.items) + (self.top is not None)
+
+    def extend(self, pairs):
+        if self.key is not None:
+            for entry, item in pairs:
+                depth = item[-1]
+                heapq.heappush(self.items, (self.key(entry, depth), next(self.counter), item))
+        elif self.order == 'bfs':
+            self.items.extend(item for entry, item in pairs)
+        else:
+            # reversed so the first child is the next one popped
+            self.items.extend(reversed([item for entry, item in pairs]))
+
+    def pop(self):
+        if self.top is not None:
+            top, self.top = self.top, None
+            return top
+        if self.key is not None:
+            return heapq.heappop(self.items)[-1]
+        if self.order == 'bfs':
+            return self.items.popleft()
+        return self.items.pop()
+
+
+class Walker(object):
+    """walks a tree top-down yielding ``(root, dirs, files)`` tuples
+    just like :py:func:`os.walk`, removing names from ``dirs`` prunes
+    them from the walk.
+
+    ::
+
+        >>> from plant.walker import Walker
+        >>>
+        >>> for root, dirs, files in Walker(ignore_files=True).walk('/srv/app'):
+        ...     print(root)
+
+    :param ignore_files: ``True`` to honor ``.gitignore`` and
+      ``.plantignore`` files found along the tree, or a list of
+      ignore file names. The ``.git`` folder is always skipped when
+      this is set.
+    :param ignore: extra gitignore-style patterns applied from the top
+    :param followlinks: bool - descend into symlinked directories, each
+      directory is visited once per ``(st_dev, st_ino)`` so symlink
+      cycles are broken
+    :param one_file_system: bool - do not descend into directories
+      living in a different device than ``top``, i.e.: mount points
+    :param onerror: what to do with the :py:exc:`OSError` of a
+      directory that cannot be listed: ``'skip'`` (the default, like
+      :py:func:`os.walk`), ``'raise'`` or a callable such as a
+      :py:class:`WalkReport`
+    :param timeout: seconds each directory listing may take once a
+      thread starts it, the listings are then read ahead by a
+      :py:class:`ListingPool` and a :py:class:`WalkTimeout` goes to
+      ``onerror`` when one stalls
+    :param workers: the amount of threads listing directories ahead
+      of the walk, defaults to :py:data:`DEFAULT_WORKERS` when a
+      ``timeout`` is given
+    :param max_depth: how many levels to list, ``1`` lists only ``top``
+    :param use_dir_fd: bool - list and stat relative to open directory
+      descriptors, see :py:class:`DirectoryCache`
+    :param max_open_dirs: the maximum amount of directory descriptors
+      kept open when ``use_dir_fd`` is set
+    :param order: the order in which directories are listed: ``'dfs'``
+      (the default, like :py:func:`os.walk`), ``'bfs'`` level by level,
+      ``'newest'`` most recently modified first or a callable
+      ``key(entry, depth)`` taking the :py:class:`os.DirEntry` of a
+      directory, the lowest keys are listed first. Early-exit searches
+      such as :py:meth:`plant.Node.find` list fewer directories when
+      the order matches where the answer is likely to be.
+    """
+
+    def __init__(self, ignore_files=None, ignore=None, followlinks=False, one_file_system=False,
+                 onerror='skip', timeout=None, workers=None, max_depth=None,
+                 use_dir_fd=False, max_open_dirs=DEFAULT_OPEN_DIRS, order='dfs'):
+        if not callable(order) and order not in ORDERS:
+            raise ValueError('order must be a callable or one of {0}, got {1!r}'.format(', '.join(ORDERS), order))
+
+        self.order = order
+        self.max_depth = max_depth
+        self.use_dir_fd = use_dir_fd
+        self.max_open_dirs = max_open_dirs
+        self.directories = None
+        self.stat_files = False
+        self.followlinks = followlinks
+        self.one_file_system = one_file_system
+        self.onerror = onerror
+        self.timeout = timeout
+        self.workers = workers or (timeout is not None and DEFAULT_WORKERS or None)
+        if ignore_files is True:
+            ignore_files = IGNORE_FILES
+
+        self.ignore_files = tuple(ignore_files or ())
+        self.ignore = list(ignore or ())
+        if self.ignore_files:
+            self.ignore.extend(IMPLICIT_RULES)
+
+    def error(self, error):
+        """applies the ``onerror`` policy to the given :py:exc:`OSError`"""
+        if self.onerror == 'raise':
+            raise error
+        elif callable(self.onerror):
+            self.onerror(error)
+
+    def matcher_for(self, root, names, parent):
+        if not self.ignore_files:
+            return parent
+
+        return IgnoreMatcher.from_directory(root, names, self.ignore_files, parent)
+
+    def scan(self, root):
+        """lists a directory returning the names of its
+        subdirectories, the names of its files and a dict mapping
+        every name to its :py:class:`os.DirEntry`"""
+        fd = None
+        if self.directories is not None:
+            fd = self.directories.open(root)
+
+        dirs, files, entries = [], [], {}
+        try:
+            for entry in os.scandir(root if fd is None else fd):
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                (dirs if is_dir else files).append(entry.name)
+                entries[entry.name] = entry
+
+            self.prefetch(root, dirs, files, entries, fd is not None)
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            raise
+
+        if fd is not None:
+            self.directories.keep(root, fd)
+
+        return dirs, files, entries
+
+    def prefetch(self, root, dirs, files, entries, relative):
+        """stats the entries that will need it right after listing
+        them: the directories when entering or ordering them depends on
+        their stats and, when ``relative`` to a descriptor, the files
+        while that descriptor is surely still open. :py:class:`os.DirEntry`
+        caches the result. Entries that can't be stated go to ``onerror``
+        and are dropped."""
+        names = []
+        if self.followlinks or self.one_file_system or self.order == 'newest':
+            names.extend((name, True) for name in dirs)
+        if relative and self.stat_files:
+            # accounted once per file by the callers of walk_stats
+            names.extend((name, False) for name in files)
+
+        for name, account in names:
+            try:
+                if account:
+                    self.stat(entries[name])
+                else:
+                    entries[name].stat()
+            except OSError as error:
+                # entries listed from a descriptor only know their name
+                error.filename = join(root, name)
+                self.error(error)
+                del entries[name]
+
+    def stat(self, entry):
+        """stats an entry through :py:func:`plant.instrument.call`"""
+        return instrument.call('stat', entry.stat)
+
+    def descend(self, entry, device, visited):
+        """decides whether the walk should enter the given directory entry
+
+        :param entry: the :py:class:`os.DirEntry` of a directory
+        :param device: the ``st_dev`` of the top directory
+        :param visited: the set of ``(st_dev, st_ino)`` already entered
+        :returns: :py:class:`bool`
+        """
+        if not self.followlinks and entry.is_symlink():
+            return False
+
+        if not self.followlinks and not self.one_file_system:
+            return True
+
+        try:
+            # already fetched and accounted by prefetch()
+            stats = entry.stat()
+        except OSError as error:
+            self.error(error)
+            return False
+
+        if self.one_file_system and stats.st_dev != device:
+            return False
+
+        if self.followlinks:
+            key = (stats.st_dev, stats.st_ino)
+            if key in visited:
+                return False
+            visited.add(key)
+
+        return True
+
+    def walk(self, top):
+        """iterates over the tree rooted at ``top``
+
+        :param top: the absolute path of the top directory
+        :returns: an iterator of ``(root, dirs, files)`` tuples
+        """
+        for root, dirs, files, entries in self.iterate(top):
+            yield root, dirs, files
+
+    def walk_stats(self, top):
+        """iterates over the files of the tree rooted at ``top`` along
+        with their stats, which come from ``fstatat`` relative to the
+        open directory when ``use_dir_fd`` is set
+
+        :param top: the absolute path of the top directory
+        :returns: an iterator of ``(path, os.stat_result)`` tuples
+        """
+        self.stat_files = True
+        for root, dirs, files, entries in self.iterate(top):
+            for name in files:
+                entry = entries.get(name)
+                if entry is None:
+                    continue
+                try:
+                    yield join(root, name), entry.stat()
+                except OSError as error:
+                    self.error(error)
+
+    def iterate(self, top):
+        """the walk itself, also yielding the :py:class:`os.DirEntry`
+        of each name"""
+        top = top.rstrip('/') or '/'
+        matcher = self.ignore and IgnoreMatcher(top, self.ignore) or None
+
+        device, visited = None, set()
+        if self.followlinks or self.one_file_system:
+            try:
+                stats = os.stat(top)
+            except OSError as error:
+                self.error(error)
+                return
+            device = stats.st_dev
+            visited.add((stats.st_dev, stats.st_ino))
+
+        if self.use_dir_fd:
+            self.directories = DirectoryCache(self.max_open_dirs, self.followlinks, top)
+
+        pool = self.workers and ListingPool(self.scan, self.workers, self.timeout) or None
+
+        def submit(path):
+            return pool and pool.submit(path) or None
+
+        frontier = Frontier(self.order, (top, matcher, submit(top), 1))
+        try:
+            while frontier:
+                root, matcher, listing, depth = frontier.pop()
+                try:
+                    if listing is None:
+                        dirs, files, entries = self.scan(root)
+                    else:
+                        dirs, files, entries = pool.result(listing)
+                except OSError as error:
+                    self.error(error)
+                    continue
+
+                matcher = self.matcher_for(root, files, matcher)
+                if matcher is not None:
+                    dirs = [name for name in dirs if not matcher.ignores(join(root, name), True)]
+                    files = [name for name in files if not matcher.ignores(join(root, name), False)]
+
+                yield root, dirs, files, entries
+
+                if self.max_depth is not None and depth >= self.max_depth:
+                    continue
+
+                children = [
+                    name for name in dirs
+                    if name in entries and self.descend(entries[name], device, visited)
+                ]
+                # submitted in walk order so the pool lists them ahead of time
+                listings = [submit(join(root, name)) for name in children]
+                frontier.extend(
+                    (entries[name], (join(root, name), matcher, listing, depth + 1))
+                    for name, listing in zip(children, listings)
+                )
+        finally:
+            if pool is not None:
+                pool.close()
+
+            if self.directories is not None:
+                self.directories.close()
+                self.directories = None
+
+
+def walk(top, **options):
+    """shortcut for ``Walker(**options).walk(top)``"""
+    return Walker(**options).walk(top)
@@ -61,5 +61,13 @@ setup(name='plant',
       author='Gabriel Falcao',
       author_email='gabriel@nacaolivre.org',
       url='http://github.com/gabrielfalcao/plant',
-      packages=find_packages(exclude=['*tests*']),
+      packages=find_packages(exclude=['*tests*', 'benchmarks']),
+      python_requires='>=3.8',
+      classifiers=[
+          'Programming Language :: Python :: 3',
+          'Programming Language :: Python :: 3 :: Only',
+      ],
+      entry_points={
+          'console_scripts': ['plant = plant.cli:main'],
+      },
 )
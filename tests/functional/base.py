@@ -17,10 +17,46 @@
 
 from __future__ import unicode_literals
 import os
+import shutil
+import tempfile
 from os.path import dirname, abspath, join
 
 import plant
 
 LOCAL_FILE = lambda *path: join(abspath(dirname(__file__)), *path)
-CWD_FILE = lambda *path: join(abspath(os.getcwdu()), *path)
+CWD_FILE = lambda *path: join(abspath(os.getcwd()), *path)
 BUILTIN_FILE = lambda *path: join(abspath(dirname(plant.__file__)), *path)
+
+
+def make_tree(root, files):
+    """writes ``files``, a dict mapping relative paths to their contents,
+    under ``root``. Paths ending with ``/`` are created as empty folders."""
+    for path, content in files.items():
+        path = os.path.join(root, path)
+        if path.endswith('/'):
+            os.makedirs(path)
+            continue
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as fd:
+            fd.write(content)
+
+
+def with_sandbox(files=None, prefix='plant-'):
+    """runs the decorated test with the path of a temporary folder
+    holding ``files``, removed afterwards unless the test removed it.
+    Stacked decorators pass one folder each, in order."""
+    def decorator(test):
+        def wrapper(*roots):
+            root = tempfile.mkdtemp(prefix=prefix)
+            try:
+                make_tree(root, files or {})
+                return test(*(roots + (root,)))
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+
+        wrapper.__doc__ = test.__doc__
+        wrapper.__name__ = test.__name__
+        return wrapper
+
+    return decorator
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import io
+import os
+import tarfile
+import zipfile
+
+from mock import patch
+
+from plant.backends import archive
+from plant.backends.archive import TarBackend, ZipBackend, open_archive
+
+from .base import with_sandbox
+
+
+FILES = {
+    'index.md': '# hello',
+    'static/css/main.css': 'body {}',
+    'static/img/logo.png': 'PNG',
+    'docs/intro.md': 'intro',
+}
+
+
+def make_archives(root):
+    """writes a zip and a tar.gz of :py:data:`FILES` into ``root``
+    returning their paths"""
+    zip_path = os.path.join(root, 'bundle.zip')
+    tar_path = os.path.join(root, 'bundle.tar.gz')
+
+    with zipfile.ZipFile(zip_path, 'w') as bundle:
+        for name, content in sorted(FILES.items()):
+            bundle.writestr(name, content)
+
+    with tarfile.open(tar_path, 'w:gz') as bundle:
+        for name, content in sorted(FILES.items()):
+            data = content.encode('utf-8')
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 1500000000
+            bundle.addfile(info, io.BytesIO(data))
+
+    return zip_path, tar_path
+
+
+def each_archive(test):
+    def run(root):
+        for path in make_archives(root):
+            test(open_archive(path, cache=False))
+
+    run.__doc__ = test.__doc__
+    run.__name__ = test.__name__
+    return with_sandbox(prefix='plant-archive-')(run)
+
+
+@with_sandbox(prefix='plant-archive-')
+def test_open_archive_picks_the_backend(root):
+    ("open_archive() should return a backend matching the archive type and cache it")
+
+    zip_path, tar_path = make_archives(root)
+    open_archive(zip_path).should.be.a(ZipBackend)
+    open_archive(tar_path).should.be.a(TarBackend)
+    open_archive(zip_path).should.be(open_archive(zip_path))
+    open_archive.when.called_with(os.path.join(os.path.dirname(__file__), 'test_archive.py')).should.throw(ValueError)
+
+
+@each_archive
+def test_archive_walk_and_glob(backend):
+    ("archive nodes should support walk, glob and find_with_regex")
+
+    root = backend.root
+    sorted(root.walk()).should.equal([
+        '/docs/intro.md',
+        '/index.md',
+        '/static/css/main.css',
+        '/static/img/logo.png',
+    ])
+    [n.path for n in root.glob('*.css')].should.equal(['/static/css/main.css'])
+    sorted(n.path for n in root.find_with_regex(r'[.]md$')).should.equal(['/docs/intro.md', '/index.md'])
+
+
+@each_archive
+def test_archive_list_and_stat(backend):
+    ("archive nodes should list directories and carry the member metadata")
+
+    static = backend.root.cd('static')
+    static.is_dir.should.be.true
+    sorted(n.basename for n in static.list()).should.equal(['css', 'img'])
+
+    css = static.goto('css/main.css')
+    css.exists.should.be.true
+    css.is_file.should.be.true
+    css.metadata.size.should.equal(7)
+    repr(css).should.equal("Node('/static/css/main.css')")
+
+    backend.root.contains('docs/intro.md').should.be.true
+    backend.root.contains('docs/missing.md').should.be.false
+
+
+@each_archive
+def test_archive_open_streams_members(backend):
+    ("archive nodes should open members without extracting the archive")
+
+    backend.root.open('static/css/main.css').read().should.equal('body {}')
+    backend.root.open('index.md', 'rb').read().should.equal(b'# hello')
+    backend.root.open.when.called_with('index.md', 'w').should.throw(OSError)
+    backend.root.open.when.called_with('nope.md').should.throw(OSError)
+
+
+@with_sandbox(prefix='plant-archive-')
+def test_open_archive_after_a_with_block(root):
+    ("open_archive() should open an archive again once a with block closed it")
+
+    for path in make_archives(root):
+        with open_archive(path) as backend:
+            backend.root.open('index.md').read().should.equal('# hello')
+
+        open_archive(path).shouldnt.be(backend)
+        open_archive(path).root.open('index.md').read().should.equal('# hello')
+
+
+@with_sandbox(prefix='plant-archive-')
+def test_open_archive_cache_is_bounded(root):
+    ("open_archive() should keep the most recently used archives and drop stale ones")
+
+    zip_path, tar_path = make_archives(root)
+    try:
+        with patch('plant.backends.archive.ARCHIVES_SIZE', 1):
+            archive._archives.clear()
+            open_archive(zip_path)
+            tar = open_archive(tar_path)
+            list(archive._archives.values()).should.equal([tar])
+
+            stats = os.stat(tar_path)
+            os.utime(tar_path, (stats.st_atime, stats.st_mtime + 10))
+            fresh = open_archive(tar_path)
+            fresh.shouldnt.be(tar)
+            list(archive._archives.values()).should.equal([fresh])
+    finally:
+        archive._archives.clear()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import threading
+
+from mock import patch
+
+from plant import Node
+from plant.cleanup import Remover
+
+from .base import with_sandbox
+
+
+SANDBOX = dict(
+    [('keep/{0}.txt'.format(i), 'k') for i in range(3)] +
+    [('cache/{0}/{1}.tmp'.format(i, j), 't') for i in range(4) for j in range(5)] +
+    [('empty/nested/', None)]
+)
+
+
+@with_sandbox(SANDBOX, prefix='plant-cleanup-')
+def test_remove_tree(root):
+    ("Node#remove_tree() should remove everything, including the node itself")
+
+    report = Node(root).remove_tree(workers=4)
+    os.path.exists(root).should.be.false
+    report.files.should.equal(23)
+    report.dirs.should.equal(9)
+    report.errors.should.equal([])
+
+
+@with_sandbox(SANDBOX, prefix='plant-cleanup-')
+def test_remove_tree_dry_run(root):
+    ("Node#remove_tree(dry_run=True) should report without removing anything")
+
+    report = Node(root).remove_tree(dry_run=True)
+    report.files.should.equal(23)
+    report.paths.should.contain(root)
+    len(Node(root).walk()).should.equal(23)
+
+
+@with_sandbox(SANDBOX, prefix='plant-cleanup-')
+def test_prune_with_predicate(root):
+    ("Node#prune(predicate, remove_empty_dirs=True) should remove matching files and the folders left empty")
+
+    report = Node(root).prune(lambda node: node.path.endswith('.tmp'), remove_empty_dirs=True, workers=2)
+    report.files.should.equal(20)
+    sorted(Node(root).relative(p) for p in Node(root).walk()).should.equal([
+        'keep/0.txt', 'keep/1.txt', 'keep/2.txt',
+    ])
+    os.path.exists(os.path.join(root, 'cache')).should.be.false
+    os.path.exists(os.path.join(root, 'empty')).should.be.false
+
+
+@with_sandbox(SANDBOX, prefix='plant-cleanup-')
+def test_remove_empty_dirs(root):
+    ("Node#remove_empty_dirs() should only remove the folders without files")
+
+    report = Node(root).remove_empty_dirs()
+    report.files.should.equal(0)
+    report.dirs.should.equal(2)
+    os.path.exists(os.path.join(root, 'empty')).should.be.false
+    os.path.exists(root).should.be.true
+    len(Node(root).walk()).should.equal(23)
+
+
+@with_sandbox(prefix='plant-cleanup-')
+def test_remove_tree_deeper_than_the_recursion_limit(root):
+    ("Node#remove_tree() should remove trees deeper than the recursion limit")
+
+    fd = os.open(root, os.O_RDONLY)
+    for level in range(sys.getrecursionlimit() + 100):
+        os.mkdir('d', dir_fd=fd)
+        child = os.open('d', os.O_RDONLY, dir_fd=fd)
+        os.close(fd)
+        fd = child
+    os.close(fd)
+
+    report = Node(root).remove_tree(workers=2)
+    report.errors.should.equal([])
+    os.path.exists(root).should.be.false
+
+
+@with_sandbox(dict(('big/s{0}/f.txt'.format(i), '') for i in range(2)), prefix='plant-cleanup-')
+def test_remove_tree_clears_nested_directories_in_parallel(root):
+    ("Node#remove_tree() should hand the subdirectories of every level to the pool")
+
+    barrier = threading.Barrier(2, timeout=5)
+    clear = Remover.clear
+
+    def meeting_clear(remover, directory, report):
+        if os.path.basename(directory.path).startswith('s'):
+            # only returns once both subdirectories are being cleared
+            barrier.wait()
+        return clear(remover, directory, report)
+
+    with patch.object(Remover, 'clear', meeting_clear):
+        report = Node(root).remove_tree(workers=4)
+
+    report.errors.should.equal([])
+    report.files.should.equal(2)
+    os.path.exists(root).should.be.false
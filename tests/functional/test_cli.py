@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import io
+import os
+
+from mock import patch
+
+from plant.cli import main
+from plant.index import INDEX_FILENAME, Index
+
+from .base import with_sandbox
+
+
+def run(*argv):
+    with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+        main(list(argv)).should.equal(0)
+        return stdout.getvalue()
+
+
+SANDBOX = {
+    'a/x.py': 'same',
+    'a/b/y.py': 'same',
+    'z.txt': 'different',
+}
+
+
+@with_sandbox(SANDBOX, prefix='plant-cli-')
+def test_find_prints_nul_separated_paths(root):
+    ("plant find ROOT PATTERN -0 should print the matching paths separated by NUL")
+
+    out = run('find', root, '[.]py$', '-0', '--jobs', '2')
+    sorted(out.split('\0')).should.equal([
+        '',
+        os.path.join(root, 'a', 'b', 'y.py'),
+        os.path.join(root, 'a', 'x.py'),
+    ])
+
+
+@with_sandbox(SANDBOX, prefix='plant-cli-')
+def test_glob_with_max_depth(root):
+    ("plant glob ROOT PATTERN --max-depth N should not go deeper than N levels")
+
+    run('glob', root, '*.py', '--max-depth', '2').should.equal(os.path.join(root, 'a', 'x.py') + '\n')
+
+
+@with_sandbox(SANDBOX, prefix='plant-cli-')
+def test_du_totals(root):
+    ("plant du ROOT should print the size of each folder")
+
+    run('du', root, '--max-depth', '0').should.equal('17\t{0}\n'.format(root))
+
+
+@with_sandbox(SANDBOX, prefix='plant-cli-')
+def test_dupes_groups_identical_files(root):
+    ("plant dupes ROOT should print groups of files with the same contents")
+
+    run('dupes', root).should.equal('{0}\n{1}\n\n'.format(
+        os.path.join(root, 'a', 'b', 'y.py'),
+        os.path.join(root, 'a', 'x.py'),
+    ))
+
+
+@with_sandbox(SANDBOX, prefix='plant-cli-')
+def test_index_is_used_by_find(root):
+    ("plant index ROOT should save an index that plant find reads instead of walking")
+
+    with patch('sys.stderr', new_callable=io.StringIO):
+        run('index', root)
+
+    index = Index.load(os.path.join(root, INDEX_FILENAME))
+    sorted(index.paths()).should.equal(sorted([
+        os.path.join(root, 'a', 'b', 'y.py'),
+        os.path.join(root, 'a', 'x.py'),
+        os.path.join(root, 'z.txt'),
+    ]))
+
+    os.remove(os.path.join(root, 'z.txt'))
+    run('find', root, 'txt$').should.equal(os.path.join(root, 'z.txt') + '\n')
+    run('find', root, 'txt$', '--no-index').should.equal('')
+
+
+@with_sandbox(SANDBOX, prefix='plant-cli-')
+def test_index_with_jobs(root):
+    ("plant index ROOT --jobs 2 should stat in parallel and plant find --jobs 2 should still read the index")
+
+    with patch('sys.stderr', new_callable=io.StringIO):
+        run('index', root, '--jobs', '2')
+
+    os.remove(os.path.join(root, 'z.txt'))
+    run('find', root, 'txt$', '--jobs', '2').should.equal(os.path.join(root, 'z.txt') + '\n')
+    run('find', root, 'txt$', '--jobs', '2', '--no-index').should.equal('')
+
+
+@with_sandbox(SANDBOX, prefix='plant-cli-')
+def test_manifest_and_verify(root):
+    ("plant manifest ROOT and plant verify ROOT --deep should catch changed files")
+
+    with patch('sys.stderr', new_callable=io.StringIO):
+        run('manifest', root, '--jobs', '2')
+        run('verify', root, '--jobs', '2').should.equal('')
+
+        with open(os.path.join(root, 'z.txt'), 'r+') as fd:
+            fd.write('D')
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            main(['verify', root, '--deep', '--jobs', '1']).should.equal(1)
+
+    stdout.getvalue().should.equal('changed\tz.txt\n')
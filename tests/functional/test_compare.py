@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import errno
+import os
+
+from mock import patch
+
+from plant import Node
+from plant.backends.memory import MemoryBackend
+
+from .base import with_sandbox
+
+
+LEFT = {
+    'index.html': '<html>',
+    'static/main.css': 'body {}',
+    'static/app.js': 'var a = 1;',
+    'only/left.txt': 'left',
+}
+
+RIGHT = {
+    'index.html': '<html>',
+    'static/main.css': 'body {};',
+    'static/app.js': 'var a = 2;',
+    'old/page.html': 'old',
+}
+
+
+@with_sandbox(LEFT, prefix='plant-left-')
+@with_sandbox(RIGHT, prefix='plant-right-')
+def test_compare_by_size_and_content(left, right):
+    ("Node#compare() should short-circuit on sizes and read contents only in content mode")
+
+    result = Node(left).compare(Node(right), mode='size')
+    result.only_left.should.equal({'only/left.txt'})
+    result.only_right.should.equal({'old/page.html'})
+    result.different.should.equal({'static/main.css'})
+    result.same.should.equal({'index.html', 'static/app.js'})
+    result.identical.should.be.false
+
+    result = Node(left).compare(Node(right), mode='content', workers=2)
+    result.different.should.equal({'static/main.css', 'static/app.js'})
+    result.same.should.equal({'index.html'})
+
+
+@with_sandbox(LEFT, prefix='plant-left-')
+@with_sandbox(RIGHT, prefix='plant-right-')
+def test_compare_by_stat_and_lazily(left, right):
+    ("Node#compare() should compare modification times in stat mode and stream when lazy")
+
+    os.utime(os.path.join(left, 'index.html'), (1500000000, 1500000000))
+    os.utime(os.path.join(right, 'index.html'), (1500000000, 1500000000))
+
+    results = Node(left).compare(Node(right), lazy=True)
+    sorted(results).should.contain(('same', 'index.html'))
+    Node(left).compare.when.called_with(Node(right), mode='hash').should.throw(ValueError)
+    Node(left).compare(Node(left), mode='content').identical.should.be.true
+
+
+@with_sandbox(LEFT, prefix='plant-left-')
+@with_sandbox(RIGHT, prefix='plant-right-')
+def test_compare_across_backends(left, right):
+    ("Node#compare() should compare a tree on disk with one in another backend")
+
+    memory = MemoryBackend.from_dict({
+        'index.html': '<html>',
+        'static/main.css': 'body {}',
+        'static/app.js': 'var a = 1;',
+    })
+    result = Node(left).compare(memory.root, mode='content')
+    result.only_left.should.equal({'only/left.txt'})
+    result.different.should.equal(set())
+    result.same.should.equal({'index.html', 'static/main.css', 'static/app.js'})
+
+
+@with_sandbox(LEFT, prefix='plant-left-')
+@with_sandbox(RIGHT, prefix='plant-right-')
+def test_compare_reports_unreadable_directories(left, right):
+    ("Node#compare() should report the directories it can't list instead of their files as missing")
+
+    locked = os.path.join(right, 'static')
+    listdir = os.listdir
+
+    def failing_listdir(path):
+        if path == locked:
+            raise OSError(errno.EACCES, 'denied', path)
+        return listdir(path)
+
+    with patch('os.listdir', failing_listdir):
+        result = Node(left).compare(Node(right), mode='size')
+
+    [error.filename for error in result.errors].should.equal([locked])
+    result.only_left.should.equal({'only/left.txt'})
+    result.only_right.should.equal({'old/page.html'})
+    result.different.should.equal(set())
+    result.same.should.equal({'index.html'})
+    result.identical.should.be.false
+
+    with patch('os.listdir', failing_listdir):
+        Node(left).compare.when.called_with(Node(right), onerror='raise').should.throw(OSError)
+
+
+@with_sandbox({'sub/file.txt': 'x'}, prefix='plant-left-')
+@with_sandbox({'sub/file.txt': 'x'}, prefix='plant-right-')
+def test_compare_symlink_loops(left, right):
+    ("Node#compare() should compare symlinks as links and break cycles when following them")
+
+    for root in (left, right):
+        os.symlink('..', os.path.join(root, 'sub', 'loop'))
+
+    result = Node(left).compare(Node(right), mode='content')
+    result.same.should.equal({'sub/file.txt', 'sub/loop'})
+    result.identical.should.be.true
+
+    result = Node(left).compare(Node(right), mode='content', followlinks=True)
+    result.same.should.equal({'sub/file.txt'})
+    result.identical.should.be.true
+
+    os.remove(os.path.join(right, 'sub', 'loop'))
+    os.symlink('.', os.path.join(right, 'sub', 'loop'))
+    Node(left).compare(Node(right), mode='content').different.should.equal({'sub/loop'})
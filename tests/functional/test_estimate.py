@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from plant import Node
+from plant.backends.memory import MemoryBackend
+
+from .base import with_sandbox
+
+
+def balanced_tree():
+    # every random descent sees the same fan-outs, so each single
+    # sample is already the exact answer
+    files = {'README': '1234'}
+    for first in 'abc':
+        files['{0}/notes'.format(first)] = '1234'
+        for second in 'xy':
+            for name in 'pqrs':
+                files['{0}/{1}/{2}'.format(first, second, name)] = '1234'
+    return files
+
+
+@with_sandbox(balanced_tree(), prefix='plant-estimate-')
+def test_estimate_balanced_tree(root):
+    ("Node#estimate() should be exact on a tree of uniform fan-out")
+
+    estimate = Node(root).estimate(samples=20, seed=1)
+
+    estimate.samples.should.equal(20)
+    estimate.files.should.equal(28.0)
+    estimate.files_error.should.equal(0.0)
+    estimate.bytes.should.equal(112.0)
+    estimate.dirs.should.equal(10.0)
+    estimate.depths.should.equal({0: 1.0, 1: 3.0, 2: 24.0})
+
+
+def test_estimate_interval_covers_the_total():
+    ("Node#estimate() should report intervals around the real totals of an uneven tree")
+
+    backend = MemoryBackend()
+    for index in range(40):
+        backend.write('/big/{0}.txt'.format(index), b'x' * 10)
+    backend.write('/small/one.txt', b'x' * 10)
+    backend.write('/top.txt', b'x' * 10)
+
+    estimate = backend.Node('/').estimate(samples=200, seed=7)
+
+    low, high = estimate.files_interval
+    low.should.be.lower_than(42)
+    high.should.be.greater_than(42)
+    estimate.files.should.be.greater_than(estimate.files_error)
+    estimate.bytes.should.equal(estimate.files * 10)
+
+
+@with_sandbox(balanced_tree(), prefix='plant-estimate-')
+def test_estimate_stops_at_timeout(root):
+    ("Node#estimate() should stop sampling once the timeout is over")
+
+    estimate = Node(root).estimate(samples=10 ** 9, timeout=0)
+
+    estimate.samples.should.equal(1)
+    estimate.files_error.should.equal(float('inf'))
@@ -17,9 +17,17 @@
 
 from __future__ import unicode_literals
 
+import os
+
+from mock import patch
+
+import plant
 from plant import Node
+from plant.core import FOUND_UP
+from plant.walker import WalkReport
 
 from .base import LOCAL_FILE as L
+from .base import with_sandbox
 
 
 def test_node_depth_of():
@@ -41,6 +49,18 @@ def test_node_depth_of():
     (Node(path).depth_of(L('sandbox_simple/img')).should.equal(2))
 
 
+def test_node_depth_many():
+    ("Node#depth_many(paths) should tell files from directories like Node#depth_of")
+
+    paths = [
+        L('sandbox_simple/img/logo.png'),
+        L('sandbox_simple/img/'),
+        L('sandbox_simple/img'),
+        L('sandbox_simple/index.md'),
+    ]
+    Node(L()).depth_many(paths).should.equal([2, 2, 2, 1])
+
+
 def test_node_path_to_related_in_subtree_deep_in_it():
     ("Node#path_to_related(path) should return the "
      "approriate number when really deep in a subtree")
@@ -106,3 +126,115 @@ def test_node_non_existing_path_to_related():
 
     result = Node(source_path).path_to_related(requesting_path)
     result.should.equal("./img/404.png")
+
+
+@with_sandbox({
+    'index.md': '',
+    'img/logo.png': '',
+    'docs/even/deeper/item.md': '',
+    'static/main.css': '',
+}, prefix='plant-find-many-')
+def test_node_find_many(root):
+    ("Node#find_many() should bucket the results of several patterns found in one walk")
+
+    node = Node(root)
+    found = node.find_many(
+        {'docs': r'[.]md$', 'deep': r'/even/'},
+        globs={'img': '*.png', 'any': '*'},
+    )
+    sorted(found).should.equal(['any', 'deep', 'docs', 'img'])
+    [n.path for n in found['img']].should.equal([os.path.join(root, 'img/logo.png')])
+    sorted(n.path for n in found['docs']).should.equal(sorted(n.path for n in node.find_with_regex(r'[.]md$')))
+    found['deep'].should.equal(node.find_with_regex('/even/'))
+    len(found['any']).should.equal(4)
+
+    assets = node.glob_many({'css': '*.css', 'js': '*.js'}, lazy=True)
+    [(name, n.basename) for name, n in assets].should.equal([('css', 'main.css')])
+
+
+@with_sandbox({
+    'a.md': '1',
+    'b.md': '22',
+    'docs/c.md': '333',
+    'img/logo.png': '4444',
+    'img/icon.png': '55555',
+}, prefix='plant-find-many-')
+def test_node_find_many_limit(root):
+    ("Node#find_many(limit=n) should cap each bucket, lazy or not")
+
+    node = Node(root)
+    patterns = {'docs': r'[.]md$'}
+    globs = {'img': '*.png'}
+
+    found = node.find_many(patterns, globs=globs, limit=1)
+    len(found['docs']).should.equal(1)
+    len(found['img']).should.equal(1)
+
+    pairs = list(node.find_many(patterns, globs=globs, limit=1, lazy=True))
+    sorted(name for name, n in pairs).should.equal(['docs', 'img'])
+
+    found = node.find_many(patterns, globs=globs, limit=2, sort_by='size', reverse=True)
+    [n.basename for n in found['docs']].should.equal(['c.md', 'b.md'])
+    pairs = node.find_many(patterns, globs=globs, limit=2, sort_by='size', reverse=True, lazy=True)
+    [(name, n.basename) for name, n in sorted(pairs, key=lambda pair: pair[0])].should.equal([
+        ('docs', 'c.md'), ('docs', 'b.md'), ('img', 'icon.png'), ('img', 'logo.png'),
+    ])
+
+
+@with_sandbox({
+    'small.txt': '1',
+    'large.txt': '333',
+}, prefix='plant-walk-sort-')
+def test_walk_sort_by_skips_files_it_cannot_stat(root):
+    ("Node#walk(sort_by=label) should leave out the files that vanish and hand their errors to onerror")
+
+    dangling = os.path.join(root, 'dangling')
+    os.symlink(os.path.join(root, 'removed'), dangling)
+    node = Node(root)
+
+    [os.path.basename(p) for p in node.walk(sort_by='size')].should.equal(['small.txt', 'large.txt'])
+
+    report = WalkReport()
+    node.walk(sort_by='size', limit=1, reverse=True, onerror=report).should.equal([os.path.join(root, 'large.txt')])
+    report.skipped.should.equal([dangling])
+
+    node.walk.when.called_with(sort_by='size', onerror='raise').should.throw(OSError)
+
+
+@with_sandbox({
+    'project/setup.cfg': '',
+    'project/src/pkg/deep/module.py': '',
+    'project/src/pkg/other.py': '',
+    'project/src/tox.ini': '',
+}, prefix='plant-find-up-')
+def test_find_up_caches_each_directory(root):
+    ("Node#find_up() should find the nearest name and remember it for every directory on the way")
+
+    # answers of other tests would be served from the cache
+    FOUND_UP.clear()
+    module = Node(os.path.join(root, 'project/src/pkg/deep/module.py'))
+    setup = os.path.join(root, 'project', 'setup.cfg')
+
+    with plant.profile() as stats:
+        found = module.find_up('setup.cfg')
+    # one stat per directory, the hit builds its node from its own stat
+    stats.report()['stat']['count'].should.equal(4)
+    found.should.equal(Node(setup))
+
+    other = Node(os.path.join(root, 'project/src/pkg/other.py'))
+    with plant.profile() as stats:
+        other.find_up('setup.cfg').path.should.equal(setup)
+    stats.report()['stat']['count'].should.equal(0)
+
+    with plant.profile() as stats:
+        module.find_up('tox.ini', 'setup.cfg').path.should.equal(os.path.join(root, 'project/src/tox.ini'))
+    stats.report()['listdir']['count'].should.equal(3)
+
+    module.find_up('nothing.here', stop=root).should.be.none
+    module.find_up('setup.cfg', stop=os.path.join(root, 'project/src')).should.be.none
+    module.find_up('setup.cfg', cache=False).path.should.equal(setup)
+
+    with patch('plant.core.FOUND_UP_SIZE', 2):
+        other.find_up('nothing.here', stop=root).should.be.none
+    len(FOUND_UP).should.equal(2)
+    FOUND_UP.clear()
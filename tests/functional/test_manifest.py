@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import os
+
+from plant import Node
+from plant.manifest import MANIFEST_FILENAME, Manifest
+
+from .base import make_tree, with_sandbox
+
+
+@with_sandbox({
+    'index.html': '<html>',
+    'static/main.css': 'body {}',
+    'static/app.js': 'var a = 1;',
+}, prefix='plant-manifest-')
+def test_manifest_save_load_and_verify(root):
+    ("Node#manifest() should save the digests that Node#verify() checks later")
+
+    node = Node(root)
+    manifest = node.manifest(workers=2)
+    len(manifest).should.equal(3)
+    os.path.exists(os.path.join(root, MANIFEST_FILENAME)).should.be.true
+
+    loaded = Manifest.load(os.path.join(root, MANIFEST_FILENAME))
+    sorted(loaded.entries).should.equal(sorted(manifest.entries))
+
+    report = node.verify(workers=2)
+    report.passed.should.be.true
+    sorted(report.skipped).should.equal(['index.html', 'static/app.js', 'static/main.css'])
+
+    # same size and modification time, only a deep verification notices
+    stats = os.stat(os.path.join(root, 'static/app.js'))
+    with open(os.path.join(root, 'static/app.js'), 'w') as fd:
+        fd.write('var a = 2;')
+    os.utime(os.path.join(root, 'static/app.js'), ns=(stats.st_atime_ns, stats.st_mtime_ns))
+    os.unlink(os.path.join(root, 'index.html'))
+    make_tree(root, {'static/new.js': ''})
+
+    report = node.verify(loaded, find_added=True)
+    report.passed.should.be.false
+    report.missing.should.equal(['index.html'])
+    report.changed.should.equal([])
+    report.added.should.equal(['static/new.js'])
+
+    report = node.verify(deep=True, workers=2)
+    report.changed.should.equal(['static/app.js'])
+    report.ok.should.equal(['static/main.css'])
+
+
+@with_sandbox({
+    'index.html': '<html>',
+}, prefix='plant-manifest-')
+def test_manifest_records_unreadable_files(root):
+    ("Node#manifest() should record the files it can't read so Node#verify() doesn't report them as added")
+
+    os.symlink(os.path.join(root, 'nowhere'), os.path.join(root, 'dangling'))
+
+    node = Node(root)
+    manifest = node.manifest(workers=2)
+    len(manifest).should.equal(1)
+    manifest.unreadable.should.equal(['dangling'])
+    Manifest.load(os.path.join(root, MANIFEST_FILENAME)).unreadable.should.equal(['dangling'])
+
+    report = node.verify(find_added=True)
+    report.passed.should.be.true
+    report.added.should.equal([])
+    report.unreadable.should.equal(['dangling'])
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+from plant.backends.memory import MemoryBackend
+
+
+def make_backend():
+    return MemoryBackend.from_dict({
+        'index.md': '# hello',
+        'static/css/main.css': 'body {}',
+        'static/img/': None,
+        'docs/intro.md': 'intro',
+    }, clock=lambda: 1500000000)
+
+
+def test_memory_walk_glob_and_list():
+    ("memory nodes should walk, glob and list the tree given to from_dict()")
+
+    root = make_backend().root
+    sorted(root.walk()).should.equal([
+        '/docs/intro.md',
+        '/index.md',
+        '/static/css/main.css',
+    ])
+    [n.path for n in root.glob('*.css')].should.equal(['/static/css/main.css'])
+    sorted(n.basename for n in root.cd('static').list()).should.equal(['css', 'img'])
+    root.goto('static/img').is_dir.should.be.true
+    root.goto('index.md').metadata.size.should.equal(7)
+    root.goto('index.md').metadata.mtime.should.equal(1500000000)
+
+
+def test_memory_open_reads_and_writes():
+    ("memory nodes should open files for reading, writing and appending")
+
+    backend = make_backend()
+    root = backend.root
+
+    with root.open('static/img/logo.svg', 'w') as fd:
+        fd.write('<svg/>')
+    with root.open('static/img/logo.svg', 'a') as fd:
+        fd.write('\n')
+    with root.open('data.bin', 'wb') as fd:
+        fd.write(b'\x00\x01')
+
+    root.open('static/img/logo.svg').read().should.equal('<svg/>\n')
+    root.open('data.bin', 'rb').read().should.equal(b'\x00\x01')
+    root.goto('static/img/logo.svg').metadata.size.should.equal(7)
+
+    root.open.when.called_with('missing.md').should.throw(OSError)
+    root.open.when.called_with('nowhere/new.md', 'w').should.throw(OSError)
+    root.open.when.called_with('index.md', 'x').should.throw(OSError)
+    root.open.when.called_with('static', 'r').should.throw(OSError)
+
+
+def test_memory_remove_and_makedirs():
+    ("MemoryBackend.remove() should drop whole subtrees and makedirs() should create parents")
+
+    backend = make_backend()
+    backend.remove('static')
+    backend.makedirs('a/b/c')
+    backend.write('a/b/c/d.txt', 'd')
+
+    sorted(backend.root.walk()).should.equal([
+        '/a/b/c/d.txt',
+        '/docs/intro.md',
+        '/index.md',
+    ])
+    backend.exists('static/css/main.css').should.be.false
+    backend.remove.when.called_with('static').should.throw(OSError)
+    backend.makedirs.when.called_with('index.md').should.throw(OSError)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+from plant.backends.remote import ConnectionPool, MemoryObjectStore, RemoteBackend
+
+
+def make_store(directories=20, files=30):
+    objects = {'site/index.md': b'# hello', 'other/skip.css': b''}
+    for d in range(directories):
+        for f in range(files):
+            extension = f == 0 and 'css' or 'txt'
+            objects['site/pages/{0}/{1}.{2}'.format(d, f, extension)] = b'data'
+
+    return MemoryObjectStore(objects, clock=lambda: 1500000000)
+
+
+def test_memory_object_store_pages_like_s3():
+    ("MemoryObjectStore.list_objects() should page keys and roll up common prefixes")
+
+    store = MemoryObjectStore(dict((key, b'') for key in ['a/1', 'a/2', 'b', 'c/d/e']))
+
+    objects, prefixes, token = store.list_objects('', delimiter='/')
+    [o[0] for o in objects].should.equal(['b'])
+    prefixes.should.equal(['a/', 'c/'])
+    token.should.be.none
+
+    objects, prefixes, token = store.list_objects('', limit=2)
+    [o[0] for o in objects].should.equal(['a/1', 'a/2'])
+    objects, prefixes, token = store.list_objects('', token=token, limit=2)
+    [o[0] for o in objects].should.equal(['b', 'c/d/e'])
+    token.should.be.none
+
+
+def test_remote_glob_lists_in_pages():
+    ("RemoteBackend should glob a bucket with one request per page of keys")
+
+    store = make_store()
+    backend = RemoteBackend(lambda: store, prefix='site', page_size=100)
+
+    sorted(n.path for n in backend.root.glob('*.css')).should.have.length_of(20)
+    # one delimited listing of the root plus six pages of keys under pages/
+    store.requests['list'].should.equal(7)
+
+    backend.root.cd('pages/3').list().should.have.length_of(30)
+    backend.root.contains('pages/3/4.txt').should.be.true
+    backend.root.contains('skip.css').should.be.false
+    store.requests['list'].should.equal(7)
+
+
+def test_remote_stat_without_listing_the_tree():
+    ("RemoteBackend should stat single paths without listing their parents")
+
+    store = make_store()
+    backend = RemoteBackend(lambda: store, prefix='site')
+
+    index = backend.Node('/index.md')
+    index.is_file.should.be.true
+    index.metadata.size.should.equal(7)
+    backend.Node('/pages').is_dir.should.be.true
+    backend.Node('/missing.md').exists.should.be.false
+    store.requests['list'].should.equal(3)
+
+
+def test_remote_open_downloads_and_uploads():
+    ("RemoteBackend.open() should read objects and upload files written to it")
+
+    store = make_store()
+    backend = RemoteBackend(ConnectionPool(lambda: store, size=2), prefix='site')
+
+    backend.root.open('index.md').read().should.equal('# hello')
+    with backend.root.open('static/new.css', 'w') as fd:
+        fd.write('body {}')
+
+    store.get_object('site/static/new.css').should.equal(b'body {}')
+    backend.root.goto('static/new.css').metadata.size.should.equal(7)
+    backend.root.open.when.called_with('missing.md').should.throw(OSError)
+    backend.root.open.when.called_with('index.md', 'x').should.throw(OSError)
+
+
+def test_remote_listdir_only_lists_one_level():
+    ("RemoteBackend#listdir() should list the top level of a directory, not its whole subtree")
+
+    store = make_store()
+    backend = RemoteBackend(lambda: store, prefix='site', page_size=100)
+
+    sorted(n.basename for n in backend.root.list()).should.equal(['index.md', 'pages'])
+    backend.root.contains('missing.md').should.be.false
+    store.requests['list'].should.equal(1)
+
+    backend.root.cd('pages').list().should.have.length_of(20)
+    backend.root.cd('pages').list().should.have.length_of(20)
+    store.requests['list'].should.equal(2)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import hashlib
+
+from mock import patch
+
+from plant import Node
+from plant.estimate import Estimator
+from plant.index import Index
+from plant.shards import Shard, ShardExecutor
+
+from .base import with_sandbox
+
+
+def uneven_tree():
+    files = {'top.txt': 'top'}
+    for index in range(12):
+        files['big/{0}/a.txt'.format(index)] = 'a'
+        files['big/{0}/b.txt'.format(index)] = 'b'
+    files['big/loose.txt'] = 'loose'
+    files['small/one.txt'] = 'one'
+    return files
+
+
+@with_sandbox(uneven_tree(), prefix='plant-shards-')
+def test_shards_cover_the_tree_once(root):
+    ("Node#shards() should split the tree into balanced shards that list each file once")
+
+    node = Node(root)
+    expected = sorted(node.walk())
+
+    for by in ('fanout', 'estimate'):
+        shards = node.shards(3, by=by, seed=1)
+        shards.should.have.length_of(3)
+
+        paths = [path for shard in shards for path in shard.paths()]
+        sorted(paths).should.equal(expected)
+        [len(list(shard.paths())) for shard in shards].should.equal([9, 9, 9])
+
+
+@with_sandbox(uneven_tree(), prefix='plant-shards-')
+def test_shards_from_index(root):
+    ("Node#shards() should weigh subtrees by a saved index")
+
+    node = Node(root)
+    Index.build(node).save()
+
+    shards = node.shards(2)
+
+    [shard.weight for shard in shards].should.equal([14.0, 14.0])
+    restored = [Shard.from_dict(shard.to_dict()) for shard in shards]
+    [shard.units for shard in restored].should.equal([shard.units for shard in shards])
+
+
+@with_sandbox(uneven_tree(), prefix='plant-shards-')
+def test_shard_executor(root):
+    ("ShardExecutor should merge the walks, globs and hashes of the shards")
+
+    node = Node(root)
+    shards = node.shards(2, by='fanout')
+
+    for workers in (1, 2):
+        executor = ShardExecutor(workers)
+        sorted(executor.walk(shards)).should.equal(sorted(node.walk()))
+        sorted(executor.glob(shards, '*/a.txt')).should.equal(sorted(found.path for found in node.glob('*/a.txt')))
+        digests = dict(executor.hash(shards))
+        digests.should.have.length_of(27)
+        digests[node.join('top.txt')].should.equal(hashlib.sha256(b'top').hexdigest())
+
+
+@with_sandbox(uneven_tree(), prefix='plant-shards-')
+def test_shards_are_repeatable(root):
+    ("Node#shards() should give the same shards for the same seed")
+
+    node = Node(root)
+    runs = [[(shard.units, shard.weight) for shard in node.shards(3, by='estimate', samples=3, seed=5)]
+            for attempt in range(3)]
+
+    runs[1].should.equal(runs[0])
+    runs[2].should.equal(runs[0])
+
+
+@with_sandbox(uneven_tree(), prefix='plant-shards-')
+def test_shards_bound_the_estimates_of_wide_directories(root):
+    ("Node#shards(by='estimate') should share a budget of descents among siblings")
+
+    node = Node(root)
+    with patch('plant.shards.SPLIT_SAMPLES', 24), \
+            patch.object(Estimator, 'sample', autospec=True, side_effect=Estimator.sample) as sample:
+        node.shards(8, by='estimate', samples=20)
+
+    # 20 for the top, 2 * 12 for its two children and 2 for each of
+    # the 12 directories of big/
+    sample.call_count.should.equal(20 + 24 + 24)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import fcntl
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from plant.sharedcache import SharedCache
+
+from .base import make_tree, with_sandbox
+
+
+TREE = {
+    'tree/css/main.css': 'body {}',
+    'tree/css/print.css': '',
+    'tree/img/logo.png': '',
+}
+
+
+def paths(root):
+    """the cached tree and the cache file of a sandbox"""
+    return os.path.join(root, 'tree'), os.path.join(root, 'metadata.cache')
+
+
+@with_sandbox(TREE, prefix='plant-cache-')
+def test_shared_cache_is_shared_between_processes(root):
+    ("SharedCache should let another process reuse the stats and listings already stored")
+
+    tree, path = paths(root)
+    cache = SharedCache(path, size=1024 * 1024, ttl=60)
+    found = cache.backend.Node(tree).glob('*.css')
+    sorted(n.basename for n in found).should.equal(['main.css', 'print.css'])
+    cache.misses.should.be.greater_than(0)
+
+    script = '\n'.join([
+        'from plant.sharedcache import SharedCache',
+        'cache = SharedCache({0!r}, ttl=60)'.format(path),
+        'found = cache.backend.Node({0!r}).glob("*.css")'.format(tree),
+        'print(len(found), cache.misses)',
+    ])
+    output = subprocess.check_output([sys.executable, '-c', script]).decode('utf-8')
+    output.split().should.equal(['2', '0'])
+
+
+@with_sandbox(TREE, prefix='plant-cache-')
+def test_shared_cache_revalidates_listings_by_mtime(root):
+    ("SharedCache should reload a listing once its ttl expired and the directory changed")
+
+    tree, path = paths(root)
+    now = [1000.0]
+    cache = SharedCache(path, size=1024 * 1024, ttl=10, clock=lambda: now[0])
+    css = os.path.join(tree, 'css')
+
+    sorted(cache.listdir(css)).should.equal(['main.css', 'print.css'])
+    make_tree(root, {'tree/css/new.css': ''})
+    sorted(cache.listdir(css)).should.equal(['main.css', 'print.css'])
+
+    now[0] += 11
+    sorted(cache.listdir(css)).should.equal(['main.css', 'new.css', 'print.css'])
+    cache.stat.when.called_with(os.path.join(tree, 'missing.css')).should.throw(OSError)
+    cache.backend.Node(os.path.join(tree, 'img/logo.png')).is_file.should.be.true
+
+
+@with_sandbox(TREE, prefix='plant-cache-')
+def test_shared_cache_clears_itself_when_full(root):
+    ("SharedCache should drop every entry once its arena is full")
+
+    tree, path = paths(root)
+    cache = SharedCache(path, size=512 * 1024)
+    cache.put(b'first', b'value')
+    for number in range(5000):
+        cache.put('key-{0}'.format(number).encode('utf-8'), b'x' * 100)
+
+    cache.get(b'first').should.be.none
+    cache.get(b'key-4999')[0].should.equal(b'x' * 100)
+
+
+def put_keys(item):
+    path, worker = item
+    cache = CACHES[path]
+    for index in range(300):
+        cache.put('{0}-{1}'.format(worker, index).encode('ascii'), b'x' * 64)
+    return worker
+
+
+def try_lock(path):
+    try:
+        fcntl.flock(CACHES[path].lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return 'blocked'
+    return 'locked'
+
+
+# opened before forking like an app preloaded by a gunicorn master
+CACHES = {}
+
+
+@with_sandbox(TREE, prefix='plant-cache-')
+def test_shared_cache_excludes_the_writers_of_forked_processes(root):
+    ("SharedCache should serialize the writers of processes forked after it was opened")
+
+    tree, path = paths(root)
+    context = multiprocessing.get_context('fork')
+    cache = CACHES[path] = SharedCache(path, size=1024 * 1024, ttl=60)
+    try:
+        with cache.writing():
+            with context.Pool(1) as pool:
+                pool.map(try_lock, [path]).should.equal(['blocked'])
+
+        with context.Pool(4) as pool:
+            sorted(pool.map(put_keys, [(path, worker) for worker in range(4)])).should.equal([0, 1, 2, 3])
+
+        for worker in range(4):
+            for index in range(300):
+                found = cache.get('{0}-{1}'.format(worker, index).encode('ascii'))
+                found[0].should.equal(b'x' * 64)
+    finally:
+        del CACHES[path]
+
+
+@with_sandbox(TREE, prefix='plant-cache-')
+def test_shared_cache_reopens_after_fork_when_another_cache_file_is_gone(root):
+    ("SharedCache should still take its own lock in a forked child when another cache can't be reopened")
+
+    tree, path = paths(root)
+    gone = os.path.join(root, 'gone.cache')
+    caches = [SharedCache(gone, size=1024 * 1024)]
+    os.unlink(gone)
+    for number in range(4):
+        other = os.path.join(root, 'other-{0}.cache'.format(number))
+        caches.append(SharedCache(other, size=1024 * 1024))
+        os.unlink(other)
+
+    cache = CACHES[path] = SharedCache(path, size=1024 * 1024)
+    try:
+        with cache.writing():
+            with multiprocessing.get_context('fork').Pool(1) as pool:
+                pool.map(try_lock, [path]).should.equal(['blocked'])
+    finally:
+        del CACHES[path]
+        for other in caches:
+            other.close()
+        cache.close()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import os
+
+from mock import patch
+
+from plant import Node
+from plant import statx
+
+from .base import with_sandbox
+
+
+SANDBOX = {
+    'index.md': '# hello',
+    'docs/': None,
+}
+
+
+@with_sandbox(SANDBOX, prefix='plant-stat-many-')
+def test_stat_many_returns_nodes_in_order(root):
+    ("Node.stat_many(paths) should return one node per path in the same order")
+
+    paths = [
+        os.path.join(root, 'index.md'),
+        os.path.join(root, 'docs'),
+        os.path.join(root, 'missing.txt'),
+    ]
+    index, docs, missing = Node.stat_many(paths, workers=4)
+
+    index.should.equal(Node(paths[0]))
+    index.is_file.should.be.true
+    index.metadata.size.should.equal(7)
+
+    docs.should.equal(Node(paths[1]))
+    docs.is_dir.should.be.true
+
+    missing.exists.should.be.false
+    missing.is_file.should.be.true
+
+
+@with_sandbox(SANDBOX, prefix='plant-stat-many-')
+def test_stat_many_with_fields(root):
+    ("Node.stat_many(paths, fields=...) should fill the requested fields")
+
+    path = os.path.join(root, 'index.md')
+    node, = Node.stat_many([path], workers=1, fields=['size', 'mtime'])
+
+    node.is_file.should.be.true
+    node.metadata.size.should.equal(7)
+    node.metadata.mtime.should.equal(Node(path).metadata.mtime)
+
+
+def test_statx_matches_os_stat():
+    ("plant.statx.statx() should agree with os.stat when available")
+
+    if not statx.is_available():
+        return
+
+    stats = statx.statx(__file__)
+    expected = tuple(os.stat(__file__))
+    stats.should.equal(expected)
+
+
+@with_sandbox(SANDBOX, prefix='plant-stat-many-')
+def test_stat_many_only_skips_syncing_when_asked(root):
+    ("Node.stat_many(fields=...) should sync like os.stat unless dont_sync=True")
+
+    if not statx.is_available():
+        return
+
+    path = os.path.join(root, 'index.md')
+    with patch('plant.statx._statx', wraps=statx._statx) as syscall:
+        Node.stat_many([path], workers=1, fields=['size'])
+        Node.stat_many([path], workers=1, fields=['size'], dont_sync=True)
+
+    [arguments[2] for arguments, kw in syscall.call_args_list].should.equal([
+        statx.AT_STATX_SYNC_AS_STAT,
+        statx.AT_STATX_DONT_SYNC,
+    ])
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from mock import Mock, call
+
+import plant
+from plant.manifest import Manifest
+from plant.throttling import TokenBucket
+
+from .base import with_sandbox
+
+
+def throttled(ops_per_second):
+    """a throttle whose operations bucket never refills and records
+    the seconds it would sleep instead of sleeping"""
+    slept = []
+    throttle = plant.throttle(ops_per_second=ops_per_second)
+    throttle.operations = TokenBucket(ops_per_second, clock=lambda: 0.0, sleep=slept.append)
+    return throttle, slept
+
+
+@with_sandbox({'a.txt': 'same', 'd/b.txt': 'left'}, prefix='plant-throttle-')
+@with_sandbox({'a.txt': 'same', 'd/b.txt': 'diff'}, prefix='plant-throttle-')
+def test_throttle_limits_compare(left, right):
+    ("plant.throttle() should make Node#compare() wait for its listings, stats and opens")
+
+    left, right = plant.Node(left), plant.Node(right)
+    throttle, slept = throttled(4)
+    with throttle:
+        result = left.compare(right, mode='content', workers=1)
+
+    result.different.should.equal({'d/b.txt'})
+    # 4 listings, 6 stats and 4 opens, the first 4 fit in the burst
+    slept.should.have.length_of(10)
+
+
+@with_sandbox({'tree/a.txt': '', 'tree/d/b.txt': ''}, prefix='plant-throttle-')
+def test_throttle_limits_remove_tree(root):
+    ("plant.throttle() should make Node#remove_tree() wait for its listings, opens and removals")
+
+    tree = plant.Node(root).cd('tree')
+    throttle, slept = throttled(4)
+    with throttle:
+        report = tree.remove_tree(workers=1)
+
+    report.files.should.equal(2)
+    # 2 opens, 2 listings and 4 removals, the first 4 fit in the burst
+    slept.should.have.length_of(4)
+
+
+@with_sandbox({'a.txt': '0123456789', 'b.txt': '0123456789'}, prefix='plant-throttle-')
+def test_manifests_go_through_the_limiters(root):
+    ("Manifest.build() and Manifest#verify() should stat and read files through instrument.call()")
+
+    throttle = plant.throttle(ops_per_second=100, bytes_per_second=1000)
+    throttle.operations = Mock()
+    throttle.bytes = Mock()
+    with throttle:
+        manifest = Manifest.build(plant.Node(root), workers=1)
+        throttle.operations.reset_mock()
+        throttle.bytes.reset_mock()
+        manifest.verify(deep=True, workers=1).passed.should.be.true
+
+    # a stat and an open per file
+    throttle.operations.acquire.call_count.should.equal(4)
+    throttle.bytes.acquire.call_args_list.should.equal([call(10), call(10)])
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import os
+
+from plant import Node
+from plant.index import Index
+from plant.trie import PathTrie
+
+from .base import with_sandbox
+
+
+@with_sandbox({
+    'index.md': '# hello',
+    'static/css/main.css': 'body {}',
+    'static/img/logo.png': '',
+}, prefix='plant-trie-')
+def test_path_trie_from_walk_and_from_index(root):
+    ("PathTrie.from_walk() and PathTrie.from_index() should mirror the tree on disk")
+
+    os.makedirs(os.path.join(root, 'empty'))
+
+    trie = PathTrie.from_walk(root)
+    len(trie).should.equal(3)
+    trie.isdir(os.path.join(root, 'empty')).should.be.true
+    sorted(trie.iterate()).should.equal(sorted(Node(root).walk()))
+
+    detailed = PathTrie.from_walk(Node(root), stats=True)
+    detailed.backend.Node(os.path.join(root, 'index.md')).metadata.size.should.equal(7)
+    detailed.isdir(os.path.join(root, 'empty')).should.be.true
+    detailed.backend.listdir(os.path.join(root, 'empty')).should.equal([])
+    sorted(detailed.iterate()).should.equal(sorted(trie.iterate()))
+
+    indexed = PathTrie.from_index(Index.build(Node(root)))
+    sorted(indexed.iterate()).should.equal(sorted(trie.iterate()))
+    indexed.backend.Node(root).find('main.css').metadata.size.should.equal(7)
+    indexed.backend.Node(root).open('index.md').read().should.equal('# hello')
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import errno
+import os
+import threading
+import time
+
+from mock import patch
+
+from plant import Node
+from plant.walker import DirectoryCache, Walker, WalkReport
+
+from .base import with_sandbox
+
+
+@with_sandbox({
+    '.gitignore': 'node_modules/\n*.pyc\n',
+    '.git/HEAD': 'ref',
+    'node_modules/lib/index.js': '',
+    'app/main.py': '',
+    'app/main.pyc': '',
+    'app/.plantignore': 'generated.py\n',
+    'app/generated.py': '',
+    'docs/generated.py': '',
+}, prefix='plant-walker-')
+def test_walk_with_ignore_files(root):
+    ("Node#walk(ignore_files=True) should skip what the ignore files exclude")
+
+    found = Node(root).walk(ignore_files=True)
+    sorted(Node(root).relative(p) for p in found).should.equal([
+        '.gitignore',
+        'app/.plantignore',
+        'app/main.py',
+        'docs/generated.py',
+    ])
+
+
+@with_sandbox({
+    'build/out.py': '',
+    'src/main.py': '',
+}, prefix='plant-walker-')
+def test_glob_forwards_walk_options(root):
+    ("Node#glob(pattern, ignore=[...]) should pass traversal options to walk")
+
+    found = Node(root).glob('*.py', ignore=['build/'])
+    [Node(root).relative(n.path) for n in found].should.equal(['src/main.py'])
+
+
+@with_sandbox({
+    'real/file.txt': '',
+    'other/data.txt': '',
+}, prefix='plant-walker-')
+def test_walk_followlinks_breaks_cycles(root):
+    ("Node#walk(followlinks=True) should enter each folder once and survive cycles")
+
+    os.symlink(os.path.join(root, 'other'), os.path.join(root, 'real', 'link'))
+    os.symlink(root, os.path.join(root, 'real', 'loop'))
+
+    node = Node(root)
+    sorted(node.relative(p) for p in node.walk()).should.equal([
+        'other/data.txt',
+        'real/file.txt',
+    ])
+    found = sorted(node.relative(p) for p in node.walk(followlinks=True))
+    found.should.have.length_of(2)
+    found.should.contain('real/file.txt')
+    [p for p in found if p.endswith('data.txt')].should.have.length_of(1)
+
+
+@with_sandbox({
+    'ok/file.txt': '',
+}, prefix='plant-walker-')
+def test_walk_onerror_collects_unreadable_folders(root):
+    ("Node#walk(onerror=WalkReport()) should collect the folders it could not list")
+
+    report = WalkReport()
+    found = Node(root).walk(onerror=report)
+    found.should.equal([os.path.join(root, 'ok', 'file.txt')])
+    report.skipped.should.equal([])
+
+    report = WalkReport()
+    Node(os.path.join(root, 'missing')).walk(onerror=report).should.equal([])
+    report.skipped.should.equal([os.path.join(root, 'missing')])
+    report.summary().should.equal({'skipped': 1, 'timeouts': 0, 'errors': {'ENOENT': 1}})
+
+
+@with_sandbox(prefix='plant-walker-')
+def test_walk_onerror_raise(root):
+    ("Node#walk(onerror='raise') should raise the OSError of unreadable folders")
+
+    node = Node(os.path.join(root, 'missing'))
+    node.walk.when.called_with(onerror='raise').should.throw(OSError)
+
+
+@with_sandbox(dict(
+    ('d{0}/s{1}/f.txt'.format(i, j), '') for i in range(5) for j in range(3)
+), prefix='plant-walker-')
+def test_walk_threaded_matches_serial(root):
+    ("Node#walk(timeout=...) should read listings ahead and yield the same files")
+
+    node = Node(root)
+    node.walk(timeout=10, workers=3).should.equal(node.walk())
+
+
+@with_sandbox(dict(
+    ('d{0}/s{1}/t{2}/f.txt'.format(i, j, k), '') for i in range(4) for j in range(3) for k in range(2)
+), prefix='plant-walker-')
+def test_walk_with_dir_fd_matches_plain_walk(root):
+    ("Node#walk(use_dir_fd=True) should yield the same files as a plain walk")
+
+    node = Node(root)
+    node.walk(use_dir_fd=True, max_open_dirs=2).should.equal(node.walk())
+    sorted(node.walk(use_dir_fd=True, workers=4)).should.equal(sorted(node.walk()))
+
+
+@with_sandbox({
+    'a/one.txt': '1',
+    'b/two.txt': '22',
+}, prefix='plant-walker-')
+def test_walk_nodes_reuses_walk_stats(root):
+    ("Node#walk_nodes() should build nodes from the stats fetched during the walk")
+
+    for options in ({}, {'use_dir_fd': True}):
+        nodes = Node(root).walk_nodes(**options)
+        sorted((n.path, n.metadata.size) for n in nodes).should.equal([
+            (os.path.join(root, 'a', 'one.txt'), 1),
+            (os.path.join(root, 'b', 'two.txt'), 2),
+        ])
+        nodes[0].should.equal(Node(nodes[0].path))
+
+
+@with_sandbox({
+    'a/b/c/d/setup.cfg': '',
+    'a/b/c/d/e/f.txt': '',
+    'old/x.txt': '',
+    'new/setup.cfg': '',
+}, prefix='plant-walker-')
+def test_walk_orders(root):
+    ("Node#find(order=...) should list directories breadth-first or newest first")
+
+    os.utime(os.path.join(root, 'old'), (1000, 1000))
+    os.utime(os.path.join(root, 'a'), (2000, 2000))
+
+    roots = [r for r, dirs, files in Walker(order='bfs').walk(root)]
+    depths = [r.count(os.sep) for r in roots]
+    depths.should.equal(sorted(depths))
+
+    Node(root).find('setup.cfg$', order='bfs').path.should.equal(os.path.join(root, 'new', 'setup.cfg'))
+    Node(root).find('setup.cfg$', order='newest').path.should.equal(os.path.join(root, 'new', 'setup.cfg'))
+    roots = [r for r, dirs, files in Walker(order='newest', max_depth=2).walk(root)]
+    roots.should.equal([root] + [os.path.join(root, name) for name in ('new', 'a', 'old')])
+
+
+@with_sandbox({
+    'ok/file.txt': '',
+    'stalled/file.txt': '',
+}, prefix='plant-walker-')
+def test_walk_with_dir_fd_times_out_stalled_opens(root):
+    ("Node#walk(use_dir_fd=True, timeout=...) should not wait for a stalled open")
+
+    release = threading.Event()
+    real_open = os.open
+
+    def stalling_open(path, *args, **kw):
+        if path == 'stalled':
+            release.wait(5)
+        return real_open(path, *args, **kw)
+
+    report = WalkReport()
+    started = time.time()
+    try:
+        with patch('os.open', stalling_open):
+            found = Node(root).walk(use_dir_fd=True, timeout=0.3, workers=2, onerror=report)
+    finally:
+        elapsed = time.time() - started
+        release.set()
+
+    elapsed.should.be.lower_than(2)
+    found.should.equal([os.path.join(root, 'ok', 'file.txt')])
+    report.timeouts.should.equal([os.path.join(root, 'stalled')])
+
+
+@with_sandbox({
+    'old/a.txt': '',
+    'new/b.txt': '',
+    'gone/c.txt': '',
+}, prefix='plant-walker-')
+def test_walk_newest_reports_the_directories_it_cannot_stat(root):
+    ("Walker(order='newest') should stat directories along with their listing and report failures")
+
+    os.utime(os.path.join(root, 'old'), (1000, 1000))
+    real_stat = Walker.stat
+
+    def stat(walker, entry):
+        if entry.name == 'gone':
+            raise OSError(errno.EACCES, 'denied', entry.path)
+        return real_stat(walker, entry)
+
+    report = WalkReport()
+    walker = Walker(order='newest', onerror=report, use_dir_fd=True, max_open_dirs=1, workers=2)
+    with patch.object(Walker, 'stat', stat):
+        roots = [r for r, dirs, files in walker.walk(root)]
+
+    roots.should.equal([root, os.path.join(root, 'new'), os.path.join(root, 'old')])
+    report.skipped.should.equal([os.path.join(root, 'gone')])
+
+
+@with_sandbox({'a/': None, 'b/': None, 'c/': None}, prefix='plant-fds-')
+def test_directory_cache_is_bounded(root):
+    ("DirectoryCache should close the least recently used descriptors beyond its size")
+
+    cache = DirectoryCache(size=2)
+    cache.keep(root, cache.open(root))
+    for name in 'abc':
+        path = os.path.join(root, name)
+        cache.keep(path, cache.open(path))
+
+    # the root is used to open its children, so it stays
+    list(cache.descriptors).should.equal([root, os.path.join(root, 'c')])
+    cache.close()
+    cache.descriptors.should.be.empty
+
+
+@with_sandbox({'real/x/': None, 'a/': None}, prefix='plant-fds-')
+def test_directory_cache_reopens_evicted_parents_without_following_symlinks(root):
+    ("DirectoryCache should open a path from its nearest cached ancestor, refusing symlinks on the way")
+
+    os.symlink(os.path.join(root, 'real'), os.path.join(root, 'a', 'link'))
+
+    cache = DirectoryCache(size=1, top=root)
+    cache.keep(root, cache.open(root))
+
+    fd = cache.open(os.path.join(root, 'real', 'x'))
+    try:
+        os.fstat(fd).st_ino.should.equal(os.stat(os.path.join(root, 'real', 'x')).st_ino)
+    finally:
+        os.close(fd)
+
+    try:
+        cache.open(os.path.join(root, 'a', 'link', 'x'))
+        raise AssertionError('the symlink was followed')
+    except OSError as error:
+        error.errno.should.be.within([errno.ELOOP, errno.ENOTDIR])
+
+    list(cache.descriptors).should.equal([root])
+    cache.close()
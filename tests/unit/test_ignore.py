@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import re
+
+from plant.ignore import IgnoreMatcher, translate
+
+
+def test_translate_unanchored_pattern_matches_at_any_level():
+    ("plant.ignore.translate() should match unanchored patterns at any depth")
+
+    regex = re.compile(translate('*.pyc'))
+    regex.match('foo.pyc').should_not.be.none
+    regex.match('a/b/foo.pyc').should_not.be.none
+    regex.match('foo.py').should.be.none
+
+
+def test_translate_anchored_pattern():
+    ("plant.ignore.translate() should anchor patterns containing a slash")
+
+    regex = re.compile(translate('/build'))
+    regex.match('build').should_not.be.none
+    regex.match('src/build').should.be.none
+
+
+def test_translate_double_star():
+    ("plant.ignore.translate() should support ** across directories")
+
+    regex = re.compile(translate('docs/**/*.md'))
+    regex.match('docs/index.md').should_not.be.none
+    regex.match('docs/a/b/index.md').should_not.be.none
+    regex.match('src/index.md').should.be.none
+
+
+def test_matcher_dir_only_rules():
+    ("IgnoreMatcher should only apply trailing-slash rules to directories")
+
+    matcher = IgnoreMatcher('/srv/app', ['build/'])
+    matcher.ignores('/srv/app/build', is_dir=True).should.be.true
+    matcher.ignores('/srv/app/build', is_dir=False).should.be.false
+
+
+def test_matcher_negation_last_rule_wins():
+    ("IgnoreMatcher should let the last matching rule decide")
+
+    matcher = IgnoreMatcher('/srv/app', ['*.log', '!keep.log'])
+    matcher.ignores('/srv/app/debug.log', is_dir=False).should.be.true
+    matcher.ignores('/srv/app/keep.log', is_dir=False).should.be.false
+
+
+def test_matcher_inherits_from_parent():
+    ("IgnoreMatcher should fall back to the rules of its parent")
+
+    parent = IgnoreMatcher('/srv/app', ['*.pyc', '# comment', ''])
+    child = IgnoreMatcher('/srv/app/pkg', ['!important.pyc'], parent=parent)
+
+    child.ignores('/srv/app/pkg/module.pyc', is_dir=False).should.be.true
+    child.ignores('/srv/app/pkg/important.pyc', is_dir=False).should.be.false
+    child.ignores('/srv/app/pkg/module.py', is_dir=False).should.be.false
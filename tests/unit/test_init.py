@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import subprocess
+import sys
+
+import plant
+
+
+def modules_loaded_by(statement):
+    script = 'import sys; {0}; print(" ".join(sorted(sys.modules)))'.format(statement)
+    return subprocess.check_output([sys.executable, '-c', script]).decode('utf-8').split()
+
+
+def test_import_plant_does_not_load_core():
+    ("import plant should not import plant.core nor the optional engines")
+
+    modules = modules_loaded_by('import plant')
+    modules.should_not.contain('plant.core')
+    modules.should_not.contain('plant.walker')
+    modules.should_not.contain('plant.statx')
+
+
+def test_node_is_loaded_on_first_access():
+    ("plant.Node should import plant.core the first time it is accessed")
+
+    modules = modules_loaded_by('import plant; plant.Node')
+    modules.should.contain('plant.core')
+    modules.should_not.contain('plant.walker')
+
+
+def test_submodules_are_attributes():
+    ("plant.<submodule> should be importable through attribute access")
+
+    plant.walker.Walker.should.be.a(type)
+    plant.__getattr__.when.called_with('nope').should.throw(AttributeError)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from mock import Mock, patch
+
+import plant
+from plant import instrument
+from plant.core import Node
+
+
+def test_call_without_profile_just_calls():
+    ("instrument.call() should simply call the function when nothing is profiling")
+
+    function = Mock(return_value='result')
+    instrument.call('stat', function, 'a', b=1).should.equal('result')
+    function.assert_called_once_with('a', b=1)
+
+
+def test_profile_counts_operations():
+    ("plant.profile() should count and time each operation type")
+
+    with plant.profile() as stats:
+        instrument.call('stat', lambda: None)
+        instrument.call('stat', lambda: None)
+        list(instrument.iterate('listdir', [1, 2, 3]))
+
+    instrument.call('stat', lambda: None)
+
+    report = stats.report()
+    report['stat']['count'].should.equal(2)
+    report['listdir']['count'].should.equal(4)
+    report['open']['count'].should.equal(0)
+    report['stat']['seconds'].should.be.greater_than_or_equal_to(0)
+
+
+@patch('plant.core.os')
+def test_profile_counts_node_stats(os):
+    ("plant.profile() should account the os.stat performed by Node()")
+
+    with plant.profile() as stats:
+        Node('/foo/bar')
+
+    stats.report()['stat']['count'].should.equal(1)
+
+
+def test_profile_exports_to_sinks():
+    ("plant.profile(sink) should hand the finished profile to each sink")
+
+    sink = Mock()
+    with plant.profile(sink) as stats:
+        pass
+
+    sink.export.assert_called_once_with(stats)
+
+
+def test_prometheus_sink_renders_text_format():
+    ("PrometheusSink should render one sample per operation")
+
+    sink = instrument.PrometheusSink(prefix='plant')
+    with plant.profile(sink):
+        instrument.call('open', lambda: None)
+
+    sink.text.should.contain('plant_operations_total{operation="open"} 1')
+    sink.text.should.contain('# TYPE plant_operation_seconds_total counter')
+
+
+def test_statsd_sink_lines():
+    ("StatsdSink should produce a counter and a timer per operation")
+
+    profile = instrument.Profile()
+    profile.record('match', 0.5)
+    lines = list(instrument.StatsdSink(prefix='app').lines(profile))
+    lines.should.contain('app.match:1|c')
+    lines.should.contain('app.match.time:500.000|ms')
@@ -17,8 +17,11 @@
 
 from __future__ import unicode_literals
 
+import re
+
 from mock import Mock, patch, call
-from plant.core import Node, isfile, isdir, DotDict
+from plant.core import Node, isfile, isdir, DotDict, select
+from plant.patterns import PatternSet
 
 
 @patch('plant.core.io')
@@ -406,3 +409,157 @@ def test_node_depth_of_with_dir(isfile):
     Node("/foo/bar/").depth_of("/foo/bar/another/dir//").should.equal(2)
     Node("/foo/bar").depth_of("/foo/bar/another/dir//").should.equal(2)
     Node("/foo/bar///").depth_of("/foo/bar/another/dir//").should.equal(2)
+
+
+@patch('plant.core.os')
+def test_node_with_given_stats_does_not_stat(os):
+    ("Node(path, stats=...) should trust the given stats instead of calling os.stat")
+
+    nd = Node('/foo/bar/items', stats=(0o40755, 1, 2, 3, 4, 5, 6, 7, 8, 9))
+    nd.exists.should.be.true
+    nd.is_dir.should.be.true
+    nd.is_file.should.be.false
+    nd.metadata.mtime.should.equal(8)
+    os.stat.called.should.be.false
+
+
+def test_node_with_empty_stats_does_not_exist():
+    ("Node(path, stats=()) should represent a missing path")
+
+    nd = Node('/foo/bar/items.py', stats=())
+    nd.exists.should.be.false
+    nd.is_file.should.be.true
+    nd.metadata.size.should.equal(0)
+
+
+def test_select_keeps_the_smallest_items():
+    ("select() should return the smallest items sorted when given sort_by and limit")
+
+    items = iter([5, 3, 9, 1, 7])
+    list(select(items, sort_by=lambda x: x, limit=2)).should.equal([1, 3])
+
+
+def test_select_keeps_the_greatest_items_when_reverse():
+    ("select() should return the greatest items first when reverse=True")
+
+    items = iter([5, 3, 9, 1, 7])
+    list(select(items, sort_by=lambda x: x, limit=2, reverse=True)).should.equal([9, 7])
+
+
+def test_select_limit_without_sort_streams():
+    ("select() should only consume up to the limit when no sort_by is given")
+
+    items = iter([5, 3, 9, 1, 7])
+    list(select(items, limit=2)).should.equal([5, 3])
+    next(items).should.equal(9)
+
+
+@patch('plant.core.exists')
+def test_glob_sort_by_metadata_label_with_limit(exists):
+    ('Node#glob(sort_by=label, limit=n) returns the first n nodes by metadata')
+    nd = Node('/foo/bar')
+    nd.walk = Mock()
+    nd.walk.return_value = iter([
+        "/foo/wisdom/aaa.py",
+        "/foo/wisdom/bbb.py",
+        "/foo/wisdom/ccc.py",
+    ])
+    sizes = {
+        "/foo/wisdom/aaa.py": 30,
+        "/foo/wisdom/bbb.py": 10,
+        "/foo/wisdom/ccc.py": 20,
+    }
+
+    class SizedNode(Node):
+        def __init__(self, path):
+            super(SizedNode, self).__init__(path, stats=())
+            self.metadata['size'] = sizes[self.path]
+
+    nd.new = SizedNode
+    ret = nd.glob('*.py', sort_by='size', limit=2)
+    ret.should.be.a(list)
+    [n.path for n in ret].should.equal([
+        "/foo/wisdom/bbb.py",
+        "/foo/wisdom/ccc.py",
+    ])
+    nd.walk.assert_called_once_with(lazy=True)
+
+
+@patch('plant.core.exists')
+def test_node_relative_and_join_many(exists):
+    ("Node#relative_many() and Node#join_many() should match their single versions")
+
+    nd = Node('/foo/bar')
+    paths = ['/foo/bar/yes.py', '/foo/bar', '/foo/barbie.py', '/other/file.py']
+    nd.relative_many(paths).should.equal([nd.relative(p) for p in paths])
+
+    paths = ['a/b.py', '../c.py', 'a//b', 'a/./b', 'a/../b', '/etc', 'dir/', '.hidden', '']
+    nd.join_many(paths).should.equal([nd.join(p) for p in paths])
+
+
+@patch('plant.core.os')
+@patch('plant.core.exists')
+def test_node_depth_many(exists, os):
+    ("Node#depth_many() should match Node#depth_of() without stating each path")
+
+    os.sep = '/'
+    os.scandir.side_effect = OSError('missing')
+    exists.return_value = False
+
+    nd = Node('/foo/bar')
+    paths = [
+        '/foo/bar/another/dir/file.py',
+        '/foo/bar/another/dir',
+        '/foo/bar/another/dir/',
+        '/foo/bar/index.md',
+    ]
+    nd.depth_many(paths).should.equal([2, 2, 2, 1])
+    [nd.depth_of(p) for p in paths].should.equal([2, 2, 2, 1])
+    os.scandir.call_count.should.equal(3)
+
+
+@patch('plant.core.exists')
+def test_node_path_to_related_many(exists):
+    ("Node#path_to_related_many() should match Node#path_to_related()")
+
+    nd = Node("/foo/bar/something.py")
+    paths = [
+        "/foo/docs/assets/style.css",
+        "/foo/bar/index.md",
+        "/foo/bar/deep/er/page.md",
+        "/elsewhere/page.md",
+    ]
+    nd.path_to_related_many(paths).should.equal([nd.path_to_related(p) for p in paths])
+
+
+def test_pattern_set_matches_every_kind_of_pattern():
+    ("PatternSet should match suffix globs, regexes and full globs in one call")
+
+    patterns = PatternSet(
+        {'img': r'\.(png|jpg)$', 'md': r'\.md$', 'upper': r'\.TXT$'},
+        flags=0,
+        globs={'css': '*.css', 'all': '*', 'index': '*/index.*', 'a': 'a*'},
+    )
+    patterns.suffixes.should.equal({'.css': ['css'], '.md': ['md'], '.TXT': ['upper']})
+    patterns.match('/srv/logo.png').should.equal(['all', 'img'])
+    patterns.match('/srv/index.md').should.equal(['all', 'index', 'md'])
+    patterns.match('/srv/main.css').should.equal(['all', 'css'])
+    patterns.match('/srv/ba').should.equal(['all'])
+    PatternSet({'img': r'\.png$'}, flags=re.I, globs={'x': '*/x?'}).match('/A.PNG').should.equal(['img'])
+
+
+def test_pattern_set_searches_group_references_and_inline_flags_alone():
+    ("PatternSet should match backreferences, named groups and inline flags like re.search does")
+
+    patterns = PatternSet({
+        'aa': r'(a)\1',
+        'bb': r'(b)\1',
+        'readme': r'(?i)readme',
+        'first': r'(?P<ext>\.md)$',
+        'second': r'/(?P<ext>docs)/',
+        'plain': r'\.(py|md)$',
+    })
+    patterns.compiled.should.have.length_of(1)
+    patterns.match('/x/bb').should.equal(['bb'])
+    patterns.match('/x/aab').should.equal(['aa'])
+    patterns.match('/docs/README.md').should.equal(['first', 'plain', 'readme', 'second'])
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import io
+import pickle
+import time
+
+from mock import Mock, call
+
+import plant
+from plant import instrument
+from plant.throttling import Throttle, TokenBucket, between
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_waits_off_its_debt():
+    ("TokenBucket.acquire() should only sleep once the burst is spent")
+
+    clock = FakeClock()
+    bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+
+    [bucket.acquire() for _ in range(10)].should.equal([0] * 10)
+    bucket.acquire().should.equal(0.1)
+    clock.now += 1
+    bucket.acquire(5).should.equal(0)
+    bucket.acquire(15).should.equal(1.0)
+    clock.slept.should.equal([0.1, 1.0])
+
+
+def test_throttle_limits_operations_and_reads():
+    ("plant.throttle() should make instrument.call() wait for operations and bytes read")
+
+    throttle = plant.throttle(ops_per_second=100, bytes_per_second=1000)
+    throttle.operations = Mock()
+    throttle.bytes = Mock()
+
+    with throttle:
+        instrument.call('stat', lambda: None)
+        instrument.call('match', lambda: None)
+        fd = instrument.call('open', lambda: io.BytesIO(b'0123456789'))
+        fd.read(4).should.equal(b'0123')
+        list(fd).should.equal([b'456789'])
+        instrument.transferred(64)
+
+    instrument.call('stat', lambda: None)
+
+    throttle.operations.acquire.call_count.should.equal(2)
+    throttle.bytes.acquire.call_args_list.should.equal([call(4), call(6), call(64)])
+
+
+def test_throttle_only_limits_when_active():
+    ("Throttle(active=...) should let everything through outside of its hours")
+
+    night = time.struct_time((2020, 1, 1, 3, 0, 0, 0, 1, 0))
+    noon = time.struct_time((2020, 1, 1, 12, 0, 0, 0, 1, 0))
+
+    between(8, 20, clock=lambda: noon)().should.be.true
+    between(8, 20, clock=lambda: night)().should.be.false
+    between(22, 6, clock=lambda: night)().should.be.true
+
+    throttle = Throttle(ops_per_second=1, active=between(8, 20, clock=lambda: night))
+    throttle.operations = Mock()
+    throttle.acquire('stat')
+    throttle.operations.acquire.called.should.be.false
+
+
+def test_throttle_is_split_across_worker_processes():
+    ("Throttle#split() should give each worker process an equal share of the rates")
+
+    throttle = Throttle(ops_per_second=8, bytes_per_second=800, idle_priority=True, active=between(8, 20))
+    with throttle:
+        shares = instrument.split_limiters(4)
+
+    shares.should.have.length_of(1)
+    share = pickle.loads(pickle.dumps(shares[0]))
+    share.operations.rate.should.equal(2.0)
+    share.bytes.rate.should.equal(200.0)
+    share.idle_priority.should.be.false
+    share.active.start.should.equal(8)
+
+    Throttle(bytes_per_second=800).split(4).operations.should.be.none
+
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from plant.trie import PathTrie
+
+
+def make_trie():
+    trie = PathTrie('/srv/site')
+    trie.add('/srv/site/index.md')
+    trie.add('/srv/site/static/css/main.css')
+    trie.add('/srv/site/static/img/logo.png')
+    trie.add('/srv/site/static/img/icon.png')
+    trie.add('/srv/site/empty', is_dir=True)
+    return trie
+
+
+def test_path_trie_lookups():
+    ("PathTrie should answer existence, kind and children lookups")
+
+    trie = make_trie()
+    trie.exists('/srv/site/static/img/logo.png').should.be.true
+    trie.exists('/srv/site/static/img/logo.jpg').should.be.false
+    trie.exists('/srv/other').should.be.false
+    trie.isdir('/srv/site/static/img').should.be.true
+    trie.isfile('/srv/site/index.md').should.be.true
+    sorted(trie.children('/srv/site/static')).should.equal(['css', 'img'])
+    trie.children('/srv/site/index.md').should.be.none
+    trie.children('/srv/site/empty').should.equal([])
+
+
+def test_path_trie_counts_and_iterates_subtrees():
+    ("PathTrie should count and iterate the files under a prefix")
+
+    trie = make_trie()
+    trie.add('/srv/site/static/img/logo.png')
+
+    len(trie).should.equal(4)
+    trie.count('/srv/site/static').should.equal(3)
+    trie.count('/srv/site/static/img/icon.png').should.equal(1)
+    trie.count('/srv/site/missing').should.equal(0)
+    sorted(trie.iterate('/srv/site/static/img')).should.equal([
+        '/srv/site/static/img/icon.png',
+        '/srv/site/static/img/logo.png',
+    ])
+    trie.add.when.called_with('/srv/site/index.md/child').should.throw(ValueError)
+    trie.add.when.called_with('/etc/passwd').should.throw(ValueError)
+
+
+def test_path_trie_backend_serves_node_navigation():
+    ("PathTrie.backend should serve Node navigation without touching the disk")
+
+    site = make_trie().backend.Node('/srv/site')
+
+    site.is_dir.should.be.true
+    sorted(n.basename for n in site.cd('static').list()).should.equal(['css', 'img'])
+    site.contains('static/css/main.css').should.be.true
+    site.contains('static/css/missing.css').should.be.false
+    [n.path for n in site.glob('*.css')].should.equal(['/srv/site/static/css/main.css'])
+    sorted(site.trip_at('static/img')).should.equal([
+        '/srv/site/static/img/icon.png',
+        '/srv/site/static/img/logo.png',
+    ])
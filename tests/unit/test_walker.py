@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# <plant - filesystem for humans>
+# Copyright (C) <2013>  Gabriel Falcão <gabriel@nacaolivre.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import threading
+
+from mock import Mock
+
+from plant.walker import Frontier, Walker, WalkReport
+
+
+def make_entry(dev, ino, symlink=False):
+    entry = Mock()
+    entry.is_symlink.return_value = symlink
+    entry.stat.return_value = Mock(st_dev=dev, st_ino=ino)
+    return entry
+
+
+def test_descend_skips_symlinks_by_default():
+    ("Walker#descend() should not enter symlinked folders unless followlinks=True")
+
+    walker = Walker()
+    walker.descend(make_entry(1, 2, symlink=True), None, set()).should.be.false
+    walker.descend(make_entry(1, 2), None, set()).should.be.true
+
+
+def test_descend_one_file_system():
+    ("Walker#descend() should not cross devices when one_file_system=True")
+
+    walker = Walker(one_file_system=True)
+    walker.descend(make_entry(1, 2), 1, set()).should.be.true
+    walker.descend(make_entry(9, 3), 1, set()).should.be.false
+
+
+def test_descend_followlinks_tracks_visited_inodes():
+    ("Walker#descend() should enter each (dev, ino) only once when following links")
+
+    walker = Walker(followlinks=True)
+    visited = set()
+    walker.descend(make_entry(1, 2, symlink=True), 1, visited).should.be.true
+    walker.descend(make_entry(1, 2), 1, visited).should.be.false
+    visited.should.equal({(1, 2)})
+
+
+def test_walk_reports_stalled_listings_as_timeouts():
+    ("Walker#walk() should hand a WalkTimeout to onerror when a listing stalls")
+
+    release = threading.Event()
+    report = WalkReport()
+    walker = Walker(onerror=report, timeout=0.05, workers=1)
+    walker.scan = lambda root: release.wait() and ([], [], {})
+
+    try:
+        list(walker.walk('/stalled')).should.equal([])
+    finally:
+        release.set()
+
+    report.timeouts.should.equal(['/stalled'])
+    report.summary()['timeouts'].should.equal(1)
+
+
+def test_walk_lists_the_directories_queued_behind_stalled_ones():
+    ("Walker#walk() should only time out the stalled listings, not the ones queued behind them")
+
+    names = ['d{0}'.format(index) for index in range(8)]
+    stalled = {'/top/d0', '/top/d3', '/top/d5'}
+    release = threading.Event()
+
+    def scan(root):
+        if root in stalled:
+            release.wait()
+        if root == '/top':
+            return list(names), [], dict((name, make_entry(1, index)) for index, name in enumerate(names))
+        return [], ['f.txt'], {}
+
+    report = WalkReport()
+    walker = Walker(onerror=report, timeout=0.2, workers=2)
+    walker.scan = scan
+
+    try:
+        roots = [root for root, dirs, files in walker.walk('/top')]
+    finally:
+        release.set()
+
+    sorted(report.timeouts).should.equal(sorted(stalled))
+    sorted(roots).should.equal(sorted(
+        ['/top'] + ['/top/' + name for name in names if '/top/' + name not in stalled]
+    ))
+
+
+def test_frontier_orders():
+    ("Frontier should pop depth-first, breadth-first or by the lowest key")
+
+    def pairs(*names):
+        return [(Mock(), (name, depth)) for name, depth in names]
+
+    def walk(order):
+        frontier = Frontier(order)
+        frontier.extend(pairs(('a', 1), ('b', 1)))
+        popped = [frontier.pop()[0]]
+        frontier.extend(pairs(('a1', 2), ('a2', 2)))
+        while frontier:
+            popped.append(frontier.pop()[0])
+        return popped
+
+    walk('dfs').should.equal(['a', 'a1', 'a2', 'b'])
+    walk('bfs').should.equal(['a', 'b', 'a1', 'a2'])
+
+    frontier = Frontier(lambda entry, depth: -depth)
+    frontier.extend(pairs(('a', 1), ('b', 2), ('c', 3)))
+    [frontier.pop()[0] for _ in range(3)].should.equal(['c', 'b', 'a'])
+    (lambda: Walker(order='random')).when.called.should.throw(ValueError)
+